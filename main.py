@@ -2,9 +2,8 @@ import uvicorn
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from src.web.app import router as web_router
-from src.web.app import kis, db, collector # Import shared resources
-from src.execution.order_manager import OrderManager
-from src.core.scheduler import KronosScheduler
+from src.web.api import router as api_router
+from src.services import get_config, get_kis, get_db, get_collector, get_jobs, is_created # Shared resources, created on first use
 from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
 import os
@@ -15,25 +14,42 @@ scheduler_instance = None
 async def lifespan(app: FastAPI):
     # Startup logic
     print("Kronos System Starting up...")
+    # Trading side (scheduler -> collector -> pandas/strategies) is only loaded here
+    from src.execution.order_manager import OrderManager
+    from src.execution.trade_journal import TradeJournal
+    from src.core.scheduler import KronosScheduler
     
     # Initialize Scheduler specific components
-    order_manager = OrderManager(kis)
-    scheduler = KronosScheduler(kis, collector, order_manager, db)
+    journal_conf = get_config().get('journal', {}) or {}
+    journal = TradeJournal(
+        db_path=journal_conf.get('db_path', "data/trade_journal.db"),
+        flush_interval=journal_conf.get('flush_interval_sec', 1.0),
+        batch_size=journal_conf.get('batch_size', 200)
+    )
+    kis = get_kis() # Authenticates (or reuses the cached token) here, not at import
+    order_manager = OrderManager(kis, journal=journal)
+    order_manager.start() # Background account reconciliation + journal writer
+    scheduler = KronosScheduler(kis, get_collector(), order_manager, get_db())
     scheduler.start()
     
     global scheduler_instance
     scheduler_instance = scheduler # Keep reference
+    app.state.scheduler = scheduler # Exposed to /web/metrics
     
     yield
     # Shutdown logic
     print("Kronos System Shutting Down...")
     if scheduler_instance:
-        scheduler_instance.scheduler.shutdown()
+        scheduler_instance.stop()
+        scheduler_instance.order_manager.stop() # Flushes the trade journal
+    if is_created('jobs'):
+        get_jobs().shutdown()
 
 app = FastAPI(title="Kronos Trading System", lifespan=lifespan)
 
 # Mount Web Router
 app.include_router(web_router)
+app.include_router(api_router) # JSON API (/api/v1)
 
 # Mount Static if exists (optional for now, but good practice)
 static_path = "src/web/static"
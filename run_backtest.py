@@ -7,15 +7,6 @@ from datetime import datetime
 import os
 sys.path.append(os.getcwd())
 
-from src.database.db_manager import DatabaseManager
-from src.core.collector import MarketDataCollector
-from src.core.backtester import Backtester
-
-from src.strategies.buy_and_hold import BuyAndHoldStrategy
-from src.strategies.dca import BasicDCAStrategy, DynamicDCAStrategy
-from src.strategies.volatility_breakout import VolatilityBreakoutStrategy
-from src.strategies.ma_crossover import MovingAverageCrossoverStrategy
-
 def main():
     parser = argparse.ArgumentParser(description="Kronos Backtester Runner")
     parser.add_argument("--mode", type=str, required=True, choices=["lump", "dca", "algo"], help="Backtest mode")
@@ -29,12 +20,20 @@ def main():
     
     args = parser.parse_args()
     
+    # Heavy imports (pandas, strategies) only after the arguments parse,
+    # so --help and usage errors return immediately
+    import pandas as pd
+    from src.database.db_manager import DatabaseManager
+    from src.core.collector import MarketDataCollector
+    from src.core.backtester import Backtester
+    from src.strategies.buy_and_hold import BuyAndHoldStrategy
+    from src.strategies.dca import BasicDCAStrategy
+    from src.strategies.volatility_breakout import VolatilityBreakoutStrategy
+    from src.strategies.ma_crossover import MovingAverageCrossoverStrategy
+    
     # 1. Setup
     db = DatabaseManager()
     
-    import pandas as pd
-    from datetime import timedelta
-    
     # Check Data
     df = db.get_daily_price_optimized(args.symbol)
     
@@ -0,0 +1,193 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# A preset is plain config (a dict, or a YAML mapping under screener.presets):
+#
+#   label:     Shown in the screener UI
+#   metrics:   {name: expr | {expr, where, fill}} derived from `fundamentals` columns.
+#              expr / where are DataFrame.eval expressions; rows failing `where`
+#              and non-finite results (x/0) become NaN, then NaN -> fill.
+#   filters:   [expr, ...] boolean DataFrame.eval expressions, all must hold.
+#              Comparisons against NaN are False, so a filter also drops missing data.
+#   factors:   [{metric, ascending=True, weight=1.0, winsorize, sector_neutral}, ...]
+#              ascending: low value is better (rank 1 = lowest).
+#   method:    'rank' (weighted sum of ranks) or 'zscore' (weighted sum of z-scores).
+#   winsorize: [lower, upper] quantiles, default for every factor (None = off).
+#   sector_neutral: default for every factor; rank / standardize within sector.
+#
+# composite_score: lower is better for both methods. A row with a missing
+# factor value gets no score and is never selected.
+
+DREMAN = {
+    'label': "David Dreman (Contrarian)",
+    'metrics': {
+        # Price / Cash Flow: marketCap / operatingCashflow, missing -> 9999 (assume bad cash flow)
+        'pcr': {'expr': 'market_cap / operating_cashflow', 'where': 'operating_cashflow != 0 and market_cap != 0', 'fill': 9999},
+        # Price / Dividend = 1 / Yield, Penalty for no dividend
+        'pdr': {'expr': '1 / dividend_yield', 'where': 'dividend_yield > 0', 'fill': 9999},
+    },
+    'filters': [
+        # yfinance sector 'Financial Services' covers banks
+        "sector not in ['Financial Services', 'Real Estate']",
+        "quote_type == 'EQUITY'",
+        "debt_to_equity < 150", # yfinance uses %, so 150
+        "current_ratio > 1.0",
+        "pe > 0",
+    ],
+    'factors': [
+        {'metric': 'pe'},
+        {'metric': 'pb'},
+        {'metric': 'pcr'},
+        {'metric': 'pdr'},
+    ],
+}
+
+MAGIC_FORMULA = {
+    'label': "Joel Greenblatt (Magic Formula)",
+    'metrics': {
+        # EBIT / Enterprise Value, EBITDA as the proxy (EBIT is often missing in yfinance)
+        'earnings_yield': {'expr': 'ebitda / enterprise_value', 'where': 'enterprise_value > 0 and ebitda != 0', 'fill': 0.0},
+        # Return on Capital, ROA as the proxy
+        'roa': {'expr': 'roa', 'fill': 0.0},
+    },
+    'filters': [
+        "sector not in ['Financial Services', 'Real Estate', 'Utilities']",
+        "quote_type == 'EQUITY'",
+        "earnings_yield > 0",
+    ],
+    'factors': [
+        {'metric': 'earnings_yield', 'ascending': False},
+        {'metric': 'roa', 'ascending': False},
+    ],
+}
+
+PRESETS = {'dreman': DREMAN, 'magic': MAGIC_FORMULA}
+
+SPEC_KEYS = {'label', 'metrics', 'filters', 'factors', 'method', 'winsorize', 'sector_neutral'}
+FACTOR_KEYS = {'metric', 'ascending', 'weight', 'winsorize', 'sector_neutral'}
+METHODS = ('rank', 'zscore')
+
+
+def get_presets(custom=None):
+    """Built-in presets merged with custom ones (screener.presets); custom wins on name clash."""
+    presets = dict(PRESETS)
+    presets.update(custom or {})
+    return presets
+
+
+def preset_hash(spec):
+    """Stable short hash of a preset definition (detects edited presets behind stored results)."""
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+class FactorEngine:
+    """
+    Evaluates a declarative factor preset over a whole universe of raw
+    `fundamentals` rows: derived metrics, filters and the composite score are
+    vectorized column operations, so a new screen is a new preset, not new code.
+    """
+
+    def __init__(self, spec):
+        self.spec = self._validate(spec)
+
+    @staticmethod
+    def _validate(spec):
+        if not spec:
+            raise ValueError("No factor preset given")
+        unknown = set(spec) - SPEC_KEYS
+        if unknown:
+            raise ValueError(f"Unknown preset keys: {sorted(unknown)}")
+        if not spec.get('factors'):
+            raise ValueError("Preset needs at least one factor")
+        for factor in spec['factors']:
+            if 'metric' not in factor:
+                raise ValueError(f"Factor without metric: {factor}")
+            unknown = set(factor) - FACTOR_KEYS
+            if unknown:
+                raise ValueError(f"Unknown factor keys for {factor['metric']}: {sorted(unknown)}")
+        method = spec.get('method', 'rank')
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method} (expected one of {METHODS})")
+        return spec
+
+    @property
+    def factor_columns(self):
+        return [f['metric'] for f in self.spec['factors']]
+
+    def compute(self, raw):
+        """Raw fundamentals + derived metric columns (all rows, unfiltered)."""
+        df = raw.copy()
+        for name, definition in (self.spec.get('metrics') or {}).items():
+            if isinstance(definition, str):
+                definition = {'expr': definition}
+            values = pd.to_numeric(df.eval(definition['expr']), errors='coerce')
+            values = values.replace([np.inf, -np.inf], np.nan)
+            if definition.get('where'):
+                values = values.where(df.eval(definition['where']))
+            if definition.get('fill') is not None:
+                values = values.fillna(definition['fill'])
+            df[name] = values
+        return df
+
+    def mask(self, df):
+        """Boolean Series: rows passing every filter."""
+        keep = pd.Series(True, index=df.index)
+        for expr in self.spec.get('filters') or []:
+            keep &= df.eval(expr).fillna(False).astype(bool)
+        return keep
+
+    def _factor_score(self, df, factor):
+        values = df[factor['metric']].astype(float)
+        winsorize = factor.get('winsorize', self.spec.get('winsorize'))
+        if winsorize:
+            lower, upper = winsorize
+            values = values.clip(values.quantile(lower), values.quantile(upper))
+        ascending = factor.get('ascending', True)
+        neutral = factor.get('sector_neutral', self.spec.get('sector_neutral', False))
+        groups = values.groupby(df['sector'].fillna('Unknown')) if neutral else None
+
+        if self.spec.get('method', 'rank') == 'zscore':
+            if groups is not None:
+                mean, std = groups.transform('mean'), groups.transform('std')
+            else:
+                mean, std = values.mean(), values.std()
+            z = ((values - mean) / std).fillna(0.0).where(values.notna()) # Flat group -> 0
+            return z if ascending else -z
+
+        if groups is not None:
+            # Percentile within sector, scaled back to the size of the universe
+            return groups.rank(ascending=ascending, pct=True) * len(values)
+        return values.rank(ascending=ascending)
+
+    def score(self, df):
+        """Adds rank_<metric> / composite_score columns to an (already filtered) frame."""
+        df = df.copy()
+        composite = pd.Series(0.0, index=df.index)
+        for factor in self.spec['factors']:
+            column = f"rank_{factor['metric']}"
+            df[column] = self._factor_score(df, factor)
+            composite = composite + factor.get('weight', 1.0) * df[column] # NaN propagates
+        df['composite_score'] = composite
+        return df
+
+    def rank(self, df, top_n=None):
+        """
+        compute()d rows that passed mask() -> scored rows, best (lowest composite_score) first.
+        top_n: keep only the best N (None = all scored rows).
+        """
+        if df.empty:
+            return df
+        df = self.score(df)
+        if top_n is None:
+            return df.dropna(subset=['composite_score']).sort_values('composite_score', kind='stable')
+        return df.nsmallest(top_n, 'composite_score')
+
+    def run(self, raw, top_n=None):
+        """Raw fundamentals -> filtered, scored rows (see rank())."""
+        if raw.empty:
+            return pd.DataFrame()
+        df = self.compute(raw)
+        return self.rank(df[self.mask(df)], top_n=top_n)
@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.api.rate_limiter import TokenBucket
+
+
+def load_yf_info(symbol):
+    import yfinance as yf
+    return yf.Ticker(symbol).info
+
+
+class FundamentalsFetcher:
+    """
+    Concurrent Ticker.info downloads for the screeners.
+
+    - Bounded worker pool (max_workers), paced by a TokenBucket (rate_per_sec)
+      so a full-market screen doesn't get throttled by Yahoo.
+    - Per-request timeout: a request still running after `timeout` seconds is
+      abandoned and reported as failed (its thread is left to finish alone).
+    - Partial failures don't fail the screen: fetch() returns the rows that
+      parsed plus {symbol: reason} for the rest.
+    """
+
+    def __init__(self, max_workers=8, rate_per_sec=5, timeout=15, retries=1, info_loader=load_yf_info):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.info_loader = info_loader
+        self.bucket = TokenBucket(rate_per_sec, capacity=max(1, max_workers))
+        self.last_stats = {}
+
+    def _load(self, symbol, parse, started):
+        error = None
+        for _ in range(self.retries + 1):
+            self.bucket.acquire()
+            started[symbol] = time.monotonic() # Timeout runs from the request, not the queue wait
+            try:
+                info = self.info_loader(symbol)
+                if not info:
+                    raise ValueError("empty info")
+                return parse(symbol, info)
+            except Exception as e:
+                error = e
+        raise error
+
+    def fetch(self, symbols, parse, progress=None):
+        """
+        parse(symbol, info) -> row dict (or None to skip).
+        Returns (rows in input order, {symbol: error string}).
+        """
+        started = time.perf_counter()
+        rows = {}
+        failures = {}
+        if progress:
+            progress.start("fetch", total=len(symbols), unit="symbols", message="Fetching fundamentals")
+
+        started_at = {} # {symbol: monotonic start of the current attempt}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fundamentals")
+        try:
+            pending = {}
+            for symbol in symbols:
+                pending[executor.submit(self._load, symbol, parse, started_at)] = symbol
+
+            while pending:
+                done, _ = wait(list(pending), timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol = pending.pop(future)
+                    try:
+                        row = future.result()
+                        if row is not None:
+                            rows[symbol] = row
+                    except Exception as e:
+                        failures[symbol] = str(e) or e.__class__.__name__
+                    if progress:
+                        progress.update(message=symbol)
+
+                # Abandon requests that have been running past the timeout
+                now = time.monotonic()
+                for future, symbol in list(pending.items()):
+                    began = started_at.get(symbol)
+                    if began is not None and now - began > self.timeout:
+                        pending.pop(future)
+                        failures[symbol] = f"timeout after {self.timeout}s"
+                        if progress:
+                            progress.update(message=symbol)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self.last_stats = {
+            "requested": len(symbols),
+            "fetched": len(rows),
+            "failed": len(failures),
+            "elapsed_sec": round(time.perf_counter() - started, 2),
+            "rate_limit": self.bucket.get_stats(),
+        }
+        if failures:
+            print(f"Fundamentals fetch: {len(failures)}/{len(symbols)} failed: {list(failures)[:10]}")
+        return [rows[s] for s in symbols if s in rows], failures
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from src.database.db_manager import DatabaseManager
+from src.analysis.fundamentals_fetcher import FundamentalsFetcher
+
+# fundamentals column -> yfinance Ticker.info key
+INFO_KEYS = {
+    'name': 'shortName',
+    'sector': 'sector',
+    'quote_type': 'quoteType',
+    'price': 'currentPrice',
+    'market_cap': 'marketCap',
+    'pe': 'trailingPE',
+    'pb': 'priceToBook',
+    'operating_cashflow': 'operatingCashflow',
+    'dividend_yield': 'dividendYield', # e.g. 0.05
+    'debt_to_equity': 'debtToEquity', # yfinance returns %, e.g. 154.2
+    'current_ratio': 'currentRatio',
+    'enterprise_value': 'enterpriseValue',
+    'ebitda': 'ebitda',
+    'roa': 'returnOnAssets',
+}
+NUMERIC_COLUMNS = [c for c in INFO_KEYS if c not in ('name', 'sector', 'quote_type')]
+
+
+def parse_fundamentals(symbol, info):
+    """Ticker.info -> raw `fundamentals` row (derived ratios are computed by the screeners)."""
+    row = {'symbol': symbol}
+    for col, key in INFO_KEYS.items():
+        value = info.get(key)
+        row[col] = value if isinstance(value, (int, float, str)) or value is None else None
+    row['name'] = row['name'] or symbol
+    row['sector'] = row['sector'] or 'Unknown'
+    row['quote_type'] = row['quote_type'] or 'EQUITY' # EQUITY, ETF, MUTUALFUND
+    return row
+
+
+class FundamentalsStore:
+    """
+    Fundamentals cached in the `fundamentals` table, one snapshot per symbol
+    per as_of date. Fundamentals change quarterly, so screens read local rows
+    and only symbols whose latest snapshot is older than max_age_days (or
+    missing) are re-downloaded, in one concurrent batch.
+    """
+
+    def __init__(self, db: DatabaseManager, fetcher: FundamentalsFetcher = None, max_age_days=7):
+        self.db = db
+        self.fetcher = fetcher or FundamentalsFetcher()
+        self.max_age_days = max_age_days
+        self.failures = {} # {symbol: reason} from the last refresh
+        self.requested = 0 # Symbols asked for in the last load()
+
+    def _cutoff(self):
+        return (datetime.now() - timedelta(days=self.max_age_days)).strftime("%Y%m%d")
+
+    def stale_symbols(self, symbols, latest=None):
+        """Symbols with no snapshot or one older than max_age_days."""
+        if latest is None:
+            latest = self.db.get_latest_fundamentals(symbols)
+        cutoff = self._cutoff()
+        fresh = set(latest.index[latest['as_of'] >= cutoff])
+        return [s for s in symbols if s not in fresh]
+
+    def refresh(self, symbols, force=False, max_refresh=None, progress=None, latest=None):
+        """
+        Re-download stale (or all, if force) symbols and store today's snapshot.
+        max_refresh: cap on downloads (first stale symbols in input order); the
+        rest wait for the scheduled bulk refresh.
+        latest: get_latest_fundamentals() result, if the caller already has it.
+        Returns {'requested', 'refreshed', 'failed', 'skipped_fresh', 'deferred'}.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        targets = symbols if force else self.stale_symbols(symbols, latest)
+        deferred = 0
+        if max_refresh is not None and len(targets) > max_refresh:
+            deferred = len(targets) - max_refresh
+            targets = targets[:max_refresh]
+        rows, self.failures = self.fetcher.fetch(targets, parse_fundamentals, progress=progress) if targets else ([], {})
+        if rows:
+            self.db.upsert_fundamentals(rows)
+        return {
+            'requested': len(symbols),
+            'refreshed': len(rows),
+            'failed': len(self.failures),
+            'skipped_fresh': len(symbols) - len(targets) - deferred,
+            'deferred': deferred,
+        }
+
+    def load(self, symbols, refresh_stale=True, as_of=None, max_refresh=None, progress=None):
+        """
+        Latest snapshot per symbol as a DataFrame (column 'symbol', input order).
+        refresh_stale: fetch missing/stale symbols first (ignored for point-in-time as_of).
+        max_refresh: see refresh().
+        """
+        symbols = list(dict.fromkeys(symbols))
+        self.requested = len(symbols)
+        self.failures = {}
+        df = self.db.get_latest_fundamentals(symbols, as_of=as_of)
+        if refresh_stale and as_of is None:
+            stats = self.refresh(symbols, max_refresh=max_refresh, progress=progress, latest=df)
+            if stats['refreshed']:
+                df = self.db.get_latest_fundamentals(symbols)
+        return df.reindex([s for s in symbols if s in df.index]).reset_index()
+
+    def freshness(self, df):
+        """Freshness summary for the last load() result, shown next to screen results."""
+        cutoff = self._cutoff()
+        return {
+            'count': len(df),
+            'missing': max(0, self.requested - len(df)), # No snapshot yet
+            'oldest': df['as_of'].min() if not df.empty else None,
+            'newest': df['as_of'].max() if not df.empty else None,
+            'stale': int((df['as_of'] < cutoff).sum()) if not df.empty else 0,
+            'max_age_days': self.max_age_days,
+        }
@@ -1,32 +1,52 @@
-import yfinance as yf
+from datetime import datetime
+
 import pandas as pd
-import numpy as np
 
-class DremanScreener:
-    """
-    Implements David Dreman's Contrarian Investing Strategy (Refined).
-    
-    Step 1: Universe Selection
-    - Top 500-1000 Market Cap (Stable, Information Rich)
-    - Exclude: Financials, ETFs, REITs (Sector based)
+from src.analysis.factor_engine import FactorEngine, DREMAN, MAGIC_FORMULA, PRESETS, get_presets, preset_hash
+from src.analysis.fundamentals_fetcher import FundamentalsFetcher
+from src.analysis.fundamentals_store import FundamentalsStore, parse_fundamentals, INFO_KEYS, NUMERIC_COLUMNS
+from src.analysis.universe import Universe
+from src.database.db_manager import DatabaseManager
 
-    Step 2: Safety Filters
-    - Debt/Equity < 150% (Stability)
-    - Current Ratio > 1.0 (Liquidity)
-    - Positive Earnings (Profitability)
+# Hand-picked US lists, kept as named universes and as the fallback
+LEGACY_UNIVERSES = ('large_cap', 'mid_cap')
 
-    Step 3: Ranking (Composite Score)
-    - Rank by PER, PBR, PCR (Price/CashFlow), PDR (Price/Dividend)
-    - Low Score (Sum of Ranks) is better.
+class FactorScreener:
+    """
+    Screens a universe with a declarative FactorEngine preset (see factor_engine.py):
+    fundamentals are loaded once, then metrics, filters and the composite score
+    are evaluated over every symbol in one vectorized pass.
+    Subclasses only add result formatting for their preset.
     """
+    preset = None
     
+    def __init__(self, fetcher: FundamentalsFetcher = None, store: FundamentalsStore = None, universe: Universe = None,
+                 max_refresh=None, preset=None):
+        # Concurrent, rate-limited Ticker.info downloads
+        self.fetcher = fetcher or (store.fetcher if store else FundamentalsFetcher())
+        # Local fundamentals table (None = always download live)
+        self.store = store
+        # DB universe definitions over stock_master (needs the store's DB)
+        self.universe = universe or (Universe(store.db) if store else None)
+        # Max live downloads per screen for stale/missing rows (None = all)
+        self.max_refresh = max_refresh
+        self.engine = FactorEngine(preset or self.preset)
+        self.failures = {} # {symbol: reason} from the last fetch
+        self.freshness = None # Store freshness summary of the last screen
     
     def get_universe(self, universe_type='large_cap'):
         """
         Returns a list of symbols to screen based on universe_type.
+        - A name from the `universe` table (e.g. 'krx_large', 'us_sp500'):
+          resolved against stock_master, as yfinance tickers.
         - large_cap: Top 50-100 mega cap stocks.
         - mid_cap: Rank ~250-750 (Approx $2B - $20B Market Cap).
+        The two hard-coded lists are also the fallback when stock_master is empty.
         """
+        if self.universe is not None and universe_type not in LEGACY_UNIVERSES:
+            symbols = self.universe.symbols(universe_type)
+            if symbols:
+                return symbols
         
         large_caps = [
             # Tech
@@ -69,151 +89,94 @@ class DremanScreener:
              
         return large_caps
 
-    def fetch_fundamentals(self, symbols):
+    def load_raw(self, symbols, progress=None):
+        """
+        Raw `fundamentals` rows for symbols: from the store (refreshing stale rows)
+        when one is set, else downloaded live.
+        Numeric columns are coerced to float so preset expressions never see None.
+        """
+        if self.store is not None:
+            df = self.store.load(symbols, max_refresh=self.max_refresh, progress=progress)
+            self.failures = self.store.failures
+            self.freshness = self.store.freshness(df)
+        else:
+            rows, self.failures = self.fetcher.fetch(symbols, parse_fundamentals, progress=progress)
+            self.freshness = None
+            df = pd.DataFrame(rows, columns=['symbol'] + list(INFO_KEYS))
+        df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        return df
+
+    def fetch_fundamentals(self, symbols, progress=None):
+        """Raw fundamentals + the preset's derived metrics (unfiltered)."""
         print(f"Fetching fundamentals for {len(symbols)} symbols...")
-        data = []
-        
-        for symbol in symbols:
-            try:
-                t = yf.Ticker(symbol)
-                info = t.info
-                
-                # Basic Info
-                sector = info.get('sector', 'Unknown')
-                quote_type = info.get('quoteType', 'EQUITY') # EQUITY, ETF, MUTUALFUND
-                
-                # Metrics
-                price = info.get('currentPrice')
-                mkt_cap = info.get('marketCap')
-                
-                # 1. Earnings (PER)
-                pe = info.get('trailingPE')
-                
-                # 2. Book Value (PBR)
-                pb = info.get('priceToBook')
-                
-                # 3. Cash Flow (PCR)
-                # OCF per share is not always directly there, calculate: Price / (OCF / Shares)
-                # Or use marketCap / totalCashFromOperatingActivities
-                ocf = info.get('operatingCashflow')
-                pcr = None
-                if ocf and mkt_cap:
-                    pcr = mkt_cap / ocf
-                    
-                # 4. Dividend (PDR = 1 / Yield)
-                div_yield = info.get('dividendYield') # e.g. 0.05
-                pdr = None
-                if div_yield and div_yield > 0:
-                    pdr = 1 / div_yield
-                else:
-                    pdr = 9999 # Penalty for no dividend
-                    
-                # Safety
-                debt_to_equity = info.get('debtToEquity') # yfinance returns %, e.g. 154.2
-                current_ratio = info.get('currentRatio')
-                
-                data.append({
-                    'symbol': symbol,
-                    'name': info.get('shortName', symbol),
-                    'sector': sector,
-                    'quote_type': quote_type,
-                    'price': price,
-                    'pe': pe,
-                    'pb': pb,
-                    'pcr': pcr,
-                    'pdr': pdr, # Lower PDR = Higher Yield
-                    'dividend_yield': div_yield,
-                    'debt_to_equity': debt_to_equity,
-                    'current_ratio': current_ratio
-                })
-            except Exception as e:
-                print(f"Error fetching {symbol}: {e}")
-                
-        return pd.DataFrame(data)
+        raw = self.load_raw(symbols, progress=progress)
+        return self.engine.compute(raw) if not raw.empty else pd.DataFrame()
 
-    def screen(self, universe_type='large_cap'):
+    def rank(self, universe_type='large_cap', progress=None, top_n=30):
+        """Best top_n rows of the universe as a DataFrame (metrics, rank_* and composite_score)."""
         symbols = self.get_universe(universe_type)
-        df = self.fetch_fundamentals(symbols)
-        
-        if df.empty:
-            return []
-            
-        # --- Step 1: Universe & Sector Filters ---
-        # Exclude Financial Services, ETFs
-        # Note: yfinance sector 'Financial Services' covers banks.
-        mask_sector = (df['sector'] != 'Financial Services') & (df['sector'] != 'Real Estate')
-        mask_type = (df['quote_type'] == 'EQUITY')
-        
-        df_filtered = df[mask_sector & mask_type].copy()
-        
-        # --- Step 2: Safety Filters ---
-        # Debt/Equity < 150 (Note: yfinance uses %, so 150)
-        # Current Ratio > 1.0
-        # Positive PE
-        
-        # Handle N/As before filtering (fill with bad values or drop)
-        # For Debt, if None, assumed okay? Or drop. Let's drop stricter.
-        df_filtered = df_filtered.dropna(subset=['pe', 'debt_to_equity', 'current_ratio'])
-        
-        mask_safety = (
-            (df_filtered['debt_to_equity'] < 150) & 
-            (df_filtered['current_ratio'] > 1.0) & 
-            (df_filtered['pe'] > 0)
-        )
-        df_filtered = df_filtered[mask_safety].copy()
-        
-        if df_filtered.empty:
-            return []
+        raw = self.load_raw(symbols, progress=progress)
+        if progress:
+            progress.start("rank", message="Filtering & ranking")
+        return self.engine.run(raw, top_n=top_n)
 
-        # --- Step 3: Composite Ranking ---
-        # We need PER, PBR, PCR, PDR.
-        # If any is NaN/None, we can't rank properly.
-        # Fill PCR with High Value if missing (assume bad cash flow)
-        df_filtered['pcr'] = df_filtered['pcr'].fillna(9999)
-        # PDR already handled (9999 if no yield)
-        
-        # Rank Each (Ascending: Low is better)
-        df_filtered['rank_pe'] = df_filtered['pe'].rank(ascending=True)
-        df_filtered['rank_pb'] = df_filtered['pb'].rank(ascending=True)
-        df_filtered['rank_pcr'] = df_filtered['pcr'].rank(ascending=True)
-        df_filtered['rank_pdr'] = df_filtered['pdr'].rank(ascending=True)
-        
-        # Sum Ranks
-        df_filtered['composite_score'] = (
-            df_filtered['rank_pe'] + 
-            df_filtered['rank_pb'] + 
-            df_filtered['rank_pcr'] + 
-            df_filtered['rank_pdr']
-        )
-        
-        # Sort by Score
-        df_filtered = df_filtered.sort_values(by='composite_score', ascending=True)
-        
-        # Format for Display
-        results = []
-        for i, row in df_filtered.iterrows():
-             yield_str =  f"{row['dividend_yield']*100:.2f}%" if row['dividend_yield'] else "0%"
-             
-             results.append({
-                 'rank': int(row['composite_score']), # Just using score as rank indicator
-                 'symbol': row['symbol'],
-                 'name': row['name'],
-                 'sector': row['sector'],
-                 'price': row['price'],
-                 'pe': round(row['pe'], 2),
-                 'pb': round(row['pb'], 2) if row['pb'] else "-",
-                 'pcr': round(row['pcr'], 2) if row['pcr'] < 1000 else ">1000",
-                 'dividend_yield': yield_str,
-                 'debt_to_equity': f"{row['debt_to_equity']:.0f}%",
-                 'current_ratio': round(row['current_ratio'], 2),
-                 'score_text': f"Score: {int(row['composite_score'])}"
-             })
-             
-        # Return Top 20-30
-        return results[:30]
+    def screen(self, universe_type='large_cap', progress=None, top_n=30):
+        top = self.rank(universe_type, progress=progress, top_n=top_n)
+        # Only the top rows are formatted for display
+        return [self.format_row(row) for row in top.to_dict('records')]
+
+    def format_row(self, row):
+        return {
+            'rank': round(row['composite_score'], 2),
+            'symbol': row['symbol'],
+            'name': row['name'],
+            'sector': row['sector'],
+            'price': row['price'],
+            'factors': {m: (round(row[m], 4) if pd.notna(row[m]) else "-") for m in self.engine.factor_columns},
+            'score_text': f"Score: {row['composite_score']:.2f}"
+        }
+
+
+class DremanScreener(FactorScreener):
+    """
+    Implements David Dreman's Contrarian Investing Strategy (Refined).
+    
+    Step 1: Universe Selection
+    - Top 500-1000 Market Cap (Stable, Information Rich)
+    - Exclude: Financials, ETFs, REITs (Sector based)
+
+    Step 2: Safety Filters
+    - Debt/Equity < 150% (Stability)
+    - Current Ratio > 1.0 (Liquidity)
+    - Positive Earnings (Profitability)
+
+    Step 3: Ranking (Composite Score)
+    - Rank by PER, PBR, PCR (Price/CashFlow), PDR (Price/Dividend)
+    - Low Score (Sum of Ranks) is better.
+
+    The rules live in factor_engine.DREMAN.
+    """
+    preset = DREMAN
+
+    def format_row(self, row):
+        yield_str = f"{row['dividend_yield']*100:.2f}%" if pd.notna(row['dividend_yield']) and row['dividend_yield'] else "0%"
+        return {
+            'rank': int(row['composite_score']), # Just using score as rank indicator
+            'symbol': row['symbol'],
+            'name': row['name'],
+            'sector': row['sector'],
+            'price': row['price'],
+            'pe': round(row['pe'], 2),
+            'pb': round(row['pb'], 2) if pd.notna(row['pb']) else "-",
+            'pcr': round(row['pcr'], 2) if row['pcr'] < 1000 else ">1000",
+            'dividend_yield': yield_str,
+            'debt_to_equity': f"{row['debt_to_equity']:.0f}%",
+            'current_ratio': round(row['current_ratio'], 2),
+            'score_text': f"Score: {int(row['composite_score'])}"
+        }
 
 
-class MagicFormulaScreener(DremanScreener):
+class MagicFormulaScreener(FactorScreener):
     """
     Implements Joel Greenblatt's Magic Formula.
     Rank companies by:
@@ -222,119 +185,111 @@ class MagicFormulaScreener(DremanScreener):
        -> Proxy: ROA (Return on Assets) or ROCE if available. High is Better.
     
     Composite Score = Rank(EY) + Rank(ROC)
+    The rules live in factor_engine.MAGIC_FORMULA.
     """
-    
-    def fetch_magic_metrics(self, symbols):
-        print(f"[MagicFormula] Fetching for {len(symbols)} symbols...")
-        data = []
-        
-        for symbol in symbols:
-            try:
-                t = yf.Ticker(symbol)
-                info = t.info
-                
-                # Basic
-                sector = info.get('sector', 'Unknown')
-                quote_type = info.get('quoteType', 'EQUITY')
-                price = info.get('currentPrice')
-                mkt_cap = info.get('marketCap') # Minimum size check usually
-                
-                # Magic Metrics
-                # 1. Earnings Yield
-                # Greenblatt: EBIT / Enterprise Value.
-                # yfinance usually has 'enterpriseValue'. EBIT is sometimes 'earningsBeforeInterestAndTaxes',
-                # or we can use EBITDA as proxy if EBIT missing?
-                # Actually info keys often: 'ebitda', 'enterpriseValue'. 
-                # Let's try to get them.
-                
-                ev = info.get('enterpriseValue')
-                ebitda = info.get('ebitda') 
-                
-                earnings_yield = 0.0
-                if ev and ebitda and ev > 0:
-                    earnings_yield = ebitda / ev
-                    
-                # 2. Return on Capital
-                # Choosing ROA as proxy for screen simplicity
-                roa = info.get('returnOnAssets')
-                roe = info.get('returnOnEquity')
-                
-                if roa is None: roa = 0.0
-                
-                data.append({
-                    'symbol': symbol,
-                    'name': info.get('shortName', symbol),
-                    'sector': sector,
-                    'quote_type': quote_type,
-                    'price': price,
-                    'earnings_yield': earnings_yield,
-                    'roa': roa,
-                    'ev': ev,
-                    'ebitda': ebitda
-                })
-                
-            except Exception as e:
-                print(f"Error fetching {symbol}: {e}")
-                
-        return pd.DataFrame(data)
+    preset = MAGIC_FORMULA
 
-    def screen(self, universe_type='large_cap'):
-        symbols = self.get_universe(universe_type) # Use same large cap universe
-        df = self.fetch_magic_metrics(symbols)
-        
-        if df.empty:
-            return []
-            
-        # 1. Filters (Universe)
-        # Exclude Financials & Utilities (Greenblatt rule)
-        # Exclude ADRs (usually).
-        mask_sector = (~df['sector'].isin(['Financial Services', 'Real Estate', 'Utilities']))
-        mask_type = (df['quote_type'] == 'EQUITY')
-        
-        df_filtered = df[mask_sector & mask_type].copy()
-        
-        # 2. Minimum Yield Check (Optional, e.g. EY > 0)
-        df_filtered = df_filtered[df_filtered['earnings_yield'] > 0].copy()
-        
-        if df_filtered.empty:
-            return []
+    def format_row(self, row):
+        # Format EV/EBITDA
+        ev_ebitda = "-"
+        if pd.notna(row['ebitda']) and row['ebitda'] > 0 and pd.notna(row['enterprise_value']):
+            ev_ebitda = f"{row['enterprise_value']/row['ebitda']:.2f}x"
+
+        return {
+            'rank': int(row['composite_score']),
+            'symbol': row['symbol'],
+            'name': row['name'],
+            'sector': row['sector'],
+            'price': row['price'],
             
-        # 3. Ranking
-        # Earnings Yield: High is Better (Descending) -> Rank 1 is best
-        df_filtered['rank_ey'] = df_filtered['earnings_yield'].rank(ascending=False)
-        
-        # ROA: High is Better (Descending)
-        df_filtered['rank_roa'] = df_filtered['roa'].rank(ascending=False)
-        
-        # Composite
-        df_filtered['composite_score'] = df_filtered['rank_ey'] + df_filtered['rank_roa']
-        
-        # Sort
-        df_filtered = df_filtered.sort_values(by='composite_score', ascending=True)
-        
-        results = []
-        for i, row in df_filtered.iterrows():
-            ey_str = f"{row['earnings_yield']*100:.2f}%"
-            roa_str = f"{row['roa']*100:.2f}%"
+            # Display different cols for Magic Formula
+            'magic_ey': f"{row['earnings_yield']*100:.2f}%",
+            'magic_roa': f"{row['roa']*100:.2f}%",
+            'ev_ebitda': ev_ebitda,
             
-            # Format EV/EBITDA
-            ev_ebitda = "-"
-            if row['ebitda'] and row['ebitda'] > 0 and row['ev']:
-                ev_ebitda = f"{row['ev']/row['ebitda']:.2f}x"
+            'score_text': f"Score: {int(row['composite_score'])}"
+        }
 
-            results.append({
-                 'rank': int(row['composite_score']),
-                 'symbol': row['symbol'],
-                 'name': row['name'],
-                 'sector': row['sector'],
-                 'price': row['price'],
-                 
-                 # Display different cols for Magic Formula
-                 'magic_ey': ey_str,
-                 'magic_roa': roa_str,
-                 'ev_ebitda': ev_ebitda,
-                 
-                 'score_text': f"Score: {int(row['composite_score'])}"
-            })
-            
-        return results[:30]
+
+# Built-in presets with a dedicated result layout; other presets use FactorScreener's
+SCREENERS = {'dreman': DremanScreener, 'magic': MagicFormulaScreener}
+
+
+def screen_options(screener_conf):
+    """run_screen_job kwargs from the `screener` section of settings.yaml (web + scheduler)."""
+    screener_conf = screener_conf or {}
+    fundamentals_conf = screener_conf.get('fundamentals') or {}
+    return {
+        "fetch_options": screener_conf.get('fetch'),
+        "max_age_days": fundamentals_conf.get('max_age_days', 7),
+        "max_refresh": fundamentals_conf.get('max_refresh_per_screen', 300),
+        "presets": screener_conf.get('presets'),
+    }
+
+
+def snapshot_top_n(screener_conf=None):
+    """Screen size stored as snapshots (screener.snapshots.top_n)."""
+    return ((screener_conf or {}).get('snapshots') or {}).get('top_n', 30)
+
+
+def load_screen_snapshot(db, strategy_type, universe_type, presets=None, top_n=None):
+    """
+    Stored screener_results row, or None if missing or computed with a since-edited preset.
+    top_n: serve only a snapshot ranked at least that deep, its results cut to top_n.
+    """
+    snapshot = db.get_screener_result(strategy_type, universe_type)
+    if snapshot is None:
+        return None
+    spec = get_presets(presets).get(strategy_type)
+    if spec is None or snapshot['preset_hash'] != preset_hash(spec):
+        return None
+    if top_n is not None:
+        if snapshot['top_n'] is None or snapshot['top_n'] < top_n:
+            return None
+        payload = snapshot['payload']
+        snapshot['payload'] = {**payload, 'results': payload['results'][:top_n]}
+    return snapshot
+
+
+def run_screen_job(strategy_type, universe_type='large_cap', fetch_options=None, db_path=None, max_age_days=7,
+                   max_refresh=None, top_n=30, presets=None, snapshot=False, source=None, progress=None):
+    """
+    Picklable entry point for JobManager workers.
+    strategy_type: preset name, built-in ('dreman', 'magic') or from presets.
+    fetch_options: FundamentalsFetcher kwargs (max_workers, rate_per_sec, timeout, retries).
+    db_path: read fundamentals from the local store (stale rows refreshed, at most
+    max_refresh per screen) and universes from the DB; None = live download.
+    presets: custom factor presets (screener.presets in settings.yaml).
+    snapshot: store the result in screener_results (needs db_path), served by the
+    web page until the next refresh; only pass it for screens of snapshot_top_n
+    rows, so a smaller ad-hoc run never replaces the shared snapshot.
+    source: 'scheduled' / 'on_demand' label.
+    Returns {'results': [...], 'layout': 'dreman' | 'magic' | 'factors', 'factors': [metric, ...],
+             'failures': {symbol: reason}, 'fetch_stats': {...}, 'freshness': {...} | None, 'computed_at': str}.
+    """
+    all_presets = get_presets(presets)
+    if strategy_type not in all_presets:
+        raise ValueError(f"Unknown screener preset: {strategy_type}")
+    spec = all_presets[strategy_type]
+    # A custom preset reusing a built-in name gets the generic layout
+    screener_cls = SCREENERS[strategy_type] if spec is PRESETS.get(strategy_type) else FactorScreener
+
+    fetcher = FundamentalsFetcher(**(fetch_options or {}))
+    store = FundamentalsStore(DatabaseManager(db_path), fetcher, max_age_days=max_age_days) if db_path else None
+    screener = screener_cls(fetcher, store, max_refresh=max_refresh, preset=spec)
+    results = screener.screen(universe_type=universe_type, progress=progress, top_n=top_n)
+    if progress:
+        progress.finish(message=f"{len(results)} candidates")
+    result = {
+        "results": results,
+        "layout": strategy_type if screener_cls is not FactorScreener else "factors",
+        "factors": screener.engine.factor_columns,
+        "failures": screener.failures,
+        "fetch_stats": screener.fetcher.last_stats,
+        "freshness": screener.freshness,
+        "computed_at": datetime.now().isoformat(timespec='seconds'),
+    }
+    if snapshot and store is not None:
+        store.db.save_screener_result(strategy_type, universe_type, result, preset_hash=preset_hash(spec),
+                                      source=source, computed_at=result["computed_at"], top_n=top_n)
+    return result
@@ -0,0 +1,103 @@
+import pandas as pd
+
+from src.database.db_manager import DatabaseManager
+
+# Seeded into the `universe` table (existing rows are never overwritten).
+# markets / sectors: comma-separated stock_master values (None = any).
+# min_rank / max_rank: 1-based market-cap rank inside the market/sector filter.
+DEFAULT_UNIVERSES = [
+    {'name': 'krx_large', 'label': 'KRX Large Cap (Top 200)', 'markets': 'KOSPI,KOSDAQ', 'max_rank': 200},
+    {'name': 'krx_mid', 'label': 'KRX Mid Cap (Rank 201-700)', 'markets': 'KOSPI,KOSDAQ', 'min_rank': 201, 'max_rank': 700},
+    {'name': 'kosdaq', 'label': 'KOSDAQ (All)', 'markets': 'KOSDAQ'},
+    {'name': 'us_sp500', 'label': 'US S&P 500', 'markets': 'S&P500'},
+    {'name': 'us_all', 'label': 'US All Listings (S&P500 + NASDAQ + NYSE)', 'markets': 'S&P500,NASDAQ,NYSE'},
+    {'name': 'all', 'label': 'Full Market (KRX + US)', 'markets': 'KOSPI,KOSDAQ,S&P500,NASDAQ,NYSE'},
+]
+
+# yfinance suffix per KRX market
+YF_SUFFIX = {'KOSPI': '.KS', 'KOSDAQ': '.KQ', 'KOSDAQ GLOBAL': '.KQ'}
+
+
+def to_yf_symbol(code, market):
+    """'005930' on KOSPI -> '005930.KS'. US tickers are used as-is ('BRK.B' -> 'BRK-B')."""
+    suffix = YF_SUFFIX.get(market)
+    if suffix:
+        return f"{code}{suffix}"
+    return code.replace('.', '-')
+
+
+def _split(value):
+    return [v.strip() for v in value.split(',') if v.strip()] if value else []
+
+
+class Universe:
+    """
+    Screening universes defined in the `universe` table and resolved against
+    stock_master (+ fundamentals market caps for listings that lack one)
+    in one vectorized pass.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.db.upsert_universes(DEFAULT_UNIVERSES, replace=False)
+
+    def definitions(self):
+        return self.db.get_universes()
+
+    def get(self, name):
+        return next((d for d in self.definitions() if d['name'] == name), None)
+
+    def frame(self, name):
+        """
+        Members of a universe as a DataFrame
+        ['code', 'name', 'market', 'sector', 'market_cap', 'yf_symbol'], largest first.
+        Empty if the universe is unknown or stock_master has no matching rows.
+        """
+        definition = self.get(name)
+        if definition is None:
+            return pd.DataFrame(columns=['code', 'name', 'market', 'sector', 'market_cap', 'yf_symbol'])
+
+        df = self.db.get_stock_master(markets=_split(definition['markets']) or None)
+        if df.empty:
+            df['yf_symbol'] = []
+            return df
+
+        df['yf_symbol'] = [to_yf_symbol(c, m) for c, m in zip(df['code'], df['market'])]
+
+        # Fill caps missing in the listing (US) from stored fundamentals
+        df['market_cap'] = pd.to_numeric(df['market_cap'], errors='coerce')
+        if df['market_cap'].isna().any():
+            caps = self.db.get_latest_fundamentals(df.loc[df['market_cap'].isna(), 'yf_symbol'])
+            if not caps.empty:
+                df['market_cap'] = df['market_cap'].fillna(df['yf_symbol'].map(caps['market_cap']))
+                df['sector'] = df['sector'].fillna(df['yf_symbol'].map(caps['sector']))
+
+        sectors = _split(definition['sectors'])
+        if sectors:
+            df = df[df['sector'].isin(sectors)]
+        exclude = _split(definition['exclude_sectors'])
+        if exclude:
+            df = df[~df['sector'].isin(exclude)]
+        if definition['min_market_cap'] is not None:
+            df = df[df['market_cap'] >= definition['min_market_cap']]
+        if definition['max_market_cap'] is not None:
+            df = df[df['market_cap'] <= definition['max_market_cap']]
+
+        df = df.sort_values('market_cap', ascending=False, na_position='last', kind='stable')
+        if definition['min_rank'] is not None or definition['max_rank'] is not None:
+            df = df[df['market_cap'].notna()]
+            start = (definition['min_rank'] or 1) - 1
+            df = df.iloc[start:definition['max_rank']]
+        return df.reset_index(drop=True)
+
+    def symbols(self, name):
+        """yfinance tickers of a universe (empty list if unknown / no master data)."""
+        return self.frame(name)['yf_symbol'].tolist()
+
+    def all_symbols(self):
+        """Union of every defined universe (for bulk fundamentals refresh)."""
+        seen = {}
+        for definition in self.definitions():
+            for symbol in self.symbols(definition['name']):
+                seen[symbol] = True
+        return list(seen)
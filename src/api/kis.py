@@ -1,9 +1,16 @@
 import requests
+from requests.adapters import HTTPAdapter
 import yaml
 import json
+import os
 import time
+import threading
+import tempfile
 from datetime import datetime
 
+from src.api.rate_limiter import KisRateLimiter
+from src.api.quote_cache import QuoteCache
+
 class KisApi:
     def __init__(self, config_path="config/settings.yaml"):
         with open(config_path, 'r', encoding='utf-8') as f:
@@ -14,17 +21,152 @@ class KisApi:
         self.account_no = self.config['kis']['account_no']
         self.url_base = self.config['kis']['url_base']
         
+        # HTTP Session (Keep-Alive + Connection Pool)
+        # Reuse connections instead of a new TCP+TLS handshake per call.
+        http_conf = self.config['kis'].get('http', {}) or {}
+        self.pool_size = http_conf.get('pool_size', 10)
+        self.timeout = (http_conf.get('connect_timeout', 3.05), http_conf.get('read_timeout', 10))
+        self.session = self._create_session()
+        
+        # Client-side Rate Limiting (KIS per-second quota)
+        # Real: ~20 req/s per app key, Simulation (VTS): much stricter.
+        is_simulation = "openapivts" in self.url_base
+        rl_conf = self.config['kis'].get('rate_limit', {}) or {}
+        self.rate_limiter = KisRateLimiter(
+            quotation_per_sec=rl_conf.get('quotation_per_sec', 1 if is_simulation else 15),
+            trading_per_sec=rl_conf.get('trading_per_sec', 1 if is_simulation else 5),
+            max_retries=rl_conf.get('max_retries', 3),
+            backoff_base=rl_conf.get('backoff_base', 0.2)
+        )
+        
+        # Short-TTL Quote Cache (seconds per endpoint, 0 = disabled)
+        # Scheduler, OrderManager and dashboard share one API call per symbol per tick.
+        cache_conf = self.config['kis'].get('quote_cache', {}) or {}
+        self.quote_cache = QuoteCache({
+            'inquire-price': cache_conf.get('inquire-price', 1.0),
+            'price': cache_conf.get('price', 1.0)
+        }, max_entries=cache_conf.get('max_entries', 1000))
+        
+        # Per-endpoint latency metrics {path: {...}}
+        self._latency_stats = {}
+        self._stats_lock = threading.Lock()
+        
         # Token Management
         self.token_file = "data/token.json"
         self.access_token = None
         self.token_expired_at = None
+        # Single-flight refresh: one /oauth2/tokenP call at a time, others wait on it
+        self._token_lock = threading.Lock()
+        # Proactive refresh this many seconds before expiry (background timer)
+        self.token_refresh_margin = self.config['kis'].get('token_refresh_margin', 1800)
+        self._refresh_timer = None
         
         # Initial Auth
         self._load_token_from_file()
         self._ensure_token()
+        self._schedule_token_refresh()
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, method, path, headers, params=None, data=None):
+        """
+        Send a request through the pooled session and record its latency.
+        Shared by domestic/overseas quotation, trading and auth endpoints.
+        Calls with a tr_id go through the rate limiter, and throttled
+        responses are retried with jittered backoff.
+        """
+        url = f"{self.url_base}{path}"
+        tr_id = headers.get("tr_id")
+        attempt = 0
+        
+        while True:
+            if tr_id:
+                self.rate_limiter.acquire(tr_id)
+            
+            started = time.perf_counter()
+            res = None
+            try:
+                res = self.session.request(method, url, headers=headers, params=params, data=data, timeout=self.timeout)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self._record_latency(path, elapsed_ms, ok=(res is not None and res.status_code == 200))
+            
+            if not tr_id or not self._is_throttled(res):
+                return res
+            
+            gave_up = attempt >= self.rate_limiter.max_retries
+            self.rate_limiter.record_throttle(tr_id, gave_up=gave_up)
+            if gave_up:
+                print(f"Rate limited on {path} ({tr_id}), giving up after {attempt} retries.")
+                return res
+            
+            time.sleep(self.rate_limiter.backoff(attempt))
+            attempt += 1
+
+    @staticmethod
+    def _is_throttled(res):
+        """
+        KIS signals quota overrun either with HTTP 429 or with
+        msg_cd EGW00201 ("초당 거래건수를 초과하였습니다.") in the body.
+        """
+        if res.status_code == 429:
+            return True
+        if res.status_code != 200:
+            try:
+                return res.json().get('msg_cd') == 'EGW00201'
+            except ValueError:
+                return False
+        return False
+
+    def _record_latency(self, path, elapsed_ms, ok=True):
+        with self._stats_lock:
+            stat = self._latency_stats.get(path)
+            if stat is None:
+                stat = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+                self._latency_stats[path] = stat
+            stat["count"] += 1
+            stat["total_ms"] += elapsed_ms
+            stat["last_ms"] = elapsed_ms
+            stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+            if not ok:
+                stat["errors"] += 1
+
+    def get_latency_stats(self):
+        """
+        Returns latency summary per endpoint path.
+        {path: {'count', 'errors', 'avg_ms', 'max_ms', 'last_ms'}}
+        """
+        with self._stats_lock:
+            return {
+                path: {
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "avg_ms": round(s["total_ms"] / s["count"], 2) if s["count"] else 0.0,
+                    "max_ms": round(s["max_ms"], 2),
+                    "last_ms": round(s["last_ms"], 2),
+                }
+                for path, s in self._latency_stats.items()
+            }
+
+    def get_quote_cache_stats(self):
+        """Hit/miss/coalesced counts and hit rate per quote endpoint."""
+        return self.quote_cache.get_stats()
+
+    def get_rate_limit_stats(self):
+        """Queue wait / throttle counters per bucket (quotation, trading)."""
+        return self.rate_limiter.get_stats()
+
+    def close(self):
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+        self.session.close()
 
     def _load_token_from_file(self):
-        import os
         if os.path.exists(self.token_file):
             try:
                 with open(self.token_file, 'r') as f:
@@ -37,11 +179,26 @@ class KisApi:
             except Exception as e:
                 print(f"Failed to load token cache: {e}")
 
+    def _is_token_valid(self):
+        return bool(self.access_token and self.token_expired_at and datetime.now() < self.token_expired_at)
+
     def _ensure_token(self):
-        """Check if token is valid, otherwise refresh it layout."""
-        if self.access_token and self.token_expired_at and datetime.now() < self.token_expired_at:
+        """
+        Check if token is valid, otherwise refresh it.
+        Hot path is a lock-free in-memory check. On expiry only one caller
+        refreshes; concurrent callers block on the lock and reuse its token.
+        """
+        if self._is_token_valid():
             return
 
+        with self._token_lock:
+            # Another caller may have refreshed while we waited
+            if self._is_token_valid():
+                return
+            self._refresh_token()
+
+    def _refresh_token(self):
+        """Issue a new access token. Caller must hold _token_lock."""
         # print("Fetching new KIS Access Token...")
         headers = {"content-type": "application/json"}
         body = {
@@ -50,29 +207,79 @@ class KisApi:
             "appsecret": self.app_secret
         }
         
-        url = f"{self.url_base}/oauth2/tokenP"
-        res = requests.post(url, headers=headers, data=json.dumps(body))
+        res = self._request("POST", "/oauth2/tokenP", headers, data=json.dumps(body))
         
         if res.status_code == 200:
             data = res.json()
-            self.access_token = data['access_token']
             # Token usually lasts 24h, set safe expiry (e.g., 23h)
             # Example response: "expires_in": 86400
-            self.token_expired_at = datetime.fromtimestamp(time.time() + data['expires_in'] - 600)
+            expired_at = datetime.fromtimestamp(time.time() + data['expires_in'] - 600)
+            self.access_token = data['access_token']
+            self.token_expired_at = expired_at
             # print(f"Token refreshed. Expires at {self.token_expired_at}")
             
-            # Save to file
+            self._save_token_to_file()
+        else:
+            raise Exception(f"Failed to get token: {res.text}")
+
+    def _save_token_to_file(self):
+        """Atomic write (temp file + rename) so readers never see a partial file."""
+        try:
+            token_dir = os.path.dirname(self.token_file) or "."
+            os.makedirs(token_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=token_dir, prefix=".token-", suffix=".tmp")
             try:
-                with open(self.token_file, 'w') as f:
+                with os.fdopen(fd, 'w') as f:
                     json.dump({
                         'access_token': self.access_token,
                         'expired_at': self.token_expired_at.isoformat()
                     }, f)
-            except Exception as e:
-                print(f"Failed to save token to cache: {e}")
-                
+                os.replace(tmp_path, self.token_file)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            print(f"Failed to save token to cache: {e}")
+
+    def _schedule_token_refresh(self):
+        """Arm a background timer to refresh the token before it expires."""
+        if self.token_expired_at is None:
+            return
+        delay = (self.token_expired_at - datetime.now()).total_seconds() - self.token_refresh_margin
+        # KIS re-issues the same token if asked too early and allows one issuance
+        # per minute, so never re-arm faster than that.
+        self._refresh_timer = threading.Timer(max(delay, 60), self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._token_lock:
+                self._refresh_token()
+        except Exception as e:
+            print(f"Background token refresh failed: {e}. Retrying in 60s.")
+            self._refresh_timer = threading.Timer(60, self._background_refresh)
+            self._refresh_timer.daemon = True
+            self._refresh_timer.start()
+            return
+        self._schedule_token_refresh()
+
+    def get_approval_key(self):
+        """
+        WebSocket 접속키 발급 (real-time quote stream).
+        """
+        headers = {"content-type": "application/json"}
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": self.app_key,
+            "secretkey": self.app_secret
+        }
+        
+        res = self._request("POST", "/oauth2/Approval", headers, data=json.dumps(body))
+        if res.status_code == 200:
+            return res.json()['approval_key']
         else:
-            raise Exception(f"Failed to get token: {res.text}")
+            raise Exception(f"Failed to get approval key: {res.text}")
 
     def _get_headers(self, tr_id=None):
         self._ensure_token()
@@ -86,13 +293,19 @@ class KisApi:
             headers["tr_id"] = tr_id
         return headers
 
-    def get_current_price(self, symbol):
+    def get_current_price(self, symbol, use_cache=True):
         """
         주식 현재가 시세 조회
         Note: 모의투자/실전투자에 따라 tr_id가 다를 수 있음.
         FHKST01010100 : 주식 현재가 시세 (실전/모의 동일)
+        use_cache: serve from the short-TTL quote cache ('inquire-price').
         """
-        url = f"{self.url_base}/uapi/domestic-stock/v1/quotations/inquire-price"
+        if not use_cache:
+            return self._fetch_current_price(symbol)
+        return self.quote_cache.get_or_fetch('inquire-price', symbol, lambda: self._fetch_current_price(symbol))
+
+    def _fetch_current_price(self, symbol):
+        path = "/uapi/domestic-stock/v1/quotations/inquire-price"
         headers = self._get_headers(tr_id="FHKST01010100")
         
         params = {
@@ -100,7 +313,7 @@ class KisApi:
             "FID_INPUT_ISCD": symbol
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res = self._request("GET", path, headers, params=params)
         if res.status_code == 200:
             return res.json().get('output', {})
         else:
@@ -112,7 +325,7 @@ class KisApi:
         주식 기간별 시세 (일/주/월/년) - 일봉 데이터 수집용
         TR_ID: FHKST03010100
         """
-        url = f"{self.url_base}/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+        path = "/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
         headers = self._get_headers(tr_id="FHKST03010100")
         
         # 'D': Day, 'W': Week, 'M': Month, 'Y': Year
@@ -125,7 +338,7 @@ class KisApi:
             "FID_ORG_ADJ_PRC": "0" # 0: 수정주가 아님, 1: 수정주가
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res = self._request("GET", path, headers, params=params)
         if res.status_code == 200:
             data = res.json()
             data = res.json()
@@ -155,7 +368,7 @@ class KisApi:
         else:
             tr_id = "TTTC8434R" # Real
 
-        url = f"{self.url_base}/uapi/domestic-stock/v1/trading/inquire-balance"
+        path = "/uapi/domestic-stock/v1/trading/inquire-balance"
         headers = self._get_headers(tr_id=tr_id)
         
         # Account format: 12345678-01 -> Split to 12345678 and 01
@@ -176,13 +389,54 @@ class KisApi:
             "CTX_AREA_NK100": ""
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res = self._request("GET", path, headers, params=params)
         if res.status_code == 200:
             return res.json()
         else:
             print(f"Error fetching balance: {res.text}")
             return None
 
+    def get_daily_executions(self, date=None):
+        """
+        주식 일별 주문 체결 조회 (체결분만)
+        VTTC8001R : (모의투자) / TTTC8001R : (실전투자)
+        date: 'YYYYMMDD', default today. Returns the output1 rows (first page, up to
+        100 orders): odno, pdno, sll_buy_dvsn_cd ('01' sell / '02' buy),
+        tot_ccld_qty, tot_ccld_amt, avg_prvs ... or None on error.
+        """
+        tr_id = "VTTC8001R" if "openapivts" in self.url_base else "TTTC8001R"
+        date = date or datetime.now().strftime("%Y%m%d")
+
+        path = "/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
+        headers = self._get_headers(tr_id=tr_id)
+
+        acc_no_prefix = self.account_no.split('-')[0]
+        acc_no_suffix = self.account_no.split('-')[1]
+
+        params = {
+            "CANO": acc_no_prefix,
+            "ACNT_PRDT_CD": acc_no_suffix,
+            "INQR_STRT_DT": date,
+            "INQR_END_DT": date,
+            "SLL_BUY_DVSN_CD": "00",
+            "INQR_DVSN": "00",
+            "PDNO": "",
+            "CCLD_DVSN": "01",
+            "ORD_GNO_BRNO": "",
+            "ODNO": "",
+            "INQR_DVSN_3": "00",
+            "INQR_DVSN_1": "",
+            "CTX_AREA_FK100": "",
+            "CTX_AREA_NK100": ""
+        }
+
+        res = self._request("GET", path, headers, params=params)
+        if res.status_code == 200:
+            return res.json().get('output1', [])
+        else:
+            print(f"Error fetching executions: {res.text}")
+            return None
+
     def place_order(self, symbol, qty, price, order_type="00", buy_sell="BUY"):
         """
         주식 주문 (현금 매수/매도)
@@ -197,7 +451,7 @@ class KisApi:
         else:
             tr_id = "VTTC0801U" if is_simulation else "TTTC0801U"
 
-        url = f"{self.url_base}/uapi/domestic-stock/v1/trading/order-cash"
+        path = "/uapi/domestic-stock/v1/trading/order-cash"
         headers = self._get_headers(tr_id=tr_id)
         
         acc_no_prefix = self.account_no.split('-')[0]
@@ -212,24 +466,32 @@ class KisApi:
             "ORD_UNPR": str(price),
         }
 
-        res = requests.post(url, headers=headers, data=json.dumps(data))
+        res = self._request("POST", path, headers, data=json.dumps(data))
         if res.status_code == 200:
             return res.json()
         else:
             print(f"Error placing order ({buy_sell} {symbol}): {res.text}")
             return None
 
-    def get_overseas_price(self, symbol, exchange_code="NAS"):
+    def get_overseas_price(self, symbol, exchange_code="NAS", use_cache=True):
         """
         해외주식 현재가 시세 조회
         Note:
         TR_ID (Real): HHDFS00000300
         TR_ID (Virtual): HHDFS76200200
+        use_cache: serve from the short-TTL quote cache ('price').
         """
+        if not use_cache:
+            return self._fetch_overseas_price(symbol, exchange_code)
+        return self.quote_cache.get_or_fetch(
+            'price', (exchange_code, symbol), lambda: self._fetch_overseas_price(symbol, exchange_code)
+        )
+
+    def _fetch_overseas_price(self, symbol, exchange_code):
         is_virtual = "openapivts" in self.url_base
         tr_id = "HHDFS76200200" if is_virtual else "HHDFS00000300"
         
-        url = f"{self.url_base}/uapi/overseas-price/v1/quotations/price"
+        path = "/uapi/overseas-price/v1/quotations/price"
         headers = self._get_headers(tr_id=tr_id)
         
         # params
@@ -243,7 +505,7 @@ class KisApi:
             "SYMB": symbol
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res = self._request("GET", path, headers, params=params)
         if res.status_code == 200:
             return res.json().get('output', {})
         else:
@@ -259,7 +521,7 @@ class KisApi:
         is_virtual = "openapivts" in self.url_base
         tr_id = "HHDFS76240000"
         
-        url = f"{self.url_base}/uapi/overseas-price/v1/quotations/dailyprice"
+        path = "/uapi/overseas-price/v1/quotations/dailyprice"
         headers = self._get_headers(tr_id=tr_id)
         
         # GUBUN: 0(Daily), 1(Weekly), 2(Monthly)
@@ -280,7 +542,7 @@ class KisApi:
             "MODP": "1"
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res = self._request("GET", path, headers, params=params)
         if res.status_code == 200:
             return res.json().get('output2', [])
         else:
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import weakref
+
+from src.api.kis import KisApi
+
+
+class AsyncKisApi:
+    """
+    asyncio facade over KisApi with the same surface
+    (get_current_price, get_overseas_price, get_balance, place_order).
+
+    Each call runs the blocking KisApi method on a worker thread, so requests
+    share KisApi's pooled keep-alive session, token and rate limiter (which
+    keeps the fan-out within the KIS per-second quota). `max_concurrency`
+    caps how many calls are in flight at once per event loop, so callers
+    should fan out inside one loop (one asyncio.run + gather) rather than
+    run a loop per thread.
+    """
+
+    def __init__(self, kis: KisApi, max_concurrency=None):
+        self.kis = kis
+        self.max_concurrency = max_concurrency or kis.pool_size
+
+        # A semaphore is bound to the loop it is first used on: keep one per loop.
+        # Jobs on different threads may each run their own loop at the same time.
+        self._semaphores = weakref.WeakKeyDictionary() # {loop: asyncio.Semaphore}
+        self._semaphores_lock = threading.Lock()
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _call(self, func, *args, **kwargs):
+        async with self._get_semaphore():
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def get_current_price(self, symbol):
+        return await self._call(self.kis.get_current_price, symbol)
+
+    async def get_overseas_price(self, symbol, exchange_code="NAS"):
+        return await self._call(self.kis.get_overseas_price, symbol, exchange_code)
+
+    async def get_balance(self):
+        return await self._call(self.kis.get_balance)
+
+    async def place_order(self, symbol, qty, price, order_type="00", buy_sell="BUY"):
+        return await self._call(self.kis.place_order, symbol, qty, price, order_type, buy_sell)
+
+    async def get_prices(self, symbols):
+        """
+        Fan out domestic quote requests concurrently.
+        Returns {symbol: output dict or None}. Failures are mapped to None.
+        """
+        results = await asyncio.gather(
+            *(self.get_current_price(symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        prices = {}
+        for symbol, res in zip(symbols, results):
+            if isinstance(res, Exception):
+                print(f"Error fetching price for {symbol}: {res}")
+                prices[symbol] = None
+            else:
+                prices[symbol] = res
+        return prices
+
+    async def get_overseas_prices(self, symbols, exchange_code="NAS"):
+        """Same as get_prices() for overseas quotes."""
+        results = await asyncio.gather(
+            *(self.get_overseas_price(symbol, exchange_code) for symbol in symbols),
+            return_exceptions=True
+        )
+        prices = {}
+        for symbol, res in zip(symbols, results):
+            if isinstance(res, Exception):
+                print(f"Error fetching overseas price for {symbol}: {res}")
+                prices[symbol] = None
+            else:
+                prices[symbol] = res
+        return prices
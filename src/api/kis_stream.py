@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+logger = logging.getLogger("KisQuoteStream")
+
+# Real-time execution (체결) feed for domestic stocks
+TR_ID_EXECUTION = "H0STCNT0"
+
+# H0STCNT0 record layout (subset). Records are '^'-separated fields.
+FIELD_SYMBOL = 0      # 유가증권단축종목코드
+FIELD_TIME = 1        # 주식체결시간 (HHMMSS)
+FIELD_PRICE = 2       # 주식현재가
+FIELD_OPEN = 7        # 주식시가
+FIELD_HIGH = 8        # 주식최고가
+FIELD_LOW = 9         # 주식최저가
+FIELD_VOLUME = 12     # 체결거래량
+FIELD_ACC_VOLUME = 13 # 누적거래량
+
+
+def parse_ticks(message):
+    """
+    Parse a KIS real-time data frame:
+        "0|H0STCNT0|002|005930^093015^71000^...^005930^093015^71100^..."
+    (encrypted flag | tr_id | record count | '^'-joined fields).
+    Returns a list of tick dicts. Encrypted frames (flag '1') are skipped.
+    """
+    parts = message.split("|", 3)
+    if len(parts) < 4 or parts[0] != "0":
+        return []
+
+    tr_id, count, payload = parts[1], int(parts[2]), parts[3]
+    fields = payload.split("^")
+    width = len(fields) // count if count else 0
+    if width <= FIELD_ACC_VOLUME:
+        return []
+
+    ticks = []
+    for i in range(count):
+        rec = fields[i * width:(i + 1) * width]
+        ticks.append({
+            "tr_id": tr_id,
+            "symbol": rec[FIELD_SYMBOL],
+            "time": rec[FIELD_TIME],
+            "price": float(rec[FIELD_PRICE]),
+            "open": float(rec[FIELD_OPEN]),
+            "high": float(rec[FIELD_HIGH]),
+            "low": float(rec[FIELD_LOW]),
+            "volume": int(rec[FIELD_VOLUME]),
+            "acc_volume": int(rec[FIELD_ACC_VOLUME]),
+        })
+    return ticks
+
+
+class KisQuoteStream:
+    """
+    Streams KIS real-time executions over WebSocket.
+
+    - Keeps an in-memory last-price table ({symbol: tick}).
+    - Calls every registered callback(symbol, price, tick) on each tick.
+    - Reconnects with exponential backoff and resubscribes all symbols, on any
+      failure (refused/rejected handshake, dropped connection); a fresh approval
+      key is fetched before each reconnect when key_provider is given.
+    - Malformed data frames are logged and skipped.
+
+    Runs its own asyncio loop on a daemon thread so it can be used from the
+    thread-based scheduler. Subscribe/unsubscribe are safe to call anytime.
+    """
+
+    def __init__(self, approval_key, ws_url, tr_id=TR_ID_EXECUTION, reconnect_delay=1.0, max_reconnect_delay=30.0,
+                 key_provider=None):
+        self.approval_key = approval_key
+        self.key_provider = key_provider # Callable returning a new approval key
+        self.ws_url = ws_url
+        self.tr_id = tr_id
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.last_prices = {} # {symbol: tick dict + 'received_at'}
+        self.callbacks = []
+        self.reconnects = 0
+        self.ticks_received = 0
+        self.bad_frames = 0
+        self.last_error = None # Last connection failure, for monitoring
+
+        self._symbols = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._ws = None
+        self._stopped = threading.Event()
+        self.connected = threading.Event()
+
+    @classmethod
+    def from_kis(cls, kis, **kwargs):
+        """Build a stream using KisApi config (kis.ws_url) and its approval key."""
+        ws_url = kis.config['kis'].get('ws_url')
+        if not ws_url:
+            is_simulation = "openapivts" in kis.url_base
+            ws_url = "ws://ops.koreainvestment.com:31000" if is_simulation else "ws://ops.koreainvestment.com:21000"
+        return cls(kis.get_approval_key(), ws_url, key_provider=kis.get_approval_key, **kwargs)
+
+    # --- Public API (thread-safe) ---
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def subscribe(self, symbol):
+        with self._lock:
+            if symbol in self._symbols:
+                return
+            self._symbols.add(symbol)
+        self._send_threadsafe(self._subscribe_message(symbol, subscribe=True))
+
+    def unsubscribe(self, symbol):
+        with self._lock:
+            if symbol not in self._symbols:
+                return
+            self._symbols.discard(symbol)
+        self._send_threadsafe(self._subscribe_message(symbol, subscribe=False))
+
+    def get_last_price(self, symbol):
+        tick = self.last_prices.get(symbol)
+        return tick['price'] if tick else None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="KisQuoteStream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout)
+
+    # --- Internals ---
+
+    def _subscribe_message(self, symbol, subscribe=True):
+        return json.dumps({
+            "header": {
+                "approval_key": self.approval_key,
+                "custtype": "P",
+                "tr_type": "1" if subscribe else "2",
+                "content-type": "utf-8"
+            },
+            "body": {"input": {"tr_id": self.tr_id, "tr_key": symbol}}
+        })
+
+    def _send_threadsafe(self, message):
+        loop, ws = self._loop, self._ws
+        if loop is None or ws is None:
+            return # Will be sent on (re)connect
+        asyncio.run_coroutine_threadsafe(self._safe_send(ws, message), loop)
+
+    async def _safe_send(self, ws, message):
+        try:
+            await ws.send(message)
+        except ConnectionClosed:
+            pass # Resubscribed on reconnect
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                if self.reconnects and self.key_provider:
+                    # The key may have expired: a stale one fails every handshake
+                    self.approval_key = await asyncio.to_thread(self.key_provider)
+                async with connect(self.ws_url, ping_interval=None) as ws:
+                    self._ws = ws
+                    with self._lock:
+                        symbols = list(self._symbols)
+                    for symbol in symbols:
+                        await ws.send(self._subscribe_message(symbol))
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    logger.info(f"Connected to {self.ws_url}, subscribed {len(symbols)} symbols.")
+
+                    async for message in ws:
+                        self._handle_message(ws, message)
+            except (OSError, ConnectionClosed) as e:
+                if not self._stopped.is_set():
+                    self.last_error = repr(e)
+                    logger.warning(f"Stream disconnected: {e}")
+            except Exception as e:
+                # Rejected handshake (InvalidStatus), approval key failure, ...: retry too
+                self.last_error = repr(e)
+                logger.error(f"Stream connection failed: {e!r}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+
+            if self._stopped.is_set():
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _handle_message(self, ws, message):
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+
+        if message[:1] in ("0", "1"):
+            try:
+                ticks = parse_ticks(message)
+            except (ValueError, IndexError) as e:
+                self.bad_frames += 1
+                logger.warning(f"Skipping malformed frame ({e}): {message[:80]!r}")
+                return
+            for tick in ticks:
+                self._on_tick(tick)
+            return
+
+        # Control frames (JSON): subscription acks, PINGPONG heartbeat
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        header = data.get("header", {})
+        if header.get("tr_id") == "PINGPONG":
+            asyncio.ensure_future(self._safe_send(ws, message))
+        elif data.get("body", {}).get("rt_cd") not in (None, "0"):
+            logger.warning(f"Subscription error: {data['body'].get('msg1')} ({header.get('tr_key')})")
+
+    def _on_tick(self, tick):
+        tick["received_at"] = time.time()
+        self.last_prices[tick["symbol"]] = tick
+        self.ticks_received += 1
+        for callback in self.callbacks:
+            try:
+                callback(tick["symbol"], tick["price"], tick)
+            except Exception as e:
+                logger.error(f"Tick callback failed for {tick['symbol']}: {e}")
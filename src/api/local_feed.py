@@ -0,0 +1,115 @@
+import asyncio
+import json
+import threading
+
+from websockets.asyncio.server import serve
+
+from src.api.kis_stream import TR_ID_EXECUTION, FIELD_ACC_VOLUME
+
+
+class LocalFeedServer:
+    """
+    Local stand-in for the KIS real-time WebSocket feed.
+    Speaks the same subscribe/ack protocol and frame format as
+    ops.koreainvestment.com, so KisQuoteStream can be exercised in tests
+    or offline runs without a KIS account.
+
+    Usage:
+        server = LocalFeedServer()
+        server.start()                 # ws://127.0.0.1:<server.port>
+        server.publish("005930", 71000)
+        server.drop_connections()      # Simulate a gateway disconnect
+        server.stop()
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.subscriptions = {} # {connection: set(symbols)}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run_loop, name="LocalFeedServer", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread:
+            self._thread.join(5)
+
+    def subscriber_count(self, symbol):
+        return sum(1 for symbols in list(self.subscriptions.values()) if symbol in symbols)
+
+    def publish(self, symbol, price, time_str="090000", volume=1):
+        """Push one execution tick to every connection subscribed to symbol."""
+        fields = [""] * (FIELD_ACC_VOLUME + 1)
+        fields[0] = symbol
+        fields[1] = time_str
+        fields[2] = str(price)
+        fields[7] = fields[8] = fields[9] = str(price)
+        fields[12] = str(volume)
+        fields[13] = str(volume)
+        self.publish_frame(symbol, f"0|{TR_ID_EXECUTION}|001|" + "^".join(fields))
+
+    def publish_frame(self, symbol, frame):
+        """Push a raw frame (e.g. a malformed one) to connections subscribed to symbol."""
+        asyncio.run_coroutine_threadsafe(self._broadcast(symbol, frame), self._loop).result(5)
+
+    def drop_connections(self):
+        async def _drop():
+            for ws in list(self.subscriptions):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(_drop(), self._loop).result(5)
+
+    # --- Internals ---
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._serve())
+        self._loop.close()
+
+    async def _serve(self):
+        async with serve(self._handler, self.host, self.port) as server:
+            self._server = server
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await server.wait_closed()
+
+    async def _handler(self, ws):
+        self.subscriptions[ws] = set()
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                header, body = data["header"], data["body"]["input"]
+                symbol = body["tr_key"]
+                if header["tr_type"] == "1":
+                    self.subscriptions[ws].add(symbol)
+                    msg = "SUBSCRIBE SUCCESS"
+                else:
+                    self.subscriptions[ws].discard(symbol)
+                    msg = "UNSUBSCRIBE SUCCESS"
+                await ws.send(json.dumps({
+                    "header": {"tr_id": body["tr_id"], "tr_key": symbol, "encrypt": "N"},
+                    "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": msg}
+                }))
+        except Exception:
+            pass
+        finally:
+            self.subscriptions.pop(ws, None)
+
+    async def _broadcast(self, symbol, frame):
+        for ws, symbols in list(self.subscriptions.items()):
+            if symbol in symbols:
+                try:
+                    await ws.send(frame)
+                except Exception:
+                    pass
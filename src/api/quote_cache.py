@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class QuoteCache:
+    """
+    Short-TTL cache for quote responses, keyed by (endpoint, key).
+
+    - TTL is configured per endpoint (e.g. 'inquire-price', 'price').
+      A TTL of 0 (or a missing endpoint) disables caching for it.
+    - Concurrent misses for the same key are coalesced: the first caller
+      fetches, the rest wait for its result instead of hitting the API.
+    - Failed fetches (None) are not cached.
+    - At most max_entries are kept: past that, expired entries are pruned,
+      then the least recently used ones evicted (one-off lookups don't pile up).
+    """
+
+    def __init__(self, ttls=None, max_entries=1000):
+        self.ttls = dict(ttls or {})
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # {(endpoint, key): (expires_at, value)}, least recently used first
+        self._inflight = {} # {(endpoint, key): threading.Event}
+        self._lock = threading.Lock()
+        self._stats = {} # {endpoint: {'hits', 'misses', 'coalesced'}}
+
+    def _stat(self, endpoint):
+        stat = self._stats.get(endpoint)
+        if stat is None:
+            stat = {"hits": 0, "misses": 0, "coalesced": 0}
+            self._stats[endpoint] = stat
+        return stat
+
+    def get_or_fetch(self, endpoint, key, fetch):
+        ttl = self.ttls.get(endpoint, 0)
+        if not ttl:
+            return fetch()
+
+        cache_key = (endpoint, key)
+        waited = False
+        while True:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry and entry[0] > time.monotonic():
+                    self._entries.move_to_end(cache_key)
+                    if not waited:
+                        self._stat(endpoint)["hits"] += 1
+                    return entry[1]
+
+                event = self._inflight.get(cache_key)
+                if event is None:
+                    # We are the leader for this key
+                    event = threading.Event()
+                    self._inflight[cache_key] = event
+                    self._stat(endpoint)["misses"] += 1
+                    break
+                if not waited:
+                    self._stat(endpoint)["coalesced"] += 1
+
+            # Follower: wait for the leader, then re-check the cache.
+            # If the leader failed, the loop makes us the next leader.
+            event.wait()
+            waited = True
+
+        try:
+            value = fetch()
+            if value is not None:
+                with self._lock:
+                    self._entries[cache_key] = (time.monotonic() + ttl, value)
+                    self._entries.move_to_end(cache_key)
+                    self._evict()
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+            event.set()
+
+    def _evict(self):
+        """Keep at most max_entries. Caller holds the lock."""
+        if len(self._entries) <= self.max_entries:
+            return
+        now = time.monotonic()
+        for k in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[k]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def invalidate(self, endpoint=None, key=None):
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            elif key is None:
+                for k in [k for k in self._entries if k[0] == endpoint]:
+                    del self._entries[k]
+            else:
+                self._entries.pop((endpoint, key), None)
+
+    def get_stats(self):
+        """{endpoint: {'hits', 'misses', 'coalesced', 'hit_rate'}}"""
+        with self._lock:
+            stats = {}
+            for endpoint, s in self._stats.items():
+                total = s["hits"] + s["misses"] + s["coalesced"]
+                served = s["hits"] + s["coalesced"]
+                stats[endpoint] = {**s, "hit_rate": round(served / total, 4) if total else 0.0}
+            return stats
@@ -0,0 +1,123 @@
+import asyncio
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Callers reserve a token and get back how long they must wait for it, so
+    the same bucket can be used from threads (acquire) and coroutines
+    (acquire_async). Tokens may go negative: that is the queue of callers
+    already holding a reservation, served in order.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate) # tokens per second
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.acquired = 0
+        self.waited = 0 # Number of acquisitions that had to queue
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self):
+        """Take one token. Returns seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "total_wait_sec": round(self.total_wait, 3),
+                "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 2) if self.acquired else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+
+class KisRateLimiter:
+    """
+    Separate buckets for quotation and trading TR_IDs, plus throttle
+    counters and jittered backoff for requests KIS rejected for quota.
+
+    Quotation TR_IDs start with 'F' (domestic, e.g. FHKST01010100) or 'H'
+    (overseas, e.g. HHDFS00000300). Everything else (TTTC/VTTC...) is trading.
+    """
+
+    QUOTATION = "quotation"
+    TRADING = "trading"
+
+    def __init__(self, quotation_per_sec, trading_per_sec, max_retries=3, backoff_base=0.2):
+        self.buckets = {
+            self.QUOTATION: TokenBucket(quotation_per_sec),
+            self.TRADING: TokenBucket(trading_per_sec),
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+        self._lock = threading.Lock()
+        self.throttled = {self.QUOTATION: 0, self.TRADING: 0}
+        self.gave_up = {self.QUOTATION: 0, self.TRADING: 0}
+
+    @staticmethod
+    def bucket_for(tr_id):
+        if tr_id and tr_id[0] in ("F", "H"):
+            return KisRateLimiter.QUOTATION
+        return KisRateLimiter.TRADING
+
+    def acquire(self, tr_id):
+        return self.buckets[self.bucket_for(tr_id)].acquire()
+
+    async def acquire_async(self, tr_id):
+        return await self.buckets[self.bucket_for(tr_id)].acquire_async()
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter (seconds)."""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def record_throttle(self, tr_id, gave_up=False):
+        name = self.bucket_for(tr_id)
+        with self._lock:
+            self.throttled[name] += 1
+            if gave_up:
+                self.gave_up[name] += 1
+
+    def get_stats(self):
+        with self._lock:
+            throttled = dict(self.throttled)
+            gave_up = dict(self.gave_up)
+        return {
+            name: {**bucket.get_stats(), "throttled": throttled[name], "gave_up": gave_up[name]}
+            for name, bucket in self.buckets.items()
+        }
@@ -0,0 +1,133 @@
+from src.database.db_manager import DatabaseManager
+from src.core.backtester import Backtester
+from src.core.collector import MarketDataCollector
+from src.core.cross_sectional_backtester import CrossSectionalBacktester
+from src.analysis.factor_engine import get_presets
+from src.analysis.screener import FactorScreener
+from src.analysis.universe import Universe
+from src.strategies.ma_crossover import MovingAverageCrossoverStrategy
+from src.strategies.volatility_breakout import VolatilityBreakoutStrategy
+from src.strategies.buy_and_hold import BuyAndHoldStrategy
+from src.strategies.dca import BasicDCAStrategy
+
+
+def build_strategy(mode, strategy_name=None):
+    """Returns (strategy, force_zero_deposit) for the web form's mode/strategy."""
+    if mode == "lump":
+        return BuyAndHoldStrategy(), True # Force 0 for lump sum
+    if mode == "dca":
+        # Default to Basic DCA for now, or could allow sub-selection
+        return BasicDCAStrategy(), False
+    if mode == "algo":
+        if strategy_name == "ma_crossover":
+            return MovingAverageCrossoverStrategy(short_window=5, long_window=20, regime_window=60), True
+        return VolatilityBreakoutStrategy(k=0.5), True # Force 0 for pure algo
+    return BuyAndHoldStrategy(), False # Fallback
+
+
+def fee_rates(symbol):
+    """
+    (commission_rate, tax_rate)
+    Korea: Comm ~0.014%, Tax 0.2%
+    US: Comm ~0.25% (vary), Tax 0% (Transaction tax is 0, Capital gains is separate)
+    KRX yfinance tickers ('005930.KS', '.KQ') count as Korean.
+    """
+    if symbol.split('.')[0].isdigit(): # Korean Stock
+        return 0.000140527, 0.002
+    return 0.0025, 0.0
+
+
+def to_columns(records):
+    """
+    List of row dicts -> {column: [values]} (picklable, JSON-ready, one list per
+    column instead of repeating keys per row). Missing keys are None; dates
+    become 'YYYY-MM-DD'.
+    """
+    columns = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+    out = {key: [r.get(key) for r in records] for key in columns}
+    if 'date' in out:
+        out['date'] = [d.strftime("%Y-%m-%d") if hasattr(d, 'strftime') else d for d in out['date']]
+    return out
+
+
+def run_backtest_job(symbol, mode, strategy_name=None, initial_capital=10000, monthly_deposit=0,
+                     db_path="data/market_data.db", progress=None):
+    """
+    Self-contained backtest for a worker process: opens its own DB handle,
+    auto-fetches missing history and runs the Backtester.
+    progress: optional ProgressReporter (fetch stage, then one update per bar).
+    Returns a picklable dict: {'summary': dict | None, 'error': str | None,
+    'equity_curve': {'date', 'equity', 'invested'} columns, 'trades': columns (see to_columns)}.
+    """
+    db = DatabaseManager(db_path)
+
+    # 1. Check Data Availability
+    # If not enough data, try to collect
+    df = db.get_daily_price_optimized(symbol)
+
+    if len(df) < 60: # Threshold for at least 3 months for decent backtest
+        print(f"Data missing/insufficient for {symbol}. Triggering Auto-Fetch...", flush=True)
+        if progress:
+            progress.start("fetch", total=1, unit="symbols", message=f"Downloading history for {symbol}")
+        try:
+            # Historical collection goes through yfinance only, no KIS session needed
+            collector = MarketDataCollector(None, db)
+            collector.collect_historical_data(symbol, years=1)
+            # Fetch again to ensure df is populated
+            df = db.get_daily_price_optimized(symbol)
+
+            if df.empty:
+                return {"summary": None, "error": f"데이터 수집 실패: '{symbol}'에 대한 데이터가 없습니다. (종목코드 확인 필요)"}
+
+            if len(df) < 20:
+                return {"summary": None, "error": f"데이터 부족: '{symbol}'의 과거 데이터가 너무 적습니다 ({len(df)}일). 최근 상장된 종목일 수 있습니다. (최소 20일 필요)"}
+
+        except Exception as e:
+            return {"summary": None, "error": f"데이터 수집 중 오류: {str(e)}"}
+
+    # 2. Select Strategy based on Mode
+    strategy, no_deposit = build_strategy(mode, strategy_name)
+    if no_deposit:
+        monthly_deposit = 0
+
+    # 3. Run Backtest
+    commission_rate, tax_rate = fee_rates(symbol)
+    backtester = Backtester(db, strategy, commission_rate=commission_rate, tax_rate=tax_rate)
+    summary = backtester.run(symbol, initial_capital=initial_capital, monthly_deposit=monthly_deposit, progress=progress)
+
+    if not summary:
+        return {"summary": None, "error": "Backtest finished with no results (Insufficient history for strategy?)"}
+    return {"summary": summary, "error": None, "equity_curve": to_columns(backtester.equity_curve),
+            "trades": to_columns(backtester.results)}
+
+
+def run_cross_sectional_job(strategy_type, universe_type='large_cap', frequency='monthly', top_n=30,
+                            start_date=None, end_date=None, initial_capital=10000, db_path="data/market_data.db",
+                            presets=None, progress=None):
+    """
+    Periodic top-N rebalance of a screener preset over a universe, from stored
+    fundamentals snapshots and daily_price (no downloads).
+    Fees per symbol from fee_rates().
+    Returns a picklable dict: {'summary': dict | None, 'rebalances': [...], 'error': str | None,
+    'equity_curve': {'date', 'equity', 'invested'} columns}.
+    """
+    all_presets = get_presets(presets)
+    if strategy_type not in all_presets:
+        return {"summary": None, "rebalances": [], "error": f"Unknown screener preset: {strategy_type}"}
+    db = DatabaseManager(db_path)
+    screener = FactorScreener(universe=Universe(db), preset=all_presets[strategy_type])
+    symbols = screener.get_universe(universe_type)
+
+    backtester = CrossSectionalBacktester(db, all_presets[strategy_type], fees=fee_rates)
+    summary = backtester.run(symbols, start_date=start_date, end_date=end_date, frequency=frequency,
+                             top_n=top_n, initial_capital=initial_capital, progress=progress)
+    if not summary:
+        return {"summary": None, "rebalances": [],
+                "error": "No stored fundamentals snapshots or price history for this universe (run the fundamentals refresh and collect history first)"}
+    curve = backtester.equity_curve
+    equity_curve = {'date': list(curve.index.strftime("%Y-%m-%d")), 'equity': curve['equity'].tolist(),
+                    'invested': curve['invested'].tolist()}
+    return {"summary": summary, "rebalances": backtester.rebalances, "error": None, "equity_curve": equity_curve}
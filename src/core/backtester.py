@@ -12,7 +12,8 @@ class Backtester:
         self.results = []
         self.equity_curve = []
 
-    def run(self, symbol, start_date=None, end_date=None, initial_capital=10_000_000, monthly_deposit=0):
+    def run(self, symbol, start_date=None, end_date=None, initial_capital=10_000_000, monthly_deposit=0, progress=None):
+        """progress: optional ProgressReporter, updated once per bar (rate-limited)."""
         print(f"Running Backtest for {symbol} with {self.strategy.__class__.__name__}...", flush=True)
         
         # 1. Fetch Data
@@ -43,9 +44,13 @@ class Backtester:
         # 3. Simulation Loop
         dates = df.index
         prev_month = None
+        if progress:
+            progress.start("backtest", total=len(dates), unit="bars", message=f"{symbol} {self.strategy.__class__.__name__}")
         
         for i in range(len(dates)):
             current_date = dates[i]
+            if progress:
+                progress.update()
             
             # --- Monthly Deposit Logic ---
             if monthly_deposit > 0:
@@ -203,7 +208,9 @@ class Backtester:
                 "equity": equity,
                 "invested": total_invested 
             })
-            
+        
+        if progress:
+            progress.finish()
         return self.get_summary(initial_capital, total_invested)
 
     def get_summary(self, initial_capital, total_invested):
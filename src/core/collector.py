@@ -1,5 +1,4 @@
-from datetime import datetime
-import yfinance as yf
+from datetime import datetime, timedelta
 from src.api.kis import KisApi
 from src.database.db_manager import DatabaseManager
 
@@ -8,12 +7,45 @@ class MarketDataCollector:
         self.kis = kis
         self.db = db
 
+    def collect_daily_price(self, symbol, start_date=None, end_date=None):
+        """
+        Collect recent daily candles for a domestic symbol via KIS.
+        Defaults to the last 30 days (YYYYMMDD strings).
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime("%Y%m%d")
+        if start_date is None:
+            start_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
+        
+        records = self.kis.get_daily_price(symbol, start_date, end_date)
+        
+        db_rows = []
+        for r in records or []:
+            if not r.get('stck_bsop_date'):
+                continue
+            db_rows.append((
+                symbol,
+                r['stck_bsop_date'],
+                float(r['stck_oprc']),
+                float(r['stck_hgpr']),
+                float(r['stck_lwpr']),
+                float(r['stck_clpr']),
+                int(r['acml_vol'])
+            ))
+        
+        if db_rows:
+            self.db.insert_daily_price(db_rows)
+        else:
+            print(f"[{symbol}] No daily price data returned from KIS.")
+        return len(db_rows)
+
     def collect_historical_data(self, symbol, years=1):
         """
         Collect historical data using yfinance.
         Fetches data and saves to DB.
         """
         print(f"[{symbol}] Starting historical data collection via yfinance...")
+        import yfinance as yf # Deferred: costs ~0.3s to import, only needed here
         try:
             # yfinance download
             start_date = None
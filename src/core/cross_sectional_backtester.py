@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+from src.analysis.factor_engine import FactorEngine
+from src.analysis.fundamentals_store import NUMERIC_COLUMNS
+from src.database.db_manager import DatabaseManager
+
+# pandas period aliases per rebalance frequency
+FREQUENCIES = {'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q', 'yearly': 'Y'}
+
+
+class CrossSectionalBacktester:
+    """
+    Periodic top-N rebalance of a factor preset over a universe.
+
+    - On each rebalance date (first trading day of the period) the preset is
+      evaluated on the point-in-time fundamentals: the latest snapshot per
+      symbol with as_of strictly before that date, so no look-ahead.
+    - The portfolio moves to equal weights in the top N at that close.
+      Holdings drift with prices (and net dividends) until the next rebalance.
+    - Turnover pays commission on buys and commission + tax on sells,
+      per symbol, taken out of equity at the rebalance.
+    - Everything between rebalances is a date x symbol weight matrix
+      (no per-bar loop). Positions are fractional, so there is no lot rounding.
+
+    Prices come from daily_price under the same symbols as the fundamentals
+    table (yfinance tickers, e.g. collected with collect_historical_data).
+    """
+
+    def __init__(self, db: DatabaseManager, preset, commission_rate=0.000140527, tax_rate=0.002,
+                 dividend_tax_rate=0.15, fees=None):
+        self.db = db
+        self.engine = FactorEngine(preset)
+        self.commission_rate = commission_rate
+        self.tax_rate = tax_rate
+        self.dividend_tax_rate = dividend_tax_rate
+        # Optional fees(symbol) -> (commission_rate, tax_rate), e.g. backtest_runner.fee_rates
+        self.fees = fees
+        self.equity_curve = pd.DataFrame()
+        self.weights = pd.DataFrame() # Target weights, rebalance date x symbol
+        self.rebalances = []
+
+    @staticmethod
+    def rebalance_dates(dates, frequency='monthly'):
+        """First trading day of each period in dates."""
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown rebalance frequency: {frequency} (expected one of {list(FREQUENCIES)})")
+        periods = dates.to_period(FREQUENCIES[frequency])
+        return pd.DatetimeIndex(dates.to_series().groupby(periods).first().values)
+
+    def _fee_vectors(self, symbols):
+        if self.fees is None:
+            n = len(symbols)
+            return np.full(n, self.commission_rate), np.full(n, self.tax_rate)
+        rates = np.array([self.fees(s) for s in symbols], dtype=float).reshape(-1, 2)
+        return rates[:, 0], rates[:, 1]
+
+    def select(self, history, close, date, top_n):
+        """
+        Top-N symbols for one rebalance date, from the latest snapshot per symbol
+        dated before it. history: compute()d snapshots with a 'passes' filter column.
+        close: the un-filled close panel (NaN where a symbol has no bar that day).
+        """
+        cutoff = date.strftime("%Y%m%d")
+        position = np.searchsorted(history['as_of'].values, cutoff, side='left') # history is sorted by as_of
+        if position == 0:
+            return []
+        last_as_of = history['as_of'].iat[position - 1]
+        # The snapshot only changes when a new as_of date is passed (e.g. quarterly vs monthly rebalances)
+        if self._snapshot_key != last_as_of:
+            self._snapshot = history.iloc[:position].groupby('symbol', sort=False).tail(1)
+            self._snapshot_key = last_as_of
+        snapshot = self._snapshot
+        # Only symbols with a bar that day: suspended / delisted ones are not tradable
+        priced = snapshot['symbol'].map(close.loc[date]).notna()
+        top = self.engine.rank(snapshot[snapshot['passes'] & priced], top_n=top_n)
+        return top['symbol'].tolist() if not top.empty else []
+
+    def run(self, symbols, start_date=None, end_date=None, frequency='monthly', top_n=30,
+            initial_capital=10_000_000, progress=None):
+        """
+        symbols: the universe (fundamentals/daily_price symbols).
+        start_date / end_date: 'YYYYMMDD'.
+        progress: optional ProgressReporter (load stage, then one update per rebalance).
+        Returns the summary dict (same core keys as Backtester.get_summary), {} without data.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if progress:
+            progress.start("load", message=f"Loading prices and fundamentals for {len(symbols)} symbols")
+        close = self.db.get_price_panel(symbols, start_date, end_date, cache=True)
+        history = self.db.get_fundamentals_history(symbols, end_date)
+        if close.empty or history.empty:
+            print("No price or fundamentals data for cross-sectional backtest.")
+            return {}
+        # Metrics and filters are row-wise: evaluate them once over every snapshot
+        history[NUMERIC_COLUMNS] = history[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        history = self.engine.compute(history)
+        history['passes'] = self.engine.mask(history)
+        self._snapshot_key, self._snapshot = None, None
+        traded = close # Un-filled: which symbols actually have a bar on a rebalance day
+        close = close.ffill() # Carry the last price over missing bars (no bar before listing)
+        columns = close.columns
+        dates = close.index
+
+        # Daily total return per symbol, net dividends on the ex-date
+        dividends = self.db.get_dividend_panel(columns, start_date, end_date).reindex(index=dates, columns=columns)
+        dividends = dividends.fillna(0.0) * (1 - self.dividend_tax_rate)
+        prev = close.shift(1)
+        returns = ((close + dividends) / prev - 1).fillna(0.0)
+
+        # 1. Target weights at each rebalance date (equal weight, top N)
+        reb_dates = self.rebalance_dates(dates, frequency)
+        targets = pd.DataFrame(0.0, index=reb_dates, columns=columns)
+        if progress:
+            progress.start("rebalance", total=len(reb_dates), unit="rebalances", message=f"Top {top_n} by preset")
+        picks = {}
+        for date in reb_dates:
+            chosen = self.select(history, traded, date, top_n)
+            picks[date] = chosen
+            if chosen:
+                targets.loc[date, chosen] = 1.0 / len(chosen)
+            if progress:
+                progress.update(message=date.strftime("%Y-%m-%d"))
+
+        # 2. Drift between rebalances: period k covers the days after reb_dates[k] up to reb_dates[k+1]
+        period = pd.Series(np.searchsorted(reb_dates.values, dates.values, side='left') - 1, index=dates)
+        growth = (1 + returns).groupby(period.values).cumprod()
+        held = targets.iloc[period.clip(lower=0).values].set_axis(dates)
+        held.loc[period.values < 0] = 0.0 # Cash until the first rebalance
+        positions = held * growth # Value per symbol, relative to equity right after the rebalance
+        cash = 1 - held.sum(axis=1)
+        value = positions.sum(axis=1) + cash
+
+        # 3. Turnover at each rebalance: drifted weights going in vs target weights
+        at_reb = dates.get_indexer(reb_dates)
+        drift = positions.iloc[at_reb].div(value.iloc[at_reb], axis=0)
+        drift.loc[period.iloc[at_reb].values < 0] = 0.0
+        trade = targets.values - drift.values
+        commission, tax = self._fee_vectors(columns)
+        buys = np.clip(trade, 0, None)
+        sells = np.clip(-trade, 0, None)
+        cost = buys @ commission + sells @ (commission + tax)
+
+        # 4. Chain periods: equity right after rebalance k
+        period_end = value.iloc[at_reb].to_numpy(copy=True) # Growth of the previous period up to this rebalance
+        period_end[period.iloc[at_reb].values < 0] = 1.0
+        after = initial_capital * np.cumprod(period_end * (1 - cost))
+        equity = value * period.map(pd.Series(after))
+        equity[period < 0] = float(initial_capital)
+        # Rebalance day itself: close of the old period, minus the day's costs
+        equity.iloc[at_reb] = after
+
+        self.weights = targets
+        self.equity_curve = pd.DataFrame({'equity': equity, 'invested': float(initial_capital)})
+        turnover = np.abs(trade).sum(axis=1) / 2
+        self.rebalances = [
+            {
+                'date': date.strftime("%Y-%m-%d"),
+                'holdings': picks[date],
+                'turnover': float(turnover[i]),
+                'cost': float(cost[i] * after[i] / (1 - cost[i])) if cost[i] < 1 else 0.0,
+                'equity': float(after[i]),
+            }
+            for i, date in enumerate(reb_dates)
+        ]
+        if progress:
+            progress.finish()
+        return self.get_summary(initial_capital)
+
+    def get_summary(self, initial_capital):
+        if self.equity_curve.empty:
+            return {}
+        equity = self.equity_curve['equity']
+        final_equity = float(equity.iloc[-1])
+        years = max((equity.index[-1] - equity.index[0]).days / 365.25, 1 / 365.25)
+        drawdown = (equity / equity.cummax() - 1) * 100
+        turnover = [r['turnover'] for r in self.rebalances]
+        held = self.weights > 0
+        return {
+            "initial_capital": initial_capital,
+            "total_invested": initial_capital,
+            "final_equity": final_equity,
+            "total_return_pct": (final_equity - initial_capital) / initial_capital * 100,
+            "cagr_pct": ((final_equity / initial_capital) ** (1 / years) - 1) * 100,
+            "mdd_pct": float(drawdown.min()),
+            "rebalances": len(self.rebalances),
+            "total_trades": int((held != held.shift(fill_value=False)).values.sum()), # Entries + exits
+            "avg_turnover_pct": float(np.mean(turnover) * 100) if turnover else 0.0,
+            "total_costs": float(sum(r['cost'] for r in self.rebalances)),
+            "start_date": equity.index[0].strftime("%Y-%m-%d"),
+            "end_date": equity.index[-1].strftime("%Y-%m-%d"),
+        }
@@ -0,0 +1,80 @@
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(y, n_out, x=None):
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points of y that keep its
+    visual shape. First and last points are always kept; each bucket in between
+    contributes the point forming the largest triangle with the previous pick
+    and the next bucket's average. x defaults to the bar index.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int) # n_out - 2 buckets over [1, n - 1)
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1] # Last bucket looks ahead to the final point
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def minmax(y, n_out):
+    """
+    Min/max bucketing: indices of each bucket's lowest and highest point (in
+    order), plus the first and last point. Every extreme survives, so peaks and
+    troughs (e.g. the max drawdown) are exact. At most n_out points.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, (n_out - 2) // 2 + 1).astype(int)
+    picked = [0]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        bucket = y[lo:hi]
+        picked.extend(sorted((lo + int(np.argmin(bucket)), lo + int(np.argmax(bucket)))))
+    picked.append(n - 1)
+    return np.unique(picked)
+
+
+def downsample(y, n_out, method='lttb'):
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method} (expected one of {list(METHODS)})")
+    return lttb(y, n_out) if method == 'lttb' else minmax(y, n_out)
+
+
+def downsample_curve(dates, equity, points=1000, method='lttb'):
+    """
+    Chart-sized equity and drawdown series from a full equity curve.
+    dates: 'YYYY-MM-DD' per bar; equity: values per bar.
+    Drawdown is computed on the full curve, then always min/max bucketed so the
+    reported MDD is on the chart; the equity series uses method.
+    Returns {'points_in': n, 'equity': {'date', 'value'}, 'drawdown_pct': {'date', 'value'}}.
+    """
+    equity = np.asarray(equity, dtype=float)
+    dates = np.asarray(dates)
+    peak = np.maximum.accumulate(equity)
+    drawdown = np.divide(equity - peak, peak, out=np.zeros_like(equity), where=peak != 0) * 100
+
+    eq_idx = downsample(equity, points, method)
+    dd_idx = minmax(drawdown, points)
+    return {
+        'points_in': len(equity),
+        'method': method,
+        'equity': {'date': dates[eq_idx].tolist(), 'value': equity[eq_idx].tolist()},
+        'drawdown_pct': {'date': dates[dd_idx].tolist(), 'value': drawdown[dd_idx].tolist()},
+    }
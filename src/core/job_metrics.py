@@ -0,0 +1,103 @@
+import bisect
+import functools
+import threading
+import time
+from datetime import datetime
+
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+
+# Duration histogram bucket upper bounds (seconds); last bucket is +Inf
+DURATION_BUCKETS = [0.1, 0.5, 1, 2, 5, 10, 30, 60, 120]
+
+
+class JobMetrics:
+    """
+    Per-job execution metrics for APScheduler jobs.
+
+    - wrap() times each run: duration histogram, failures, last success, and
+      overruns (a run longer than the job's interval).
+    - listener() counts runs APScheduler skipped: missed (misfire grace
+      exceeded) and max_instances (previous run still going).
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _job(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = {
+                "interval_sec": None,
+                "runs": 0,
+                "failures": 0,
+                "overruns": 0,
+                "missed": 0,
+                "skipped_max_instances": 0,
+                "running": 0,
+                "last_duration_sec": None,
+                "max_duration_sec": 0.0,
+                "total_duration_sec": 0.0,
+                "last_success": None,
+                "last_error": None,
+                "histogram": [0] * (len(DURATION_BUCKETS) + 1),
+            }
+            self._jobs[job_id] = job
+        return job
+
+    def wrap(self, job_id, func, interval_sec=None):
+        with self._lock:
+            self._job(job_id)["interval_sec"] = interval_sec
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            with self._lock:
+                self._job(job_id)["running"] += 1
+            started = time.perf_counter()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self._record_run(job_id, time.perf_counter() - started, error)
+
+        return timed
+
+    def _record_run(self, job_id, duration, error=None):
+        with self._lock:
+            job = self._job(job_id)
+            job["running"] -= 1
+            job["runs"] += 1
+            job["last_duration_sec"] = round(duration, 3)
+            job["max_duration_sec"] = max(job["max_duration_sec"], round(duration, 3))
+            job["total_duration_sec"] += duration
+            job["histogram"][bisect.bisect_left(DURATION_BUCKETS, duration)] += 1
+            if job["interval_sec"] and duration > job["interval_sec"]:
+                job["overruns"] += 1
+            if error is None:
+                job["last_success"] = datetime.now().isoformat(timespec='seconds')
+            else:
+                job["failures"] += 1
+                job["last_error"] = str(error)
+
+    def listener(self, event):
+        """APScheduler listener for EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES."""
+        with self._lock:
+            job = self._job(event.job_id)
+            if event.code == EVENT_JOB_MISSED:
+                job["missed"] += 1
+            elif event.code == EVENT_JOB_MAX_INSTANCES:
+                job["skipped_max_instances"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for job_id, job in self._jobs.items():
+                data = {k: v for k, v in job.items() if k not in ("histogram", "total_duration_sec")}
+                data["avg_duration_sec"] = round(job["total_duration_sec"] / job["runs"], 3) if job["runs"] else None
+                labels = [f"le_{b}" for b in DURATION_BUCKETS] + ["le_inf"]
+                data["duration_histogram"] = dict(zip(labels, job["histogram"]))
+                result[job_id] = data
+            return result
@@ -0,0 +1,76 @@
+import time
+
+
+class ProgressReporter:
+    """
+    Cheap progress channel for long loops (backtest bars, screener symbols).
+
+    update() is called from the hot loop: it bumps a counter and compares a
+    clock, and only builds/sends an event every min_interval seconds. Events
+    go to `sink` (a callable taking a dict), e.g. a JobManager queue.
+
+    Event: {'stage', 'unit', 'done', 'total', 'pct', 'rate', 'eta_sec', 'message', 'final'}
+    """
+
+    def __init__(self, sink=None, min_interval=0.5):
+        self.sink = sink
+        self.min_interval = min_interval
+        self.emitted = 0
+        self._reset(None, "start", "items", None)
+
+    def _reset(self, total, stage, unit, message):
+        self.total = total
+        self.stage = stage
+        self.unit = unit
+        self.message = message
+        self.done = 0
+        self._started = time.monotonic()
+        self._next_emit = 0.0
+
+    def start(self, stage, total=None, unit="items", message=None):
+        """Begin a stage (e.g. 'fetch', 'backtest'); emits immediately."""
+        self._reset(total, stage, unit, message)
+        self._emit()
+
+    def update(self, n=1, message=None):
+        self.done += n
+        if message is not None:
+            self.message = message
+        if time.monotonic() >= self._next_emit:
+            self._emit()
+
+    def finish(self, message=None):
+        if message is not None:
+            self.message = message
+        self._emit(final=True)
+
+    def event(self, final=False):
+        elapsed = time.monotonic() - self._started
+        rate = self.done / elapsed if elapsed > 0 else None
+        eta = None
+        pct = None
+        if self.total:
+            pct = round(min(self.done / self.total, 1.0) * 100, 1)
+            if rate:
+                eta = round(max(self.total - self.done, 0) / rate, 1)
+        return {
+            "stage": self.stage,
+            "unit": self.unit,
+            "done": self.done,
+            "total": self.total,
+            "pct": pct,
+            "rate": round(rate, 1) if rate else None,
+            "eta_sec": eta,
+            "message": self.message,
+            "final": final,
+        }
+
+    def _emit(self, final=False):
+        self._next_emit = time.monotonic() + self.min_interval
+        if self.sink is None:
+            return
+        try:
+            self.sink(self.event(final))
+            self.emitted += 1
+        except Exception:
+            pass # Progress is best-effort; never break the job
@@ -1,136 +1,392 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+from datetime import datetime, timedelta
 import time
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from src.api.kis import KisApi
+from src.api.kis_async import AsyncKisApi
+from src.api.kis_stream import KisQuoteStream
 from src.core.collector import MarketDataCollector
+from src.core.trigger_engine import TriggerEngine, ABOVE
+from src.core.watchlist import Watchlist
+from src.core.job_metrics import JobMetrics
+from src.strategies.volatility_breakout import compute_breakout_offsets
+from src.analysis.fundamentals_fetcher import FundamentalsFetcher
+from src.analysis.fundamentals_store import FundamentalsStore
+from src.analysis.screener import DremanScreener, run_screen_job, screen_options, snapshot_top_n
+from src.analysis.universe import Universe
+from src.utils.market_loader import MarketLoader
 from src.execution.order_manager import OrderManager
+from src.execution.order_pipeline import OrderPipeline, OrderRequest, RiskEngine
 from src.database.db_manager import DatabaseManager
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("KronosScheduler")
 
+# Breakout orders are only dispatched inside the regular session (HH:MM, [open, close))
+SESSION_OPEN = "09:00"
+SESSION_CLOSE = "15:20"
+
+def previous_weekday(day):
+    """'YYYYMMDD' of the weekday before day (no holiday calendar: a holiday only costs a recompute)."""
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.strftime("%Y%m%d")
+
+def in_session(now=None):
+    """True on a weekday between SESSION_OPEN and SESSION_CLOSE."""
+    now = now or datetime.now()
+    return now.weekday() < 5 and SESSION_OPEN <= now.strftime("%H:%M") < SESSION_CLOSE
+
 class KronosScheduler:
     def __init__(self, kis: KisApi, collector: MarketDataCollector, order_manager: OrderManager, db: DatabaseManager):
         self.kis = kis
+        self.kis_async = AsyncKisApi(kis) # Concurrent quote polling
         self.collector = collector
         self.order_manager = order_manager
         self.db = db
         
         self.scheduler = BackgroundScheduler()
-        self.target_symbols = ["005930", "000660"] # Default Watchlist: Samsung, Hynix
+        self.metrics = JobMetrics()
+        self.scheduler.add_listener(self.metrics.listener, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+        
+        # Watchlist (DB `watchlist` table) with per-symbol k / qty.
+        sched_conf = self.kis.config.get('scheduler', {}) or {}
+        self.job_defaults = sched_conf.get('job_defaults', {}) or {}
+        self.job_policies = sched_conf.get('jobs', {}) or {}
+        self.watchlist = Watchlist(db)
+        
         self.target_prices = {} # {symbol: target_price}
+        self.target_offsets = {} # {symbol: prev range * k}, precomputed after close
+        self.target_offsets_bar_date = None # Oldest daily bar ('YYYYMMDD') the offsets came from
         self.today_bought = set() # Symbols bought today
+        self._lock = threading.Lock() # Guards target_prices/today_bought (stream thread + jobs)
+        
+        # Order pipeline: in-memory risk checks, concurrent dispatch
+        risk_conf = self.kis.config.get('risk', {}) or {}
+        self.pipeline = OrderPipeline(
+            order_manager,
+            RiskEngine(
+                order_manager.account,
+                max_position_qty=risk_conf.get('max_position_qty'),
+                max_notional_per_symbol=risk_conf.get('max_notional_per_symbol'),
+                dedup_window_sec=risk_conf.get('dedup_window_sec', 60)
+            ),
+            max_workers=risk_conf.get('dispatch_workers', 4)
+        )
+        # Fired triggers are handled here, in order, not on the stream's event loop:
+        # the risk check may call the balance API and mark_bought writes to SQLite
+        self._trigger_queue = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trigger")
+        
+        # Armed breakout thresholds; fires orders as soon as a price crosses one
+        self.triggers = TriggerEngine(dispatcher=self._on_trigger)
+        
+        # Real-time quote stream (optional, kis.stream.enabled)
+        # Ticks feed the trigger engine; the 1-minute poll only covers
+        # symbols the stream hasn't updated recently.
+        self.stream = None
+        self.stream_stale_sec = 60
+        
+        # Screener fundamentals table, refreshed in bulk after hours
+        screener_conf = self.kis.config.get('screener', {}) or {}
+        self.fundamentals = FundamentalsStore(
+            db,
+            FundamentalsFetcher(**(screener_conf.get('fetch') or {})),
+            max_age_days=(screener_conf.get('fundamentals') or {}).get('max_age_days', 7)
+        )
+
+    @property
+    def target_symbols(self):
+        return self.watchlist.symbols
+
+    def _restore_intraday_state(self):
+        """
+        Reload today's targets / bought flags after a mid-session restart,
+        so we neither refetch targets nor buy a symbol twice.
+        """
+        today_str = datetime.now().strftime("%Y%m%d")
+        state = self.db.get_intraday_state(today_str)
+        if state.empty:
+            return
+        
+        with self._lock:
+            self.today_bought = set(state.index[state['bought'] == 1])
+            self.target_prices = state['target_price'].dropna().to_dict()
+        
+        self.triggers.clear()
+        if not in_session():
+            # Outside the session: keep the flags, but leave triggers for the next market_open
+            logger.info("[Scheduler] Restored intraday state outside the session; triggers not armed.")
+            return
+        for symbol, target in self.target_prices.items():
+            if symbol not in self.today_bought:
+                self.triggers.arm(symbol, target, ABOVE, payload={'qty': self.watchlist.qty(symbol)})
+        logger.info(f"[Scheduler] Restored intraday state: {len(self.target_prices)} targets, {len(self.today_bought)} bought.")
 
     def start(self):
+        self._restore_intraday_state()
+        
+        stream_conf = self.kis.config['kis'].get('stream', {}) or {}
+        if stream_conf.get('enabled'):
+            try:
+                self.stream = KisQuoteStream.from_kis(self.kis)
+                self.stream.add_callback(self._on_tick)
+                for symbol in self.target_prices:
+                    self.stream.subscribe(symbol)
+                self.stream.start()
+            except Exception as e:
+                logger.error(f"Quote stream unavailable, falling back to polling: {e}")
+                self.stream = None
+        
         # 1. Pre-Market (08:50) - Login Check & Token Refresh
-        self.scheduler.add_job(self._job_pre_market, CronTrigger(hour=8, minute=50, day_of_week='mon-fri'))
+        self._add_job("pre_market", self._job_pre_market, CronTrigger(hour=8, minute=50, day_of_week='mon-fri'))
         
         # 2. Market Open (09:00) - Calculate Targets
-        self.scheduler.add_job(self._job_market_open, CronTrigger(hour=9, minute=0, day_of_week='mon-fri'))
+        self._add_job("market_open", self._job_market_open, CronTrigger(hour=9, minute=0, day_of_week='mon-fri'))
         
         # 3. Intraday Watcher (09:01 ~ 15:20) - Every 1 minute
-        self.scheduler.add_job(self._job_intraday_monitoring, CronTrigger(hour='9-15', minute='*', day_of_week='mon-fri'))
+        self._add_job("intraday_monitoring", self._job_intraday_monitoring, CronTrigger(hour='9-15', minute='*', day_of_week='mon-fri'), interval_sec=60)
         
         # 4. After Market (15:40) - Data Collection
-        self.scheduler.add_job(self._job_after_market, CronTrigger(hour=15, minute=40, day_of_week='mon-fri'))
+        self._add_job("after_market", self._job_after_market, CronTrigger(hour=15, minute=40, day_of_week='mon-fri'))
+        
+        # 5. Fundamentals (18:00) - Refresh stale screener fundamentals
+        self._add_job("fundamentals_refresh", self._job_fundamentals_refresh, CronTrigger(hour=18, minute=0, day_of_week='mon-fri'))
+        
+        # 6. Screener snapshots (18:30) - Precompute preset screens from the refreshed fundamentals
+        self._add_job("screener_snapshots", self._job_screener_snapshots, CronTrigger(hour=18, minute=30, day_of_week='mon-fri'))
+        
+        # 7. Stock master (07:30) - Incremental listing refresh (new listings, delistings, renames)
+        self._add_job("stock_master_refresh", self._job_stock_master_refresh, CronTrigger(hour=7, minute=30, day_of_week='mon-fri'))
         
         self.scheduler.start()
         logger.info("Kronos Scheduler Started.")
 
+    def _add_job(self, job_id, func, trigger, interval_sec=None):
+        """
+        Register an instrumented job.
+        Overlap policy (max_instances / coalesce / misfire_grace_time) comes from
+        scheduler.job_defaults, overridable per job under scheduler.jobs.<job_id>.
+        Defaults: one instance at a time, collapse backlogged runs into one.
+        """
+        policy = {"max_instances": 1, "coalesce": True, "misfire_grace_time": 30}
+        policy.update(self.job_defaults)
+        policy.update(self.job_policies.get(job_id, {}) or {})
+        
+        self.scheduler.add_job(
+            self.metrics.wrap(job_id, func, interval_sec=interval_sec),
+            trigger, id=job_id, name=job_id, replace_existing=True, **policy
+        )
+
+    def get_metrics(self):
+        """Job metrics plus next run times (for the web metrics endpoint)."""
+        metrics = self.metrics.snapshot()
+        for job in self.scheduler.get_jobs():
+            if job.id in metrics:
+                next_run = getattr(job, 'next_run_time', None)
+                metrics[job.id]["next_run"] = next_run.isoformat(timespec='seconds') if next_run else None
+        return metrics
+
+    def stop(self):
+        self.scheduler.shutdown()
+        self._trigger_queue.shutdown(wait=True) # Fired triggers reach the pipeline first
+        self.pipeline.shutdown(wait=True)
+        if self.stream:
+            self.stream.stop()
+
     def _job_pre_market(self):
         logger.info("[Scheduler] Pre-Market Check...")
         try:
             # Refresh Token (Access Token usually lasts 24h, but good to refresh)
             # kis.py automatically handles token, but we can force a balance check to warm up.
-            balance = self.kis.get_balance()
-            logger.info(f"Current Balance Checked: {balance.get('output2', [{}])[0].get('dnca_tot_amt', 'N/A')}")
+            # This also reconciles the OrderManager's cached account snapshot.
+            if self.order_manager.account.refresh():
+                logger.info(f"Current Balance Checked: {self.order_manager.account.get_cash()}")
         except Exception as e:
             logger.error(f"Pre-Market Check Failed: {e}")
 
+    def _precompute_targets(self, before_date=None):
+        """
+        Yesterday's range * k for the whole watchlist, from the local DB
+        in one query + one vectorized pass (no API calls).
+        before_date: 'YYYYMMDD', use bars strictly before it (None = latest).
+        """
+        prev_bars = self.db.get_latest_bars(self.target_symbols, before_date=before_date)
+        offsets = compute_breakout_offsets(prev_bars, self.watchlist.k())
+        
+        missing = set(self.target_symbols) - set(offsets.index)
+        if missing:
+            logger.warning(f"No daily candle in DB for {sorted(missing)}. Skipping.")
+        
+        self.target_offsets = offsets.to_dict()
+        self.target_offsets_bar_date = prev_bars.loc[offsets.index, 'date'].min() if not offsets.empty else None
+        logger.info(f"[Scheduler] Target offsets ready for {len(self.target_offsets)} symbols (bars from {self.target_offsets_bar_date}).")
+
     def _job_market_open(self):
         logger.info("[Scheduler] Market Open! Calculating Target Prices...")
-        self.target_prices = {}
-        self.today_bought = set()
+        with self._lock:
+            self.target_prices = {}
+            self.today_bought = set()
+        self.triggers.clear()
+        # Pick up watchlist edits made since yesterday
+        self.watchlist.load()
         
-        for symbol in self.target_symbols:
+        # Offsets are precomputed after yesterday's close. If they are missing or
+        # built from older bars (restart, missed/failed after_market), recompute
+        # them now from the DB with bars before today.
+        now = datetime.now()
+        today_str = now.strftime("%Y%m%d")
+        prev_session = previous_weekday(now)
+        if self.target_offsets_bar_date != prev_session:
+            self._precompute_targets(before_date=today_str)
+            if self.target_offsets_bar_date != prev_session:
+                logger.warning(f"[Scheduler] Latest daily bars are from {self.target_offsets_bar_date}, "
+                               f"not {prev_session}: targets use an older range.")
+        
+        # Only today's opening prices are needed, fetched concurrently
+        symbols = list(self.target_offsets)
+        quotes = asyncio.run(self.kis_async.get_prices(symbols))
+        
+        for symbol in symbols:
             try:
-                # Get Yesterday's OHLC
-                # We need "Daily Candle" which is available after market close.
-                # So we query DB or API for "Yesterday's daily candle".
-                # API 'get_daily_price' returns recent history.
+                price_data = quotes.get(symbol)
+                if not price_data:
+                    logger.error(f"Failed to calc target for {symbol}: no quote")
+                    continue
                 
-                # Option 1: Use DB (Might be outdated if we didn't collect yesterday?)
-                # Option 2: Use API direct fetch for latest standard.
+                current_open = float(price_data['stck_oprc'])
+                offset = self.target_offsets[symbol]
+                target = current_open + offset
                 
-                # Let's fetch last 5 days just to be sure
-                daily_data = self.kis.get_daily_price(symbol, period="D")
-                if daily_data and 'output' in daily_data:
-                    # output[0] is most recent (which is Today usually if market started? Or yesterday?)
-                    # At 09:00:00, Daily data might show Yesterday as [0] or Today as [0] (with dummy data)?
-                    # Usually [0] is today (active), [1] is yesterday.
-                    
-                    # Verify Date
-                    today_str = datetime.now().strftime("%Y%m%d")
-                    record0 = daily_data['output'][0]
-                    record1 = daily_data['output'][1]
-                    
-                    prev_day = record1 # Default assumption
-                    
-                    # Log logic checking
-                    # logger.info(f"Record 0 Date: {record0['stck_bsop_date']}") 
-                    
-                    high = float(prev_day['stck_hgpr'])
-                    low = float(prev_day['stck_lwpr'])
-                    close = float(prev_day['stck_clpr'])
-                    
-                    # Volatility Breakout Logic (k=0.5)
-                    rng = high - low
-                    
-                    # We need TODAY's Open. At 09:00 it might be fluctuating. 
-                    # We can get "Current Price" which is Open at start.
-                    current_price_data = self.kis.get_current_price(symbol)
-                    current_open = float(current_price_data['output']['stck_oprc'])
-                    
-                    target = current_open + (rng * 0.5)
+                with self._lock:
                     self.target_prices[symbol] = target
-                    
-                    logger.info(f"[{symbol}] Target Calculated. Open: {current_open}, Range: {rng}, Target: {target}")
-                    
+                self.triggers.arm(symbol, target, ABOVE, payload={'qty': self.watchlist.qty(symbol)})
+                if self.stream:
+                    self.stream.subscribe(symbol)
+                
+                logger.info(f"[{symbol}] Target Calculated. Open: {current_open}, Range*k: {offset}, Target: {target}")
+                
             except Exception as e:
                 logger.error(f"Failed to calc target for {symbol}: {e}")
+        
+        # Persist so a restart during the session reloads instead of refetching
+        self.db.save_intraday_targets(today_str, self.target_prices)
 
     def _job_intraday_monitoring(self):
-        # Skip if outside market hours (Double check)
-        now = datetime.now()
-        if now.hour == 15 and now.minute > 20:
+        # Skip if outside market hours (the cron window runs until 15:59)
+        if not in_session():
             return
             
-        logger.info(f"[Scheduler] Intraday Monitor Running... Watching: {list(self.target_prices.keys())}")
+        watching = self.triggers.armed_symbols()
+        if self.stream and self.stream.connected.is_set():
+            # Streamed symbols are evaluated per tick already
+            now_ts = time.time()
+            watching = [
+                s for s in watching
+                if now_ts - self.stream.last_prices.get(s, {}).get('received_at', 0) > self.stream_stale_sec
+            ]
         
-        for symbol, target in self.target_prices.items():
-            if symbol in self.today_bought:
-                continue
-                
+        logger.info(f"[Scheduler] Intraday Monitor Running... Polling {len(watching)} symbols")
+        if not watching:
+            return
+        
+        # One loop for the whole sweep, so kis_async's max_concurrency is its request budget
+        asyncio.run(self._sweep(watching))
+
+    async def _sweep(self, symbols):
+        # Fan out quote requests concurrently (one sweep ~ one round-trip);
+        # a failed quote maps to None and only skips that symbol
+        quotes = await self.kis_async.get_prices(symbols)
+        
+        for symbol in symbols:
             try:
-                price_data = self.kis.get_current_price(symbol)
-                current_price = float(price_data['output']['stck_prpr'])
-                
-                if current_price >= target:
-                    logger.info(f"[{symbol}] BREAKOUT! Price {current_price} >= Target {target}")
-                    # Place Order
-                    # We simply buy 1 share for testing or calculate qty.
-                    # For safety, let's Buy 1 share first.
-                    self.order_manager.buy_stock(symbol, qty=1, price=0, order_type="01") # Market Order
-                    self.today_bought.add(symbol)
-                    
+                price_data = quotes.get(symbol)
+                if not price_data:
+                    continue
+                self.triggers.on_price(symbol, float(price_data['stck_prpr']))
             except Exception as e:
                 logger.error(f"Error watching {symbol}: {e}")
 
+    def _on_tick(self, symbol, price, tick):
+        """Stream callback: evaluate armed triggers on every execution tick."""
+        # The stream stays connected overnight: ignore pre-open and after-hours ticks
+        if not in_session():
+            return
+        self.triggers.on_price(symbol, price)
+
+    def _on_trigger(self, trigger, current_price):
+        """Trigger engine dispatcher (stream / poll thread): hand off, never block tick processing."""
+        self._trigger_queue.submit(self._handle_trigger, trigger, current_price)
+
+    def _handle_trigger(self, trigger, current_price):
+        """Order a fired breakout. Triggers are fire-once, so no double buy."""
+        symbol = trigger.symbol
+        try:
+            logger.info(f"[{symbol}] BREAKOUT! Price {current_price} >= Target {trigger.threshold}")
+            # Place Order (queued: risk-checked in memory, dispatched concurrently)
+            # We simply buy a fixed qty (watchlist, default 1 share) for safety.
+            future = self.pipeline.submit(OrderRequest(
+                symbol, "BUY", qty=trigger.payload.get('qty', 1), price=0, order_type="01", # Market Order
+                ref_price=current_price, strategy="volatility_breakout"
+            ))
+            if future is None:
+                logger.warning(f"[{symbol}] Breakout order rejected by risk checks; not marked as bought.")
+                return
+            with self._lock:
+                self.today_bought.add(symbol)
+            # Persist once accepted: a restart must never buy this symbol again today
+            self.db.mark_bought(datetime.now().strftime("%Y%m%d"), symbol)
+        except Exception as e:
+            logger.error(f"[{symbol}] Breakout order failed: {e}")
+
     def _job_after_market(self):
         logger.info("[Scheduler] After Market Data Collection...")
+        # Today's targets are done; nothing may fire until the next market_open re-arms
+        self.triggers.clear()
         for symbol in self.target_symbols:
-            self.collector.collect_daily_price(symbol)
+            try:
+                self.collector.collect_daily_price(symbol)
+            except Exception as e:
+                logger.error(f"Failed to collect {symbol}: {e}")
+        
+        # Precompute tomorrow's target offsets from today's candles
+        self._precompute_targets()
+
+    def _job_fundamentals_refresh(self):
+        """Re-download only stale rows (every DB universe + legacy lists) so screens run from local data."""
+        screener = DremanScreener()
+        symbols = Universe(self.db).all_symbols() + screener.get_universe('large_cap') + screener.get_universe('mid_cap')
+        stats = self.fundamentals.refresh(symbols)
+        logger.info(f"[Scheduler] Fundamentals refresh: {stats}")
+
+    def _job_stock_master_refresh(self):
+        """Diff today's listings into stock_master (only changed rows are written)."""
+        master_conf = self.kis.config.get('stock_master', {}) or {}
+        stats = MarketLoader(max_workers=master_conf.get('max_workers', 5)).refresh(self.db)
+        logger.info(f"[Scheduler] Stock master refresh: {stats}")
+
+    def _job_screener_snapshots(self):
+        """
+        Recompute each configured preset x universe screen and store it in
+        screener_results, so the web page serves it without running the pipeline.
+        """
+        screener_conf = self.kis.config.get('screener', {}) or {}
+        snapshot_conf = screener_conf.get('snapshots') or {}
+        options = screen_options(screener_conf)
+        for strategy in snapshot_conf.get('strategies', ['dreman', 'magic']):
+            for universe in snapshot_conf.get('universes', ['large_cap', 'mid_cap']):
+                try:
+                    result = run_screen_job(
+                        strategy, universe, db_path=self.db.db_path, top_n=snapshot_top_n(screener_conf),
+                        snapshot=True, source="scheduled", **options
+                    )
+                    logger.info(f"[Scheduler] Screener snapshot {strategy}/{universe}: {len(result['results'])} candidates")
+                except Exception as e:
+                    logger.error(f"[Scheduler] Screener snapshot {strategy}/{universe} failed: {e}")
@@ -0,0 +1,157 @@
+import bisect
+import itertools
+import logging
+import threading
+
+logger = logging.getLogger("TriggerEngine")
+
+ABOVE = "above" # Fire when price >= threshold (e.g. breakout buy)
+BELOW = "below" # Fire when price <= threshold (e.g. stop loss)
+
+
+class Trigger:
+    __slots__ = ("trigger_id", "symbol", "threshold", "condition", "payload")
+
+    def __init__(self, trigger_id, symbol, threshold, condition, payload=None):
+        self.trigger_id = trigger_id
+        self.symbol = symbol
+        self.threshold = threshold
+        self.condition = condition
+        self.payload = payload or {}
+
+    def __repr__(self):
+        return f"Trigger({self.trigger_id}, {self.symbol} {self.condition} {self.threshold})"
+
+
+class _SymbolBook:
+    """Armed thresholds for one symbol, each side kept sorted by (threshold, id)."""
+    __slots__ = ("above", "below")
+
+    def __init__(self):
+        self.above = [] # ascending; fired prefix is every key <= price
+        self.below = [] # ascending; fired suffix is every key >= price
+
+    def __len__(self):
+        return len(self.above) + len(self.below)
+
+
+class TriggerEngine:
+    """
+    Indexes one-shot price triggers for all watched symbols.
+
+    on_price(symbol, price) finds every armed trigger crossed by the price
+    with a bisect on the symbol's sorted thresholds: O(log n + k) for k
+    fired triggers. Fired triggers are removed (fire-once) under the lock
+    and then handed to `dispatcher(trigger, price)` outside of it, so
+    concurrent feeds (stream ticks, polling) can never fire one twice.
+    """
+
+    def __init__(self, dispatcher=None):
+        self.dispatcher = dispatcher
+        self._books = {} # {symbol: _SymbolBook}
+        self._triggers = {} # {trigger_id: Trigger}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        # Stats
+        self.evaluations = 0
+        self.fired = 0
+
+    def arm(self, symbol, threshold, condition=ABOVE, payload=None):
+        if condition not in (ABOVE, BELOW):
+            raise ValueError(f"Unknown trigger condition: {condition}")
+
+        with self._lock:
+            trigger = Trigger(next(self._ids), symbol, float(threshold), condition, payload)
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = _SymbolBook()
+            side = book.above if condition == ABOVE else book.below
+            bisect.insort(side, (trigger.threshold, trigger.trigger_id))
+            self._triggers[trigger.trigger_id] = trigger
+            return trigger.trigger_id
+
+    def disarm(self, trigger_id):
+        with self._lock:
+            trigger = self._triggers.pop(trigger_id, None)
+            if trigger is None:
+                return False
+            book = self._books[trigger.symbol]
+            side = book.above if trigger.condition == ABOVE else book.below
+            key = (trigger.threshold, trigger_id)
+            i = bisect.bisect_left(side, key)
+            if i < len(side) and side[i] == key:
+                del side[i]
+            if not book:
+                del self._books[trigger.symbol]
+            return True
+
+    def disarm_symbol(self, symbol):
+        with self._lock:
+            book = self._books.pop(symbol, None)
+            if book is None:
+                return 0
+            for _, trigger_id in book.above + book.below:
+                self._triggers.pop(trigger_id, None)
+            return len(book)
+
+    def clear(self):
+        with self._lock:
+            self._books.clear()
+            self._triggers.clear()
+
+    def on_price(self, symbol, price):
+        """
+        Evaluate a price update. Returns the list of fired triggers
+        (already dispatched if a dispatcher is set).
+        """
+        with self._lock:
+            self.evaluations += 1
+            book = self._books.get(symbol)
+            if book is None:
+                return []
+
+            fired_keys = []
+            if book.above and book.above[0][0] <= price:
+                i = bisect.bisect_right(book.above, (price, float("inf")))
+                fired_keys.extend(book.above[:i])
+                del book.above[:i]
+            if book.below and book.below[-1][0] >= price:
+                i = bisect.bisect_left(book.below, (price, -1))
+                fired_keys.extend(book.below[i:])
+                del book.below[i:]
+
+            if not fired_keys:
+                return []
+            if not book:
+                del self._books[symbol]
+            fired = [self._triggers.pop(trigger_id) for _, trigger_id in fired_keys]
+            self.fired += len(fired)
+
+        if self.dispatcher:
+            for trigger in fired:
+                try:
+                    self.dispatcher(trigger, price)
+                except Exception as e:
+                    logger.error(f"Dispatch failed for {trigger}: {e}")
+        return fired
+
+    def armed_symbols(self):
+        with self._lock:
+            return list(self._books)
+
+    def get_triggers(self, symbol=None):
+        with self._lock:
+            return [t for t in self._triggers.values() if symbol is None or t.symbol == symbol]
+
+    def __len__(self):
+        return len(self._triggers)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "armed": len(self._triggers),
+                "symbols": len(self._books),
+                "evaluations": self.evaluations,
+                "fired": self.fired,
+            }
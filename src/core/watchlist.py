@@ -0,0 +1,57 @@
+import logging
+
+import pandas as pd
+
+from src.database.db_manager import DatabaseManager
+
+logger = logging.getLogger("Watchlist")
+
+
+class Watchlist:
+    """
+    DB-backed watchlist (`watchlist` table) with per-symbol strategy
+    parameters (k, qty).
+    """
+
+    DEFAULT_SYMBOLS = ["005930", "000660"] # Samsung, Hynix (seeded on first run)
+    DEFAULT_STRATEGY = "volatility_breakout"
+    DEFAULT_K = 0.5
+    DEFAULT_QTY = 1
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.entries = None # DataFrame indexed by symbol
+        self.load()
+
+    def load(self):
+        self.entries = self.db.get_watchlist()
+        if self.entries.empty and self.db.get_watchlist(enabled_only=False).empty:
+            logger.info(f"Watchlist empty. Seeding defaults: {self.DEFAULT_SYMBOLS}")
+            for symbol in self.DEFAULT_SYMBOLS:
+                self.add(symbol, reload=False)
+            self.entries = self.db.get_watchlist()
+        return self.entries
+
+    @property
+    def symbols(self):
+        return list(self.entries.index)
+
+    def k(self):
+        """Per-symbol k as a Series (aligned for vectorized target math)."""
+        return self.entries['k'].fillna(self.DEFAULT_K)
+
+    def qty(self, symbol):
+        qty = self.entries.at[symbol, 'qty'] if symbol in self.entries.index else None
+        # NULL qty loads as NaN, which is truthy
+        if pd.notna(qty) and qty:
+            return int(qty)
+        return self.DEFAULT_QTY
+
+    def add(self, symbol, k=DEFAULT_K, qty=DEFAULT_QTY, strategy=DEFAULT_STRATEGY, enabled=True, reload=True):
+        self.db.upsert_watchlist([(symbol, strategy, k, qty, 1 if enabled else 0)])
+        if reload:
+            self.load()
+
+    def remove(self, symbol):
+        self.db.remove_from_watchlist(symbol)
+        self.load()
@@ -1,10 +1,16 @@
 import sqlite3
+import hashlib
+import json
 import os
+import time
 import pandas as pd
+from datetime import datetime
 
 class DatabaseManager:
-    def __init__(self, db_path="data/market_data.db"):
+    def __init__(self, db_path="data/market_data.db", cache_dir=None):
         self.db_path = db_path
+        # Parquet price caches; next to the DB by default (data/cache), so every DB has its own
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(db_path), "cache")
         self._initialize_db()
 
     def _get_connection(self):
@@ -19,10 +25,25 @@ class DatabaseManager:
                 schema = f.read()
             conn = self._get_connection()
             conn.executescript(schema)
+            self._migrate(conn)
             conn.close()
         else:
             print(f"Schema file not found at {schema_path}")
 
+    def _migrate(self, conn):
+        """Add columns introduced after a table was first created (CREATE IF NOT EXISTS won't)."""
+        added_columns = {
+            'stock_master': [('market', 'TEXT'), ('sector', 'TEXT'), ('market_cap', 'REAL')],
+            'screener_results': [('top_n', 'INTEGER')],
+        }
+        for table, columns in added_columns.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, col_type in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_master_market ON stock_master (market)")
+        conn.commit()
+
     def insert_daily_price(self, data_list):
         """
         data_list: list of dicts or tuples matching schema
@@ -38,10 +59,29 @@ class DatabaseManager:
         """
         
         cursor.executemany(sql, data_list)
+        # Same transaction: Parquet caches are invalidated by price writes only
+        cursor.execute("INSERT OR REPLACE INTO data_version (name, changed_at) VALUES ('daily_price', ?)", (time.time(),))
         conn.commit()
         conn.close()
         print(f"Inserted/Updated {len(data_list)} rows into daily_price.")
 
+    def _prices_changed_at(self):
+        """Time of the last daily_price write; the DB file mtime if never recorded (older DBs)."""
+        conn = self._get_connection()
+        try:
+            row = conn.execute("SELECT changed_at FROM data_version WHERE name = 'daily_price'").fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else os.path.getmtime(self.db_path)
+
+    def _price_cache_valid(self, cache_path):
+        """
+        A Parquet price cache is current if written after the last daily_price write.
+        Writes to other tables (screener results, fundamentals, ...) don't invalidate it.
+        """
+        return (os.path.exists(cache_path) and os.path.exists(self.db_path)
+                and os.path.getmtime(cache_path) > self._prices_changed_at())
+
     def get_daily_price(self, symbol, start_date=None, end_date=None):
         conn = self._get_connection()
         cursor = conn.cursor()
@@ -74,23 +114,124 @@ class DatabaseManager:
         df.set_index('date', inplace=True)
         return df
 
+    def get_latest_bars(self, symbols, before_date=None):
+        """
+        Latest daily bar per symbol in one query (e.g. yesterday's candle
+        for the whole watchlist).
+        before_date: 'YYYYMMDD', only bars strictly before this date.
+        Returns DataFrame indexed by symbol with ['date', 'open', 'high', 'low', 'close', 'volume'].
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume'])
+        
+        placeholders = ",".join("?" * len(symbols))
+        query = f"""
+        SELECT symbol, date, open, high, low, close, volume FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS rn
+            FROM daily_price
+            WHERE symbol IN ({placeholders}) {"AND date < ?" if before_date else ""}
+        ) WHERE rn = 1
+        """
+        params = symbols + ([before_date] if before_date else [])
+        
+        conn = self._get_connection()
+        try:
+            df = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+        return df.set_index('symbol')
+
+    PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def _read_by_symbol_chunks(self, query, symbols, params=(), chunk=500):
+        """Runs query (with a `{symbols}` placeholder list) per chunk of symbols, concatenated."""
+        conn = self._get_connection()
+        try:
+            frames = [
+                pd.read_sql_query(
+                    query.format(symbols=", ".join("?" * len(symbols[i:i + chunk]))), conn,
+                    params=list(symbols[i:i + chunk]) + list(params)
+                )
+                for i in range(0, len(symbols), chunk)
+            ]
+        finally:
+            conn.close()
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def get_price_panel(self, symbols, start_date=None, end_date=None, field='close', cache=False):
+        """
+        One daily_price column for many symbols as a date x symbol DataFrame
+        (DatetimeIndex; NaN where a symbol has no bar). Dates are 'YYYYMMDD'.
+        cache: keep the panel as Parquet in cache_dir, valid until daily_price changes
+        (same rule as get_daily_price_optimized).
+        """
+        if field not in self.PRICE_FIELDS:
+            raise ValueError(f"Unknown price field: {field}")
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return pd.DataFrame()
+        if cache:
+            key_parts = [os.path.abspath(self.db_path), field, str(start_date), str(end_date)] + symbols
+            key = hashlib.sha1("|".join(key_parts).encode()).hexdigest()[:16]
+            cache_path = os.path.join(self.cache_dir, f"panel_{key}.parquet")
+            if self._price_cache_valid(cache_path):
+                try:
+                    return pd.read_parquet(cache_path)
+                except Exception as e:
+                    print(f"Failed to read panel cache: {e}. Fallback to SQL.")
+            panel = self.get_price_panel(symbols, start_date, end_date, field)
+            if not panel.empty:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    panel.to_parquet(cache_path)
+                except Exception as e:
+                    print(f"Failed to write panel cache: {e}")
+            return panel
+        query = f"SELECT date, symbol, {field} AS value FROM daily_price WHERE symbol IN ({{symbols}})"
+        params = []
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        df = self._read_by_symbol_chunks(query, symbols, params)
+        if df.empty:
+            return pd.DataFrame()
+        panel = df.pivot(index='date', columns='symbol', values='value')
+        panel.index = pd.to_datetime(panel.index, format='%Y%m%d')
+        return panel.sort_index()
+
+    def get_dividend_panel(self, symbols, start_date=None, end_date=None):
+        """Dividends per share as a date x symbol DataFrame (empty if none)."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return pd.DataFrame()
+        query = "SELECT date, symbol, dividend FROM dividends WHERE symbol IN ({symbols})"
+        params = []
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        df = self._read_by_symbol_chunks(query, symbols, params)
+        if df.empty:
+            return pd.DataFrame()
+        panel = df.pivot_table(index='date', columns='symbol', values='dividend', aggfunc='sum')
+        panel.index = pd.to_datetime(panel.index, format='%Y%m%d')
+        return panel.sort_index()
+
     def get_daily_price_optimized(self, symbol):
         """
         Hybrid Fetch: Check Parquet Cache -> If valid, load it. Else, load from SQL and cache it.
         """
-        cache_dir = "data/cache"
-        os.makedirs(cache_dir, exist_ok=True)
-        cache_path = os.path.join(cache_dir, f"{symbol}.parquet")
-        
-        # Check Cache Validity
-        is_cache_valid = False
-        if os.path.exists(cache_path) and os.path.exists(self.db_path):
-            db_mtime = os.path.getmtime(self.db_path)
-            cache_mtime = os.path.getmtime(cache_path)
-            if cache_mtime > db_mtime:
-                is_cache_valid = True
-                
-        if is_cache_valid:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = os.path.join(self.cache_dir, f"{symbol}.parquet")
+        
+        # Check Cache Validity (only daily_price writes invalidate it)
+        if self._price_cache_valid(cache_path):
             try:
                 # print(f"[{symbol}] Loading from Parquet Cache...")
                 return pd.read_parquet(cache_path)
@@ -111,7 +252,7 @@ class DatabaseManager:
 
     def save_stock_master(self, df):
         """
-        Save dataframe (code_short, name_kr) to stock_master table.
+        Save dataframe (code_short, name_kr[, market, sector, market_cap]) to stock_master table.
         replaces existing data.
         """
         conn = self._get_connection()
@@ -120,9 +261,16 @@ class DatabaseManager:
         # We can clear table or replace. Since master is definitive, clear and insert is safer for consistency?
         # Or upsert. Let's use upsert.
         
-        data_list = list(zip(df['code_short'], df['name_kr']))
+        df = df.astype(object).where(df.notna(), None)
+        missing = [None] * len(df)
+        data_list = list(zip(
+            df['code_short'], df['name_kr'],
+            df['market'] if 'market' in df else missing,
+            df['sector'] if 'sector' in df else missing,
+            df['market_cap'] if 'market_cap' in df else missing
+        ))
         
-        sql = "INSERT OR REPLACE INTO stock_master (code, name) VALUES (?, ?)"
+        sql = "INSERT OR REPLACE INTO stock_master (code, name, market, sector, market_cap) VALUES (?, ?, ?, ?, ?)"
         
         try:
             cursor.executemany(sql, data_list)
@@ -133,6 +281,25 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def apply_stock_master_changes(self, upserts, delete_codes):
+        """
+        Incremental master update in one transaction.
+        upserts: DataFrame (code_short, name_kr, market, sector, market_cap) of new/changed rows.
+        delete_codes: delisted codes.
+        """
+        upserts = upserts.astype(object).where(upserts.notna(), None)
+        conn = self._get_connection()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO stock_master (code, name, market, sector, market_cap) VALUES (?, ?, ?, ?, ?)",
+                list(zip(upserts['code_short'], upserts['name_kr'], upserts['market'], upserts['sector'], upserts['market_cap']))
+            )
+            conn.executemany("DELETE FROM stock_master WHERE code = ?", [(c,) for c in delete_codes])
+            conn.commit()
+            print(f"Stock Master Updated: {len(upserts)} upserted, {len(delete_codes)} deleted.")
+        finally:
+            conn.close()
+
     def save_us_stock_master(self, df):
         """
         Save US stock dataframe (code, name) to stock_master.
@@ -212,3 +379,246 @@ class DatabaseManager:
         # Return as dict {date_str: amount}
         return {row[0]: row[1] for row in rows}
 
+    def get_watchlist(self, enabled_only=True):
+        """
+        Returns DataFrame indexed by symbol with ['strategy', 'k', 'qty', 'enabled'].
+        """
+        query = "SELECT symbol, strategy, k, qty, enabled FROM watchlist"
+        if enabled_only:
+            query += " WHERE enabled = 1"
+        query += " ORDER BY symbol"
+        
+        conn = self._get_connection()
+        try:
+            df = pd.read_sql_query(query, conn)
+        finally:
+            conn.close()
+        return df.set_index('symbol')
+
+    def upsert_watchlist(self, rows):
+        """
+        rows: list of (symbol, strategy, k, qty, enabled)
+        """
+        conn = self._get_connection()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO watchlist (symbol, strategy, k, qty, enabled) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def remove_from_watchlist(self, symbol):
+        conn = self._get_connection()
+        try:
+            conn.execute("DELETE FROM watchlist WHERE symbol = ?", (symbol,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def save_intraday_targets(self, trade_date, targets):
+        """
+        targets: {symbol: target_price}. Keeps the 'bought' flag of existing rows.
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        conn = self._get_connection()
+        try:
+            conn.executemany(
+                """
+                INSERT INTO intraday_state (trade_date, symbol, target_price, bought, updated_at)
+                VALUES (?, ?, ?, 0, ?)
+                ON CONFLICT(trade_date, symbol) DO UPDATE SET
+                    target_price = excluded.target_price, updated_at = excluded.updated_at
+                """,
+                [(trade_date, symbol, float(target), now) for symbol, target in targets.items()]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def mark_bought(self, trade_date, symbol):
+        now = datetime.now().isoformat(timespec='seconds')
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                """
+                INSERT INTO intraday_state (trade_date, symbol, bought, updated_at) VALUES (?, ?, 1, ?)
+                ON CONFLICT(trade_date, symbol) DO UPDATE SET bought = 1, updated_at = excluded.updated_at
+                """,
+                (trade_date, symbol, now)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_intraday_state(self, trade_date):
+        """
+        Returns DataFrame indexed by symbol with ['target_price', 'bought'].
+        """
+        conn = self._get_connection()
+        try:
+            df = pd.read_sql_query(
+                "SELECT symbol, target_price, bought FROM intraday_state WHERE trade_date = ?",
+                conn, params=[trade_date]
+            )
+        finally:
+            conn.close()
+        return df.set_index('symbol')
+
+    FUNDAMENTAL_COLUMNS = [
+        'name', 'sector', 'quote_type', 'price', 'market_cap', 'pe', 'pb', 'operating_cashflow',
+        'dividend_yield', 'debt_to_equity', 'current_ratio', 'enterprise_value', 'ebitda', 'roa'
+    ]
+
+    def upsert_fundamentals(self, rows, as_of=None):
+        """
+        rows: list of dicts with 'symbol' + FUNDAMENTAL_COLUMNS (missing keys -> NULL).
+        as_of: 'YYYYMMDD' snapshot date (default today). One row per symbol per as_of.
+        """
+        as_of = as_of or datetime.now().strftime("%Y%m%d")
+        now = datetime.now().isoformat(timespec='seconds')
+        cols = ['symbol', 'as_of'] + self.FUNDAMENTAL_COLUMNS + ['fetched_at']
+        conn = self._get_connection()
+        try:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO fundamentals ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                [
+                    (r['symbol'], r.get('as_of', as_of), *[r.get(c) for c in self.FUNDAMENTAL_COLUMNS], now)
+                    for r in rows
+                ]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_latest_fundamentals(self, symbols=None, as_of=None):
+        """
+        Latest snapshot per symbol with as_of <= as_of (point-in-time; default: latest).
+        Returns DataFrame indexed by symbol with ['as_of', 'fetched_at'] + FUNDAMENTAL_COLUMNS.
+        """
+        query = "SELECT * FROM fundamentals WHERE 1=1"
+        params = []
+        if as_of:
+            query += " AND as_of <= ?"
+            params.append(as_of)
+        if symbols is not None:
+            symbols = list(symbols)
+            if not symbols:
+                return pd.DataFrame(columns=['as_of', 'fetched_at'] + self.FUNDAMENTAL_COLUMNS).rename_axis('symbol')
+            if len(symbols) <= 500:
+                query += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+                params.extend(symbols)
+
+        query = f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY as_of DESC) AS rn
+                FROM ({query})
+            ) WHERE rn = 1
+        """
+        conn = self._get_connection()
+        try:
+            df = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+        if symbols is not None and len(symbols) > 500:
+            # Universe-sized lists: one scan + isin beats a huge IN (...) list
+            df = df[df['symbol'].isin(symbols)]
+        return df.drop(columns=['rn']).set_index('symbol')
+
+    def get_fundamentals_history(self, symbols=None, end_date=None):
+        """
+        Every snapshot with as_of <= end_date, sorted by as_of (for point-in-time
+        replays that would otherwise call get_latest_fundamentals per date).
+        Returns DataFrame with 'symbol', 'as_of', 'fetched_at' + FUNDAMENTAL_COLUMNS.
+        """
+        date_filter = " AND as_of <= ?" if end_date else ""
+        params = [end_date] if end_date else []
+        if symbols is not None:
+            # Symbol placeholders come first, then the date parameter
+            query = "SELECT * FROM fundamentals WHERE symbol IN ({symbols})" + date_filter
+            df = self._read_by_symbol_chunks(query, list(dict.fromkeys(symbols)), params)
+        else:
+            conn = self._get_connection()
+            try:
+                df = pd.read_sql_query("SELECT * FROM fundamentals WHERE 1=1" + date_filter, conn, params=params)
+            finally:
+                conn.close()
+        if df.empty:
+            return pd.DataFrame(columns=['symbol', 'as_of', 'fetched_at'] + self.FUNDAMENTAL_COLUMNS)
+        return df.sort_values(['as_of', 'symbol'], kind='stable').reset_index(drop=True)
+
+    def save_screener_result(self, strategy, universe, payload, preset_hash=None, source=None, computed_at=None,
+                             top_n=None):
+        """
+        Latest ranked output of one screen (strategy x universe), replacing the previous one.
+        payload: JSON-serializable run_screen_job result. top_n: size the screen was run with.
+        """
+        computed_at = computed_at or datetime.now().isoformat(timespec='seconds')
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO screener_results (strategy, universe, computed_at, preset_hash, source, top_n, payload) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (strategy, universe, computed_at, preset_hash, source, top_n, json.dumps(payload, default=str))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_screener_result(self, strategy, universe):
+        """Returns {'computed_at', 'preset_hash', 'source', 'top_n', 'payload'} or None."""
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT computed_at, preset_hash, source, top_n, payload FROM screener_results WHERE strategy = ? AND universe = ?",
+                (strategy, universe)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {'computed_at': row[0], 'preset_hash': row[1], 'source': row[2], 'top_n': row[3], 'payload': json.loads(row[4])}
+
+    def get_stock_master(self, markets=None):
+        """
+        Returns DataFrame ['code', 'name', 'market', 'sector', 'market_cap'].
+        markets: optional list of market labels (e.g. ['KOSPI', 'KOSDAQ']).
+        """
+        query = "SELECT code, name, market, sector, market_cap FROM stock_master"
+        params = []
+        if markets:
+            query += f" WHERE market IN ({', '.join('?' * len(markets))})"
+            params.extend(markets)
+        conn = self._get_connection()
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+
+    def get_universes(self):
+        """Returns list of universe definition dicts, ordered by name."""
+        conn = self._get_connection()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute("SELECT * FROM universe ORDER BY name").fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def upsert_universes(self, definitions, replace=True):
+        """
+        definitions: list of dicts with 'name' and any universe columns.
+        replace=False keeps existing rows (used for seeding defaults).
+        """
+        cols = ['name', 'label', 'markets', 'sectors', 'exclude_sectors',
+                'min_market_cap', 'max_market_cap', 'min_rank', 'max_rank']
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        conn = self._get_connection()
+        try:
+            conn.executemany(
+                f"{verb} INTO universe ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                [tuple(d.get(c) for c in cols) for d in definitions]
+            )
+            conn.commit()
+        finally:
+            conn.close()
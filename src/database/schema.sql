@@ -11,7 +11,10 @@ CREATE TABLE IF NOT EXISTS daily_price (
 
 CREATE TABLE IF NOT EXISTS stock_master (
     code TEXT PRIMARY KEY,
-    name TEXT
+    name TEXT,
+    market TEXT,
+    sector TEXT,
+    market_cap REAL
 );
 
 CREATE TABLE IF NOT EXISTS dividends (
@@ -20,3 +23,70 @@ CREATE TABLE IF NOT EXISTS dividends (
     dividend REAL,
     PRIMARY KEY (symbol, date)
 );
+
+CREATE TABLE IF NOT EXISTS watchlist (
+    symbol TEXT PRIMARY KEY,
+    strategy TEXT DEFAULT 'volatility_breakout',
+    k REAL DEFAULT 0.5,
+    qty INTEGER DEFAULT 1,
+    enabled INTEGER DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS intraday_state (
+    trade_date TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    target_price REAL,
+    bought INTEGER DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (trade_date, symbol)
+);
+
+CREATE TABLE IF NOT EXISTS fundamentals (
+    symbol TEXT NOT NULL,
+    as_of TEXT NOT NULL,
+    name TEXT,
+    sector TEXT,
+    quote_type TEXT,
+    price REAL,
+    market_cap REAL,
+    pe REAL,
+    pb REAL,
+    operating_cashflow REAL,
+    dividend_yield REAL,
+    debt_to_equity REAL,
+    current_ratio REAL,
+    enterprise_value REAL,
+    ebitda REAL,
+    roa REAL,
+    fetched_at TEXT,
+    PRIMARY KEY (symbol, as_of)
+);
+
+CREATE TABLE IF NOT EXISTS universe (
+    name TEXT PRIMARY KEY,
+    label TEXT,
+    markets TEXT,
+    sectors TEXT,
+    exclude_sectors TEXT,
+    min_market_cap REAL,
+    max_market_cap REAL,
+    min_rank INTEGER,
+    max_rank INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS screener_results (
+    strategy TEXT NOT NULL,
+    universe TEXT NOT NULL,
+    computed_at TEXT NOT NULL,
+    preset_hash TEXT,
+    source TEXT,
+    top_n INTEGER,
+    payload TEXT,
+    PRIMARY KEY (strategy, universe)
+);
+
+-- Last write time (unix seconds) per table, for cache validity (e.g. Parquet price caches)
+CREATE TABLE IF NOT EXISTS data_version (
+    name TEXT PRIMARY KEY,
+    changed_at REAL NOT NULL
+);
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from src.api.kis import KisApi
+
+logger = logging.getLogger("AccountState")
+
+
+class AccountState:
+    """
+    In-memory snapshot of the account: cash and holdings keyed by pdno.
+
+    - Pre-trade checks read it without an API round trip.
+    - Updated optimistically when an order is acknowledged.
+    - Reconciled with get_balance() on a background interval, which also
+      corrects optimistic guesses (e.g. market orders with unknown fill price).
+      Orders applied while a balance inquiry is in flight are replayed on top
+      of its result, so they are never lost (if the broker already counted one,
+      it is counted twice until the next reconcile: position too high after a
+      buy, too low after a sell, both on the side that blocks new orders).
+    - With on_fill set, each reconcile also diffs today's executions and calls
+      on_fill(symbol, side, qty, price, broker_order_no) for the newly filled part.
+    """
+
+    def __init__(self, kis: KisApi, reconcile_interval=30, on_fill=None):
+        self.kis = kis
+        self.reconcile_interval = reconcile_interval
+        self.on_fill = on_fill
+
+        self.cash = 0.0
+        self.holdings = {} # {pdno: {'qty': int, 'avg_price': float, 'name': str}}
+        self.last_reconciled = None # time.time() of last successful refresh
+        self._seq = 0 # Orders applied so far
+        self._applied = [] # [(seq, pdno, side, qty, price)] not yet covered by a refresh
+        self._fills_date = None
+        self._filled = {} # {broker_order_no: (filled qty, filled amount)} already reported
+
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Reconcile with a full balance inquiry. Returns True on success."""
+        with self._lock:
+            started_seq = self._seq
+        balance = self.kis.get_balance()
+        if not balance or 'output2' not in balance:
+            logger.error("Failed to fetch balance for account reconciliation.")
+            return False
+
+        holdings = {}
+        for h in balance.get('output1', []):
+            qty = int(h.get('hldg_qty', 0))
+            if qty <= 0:
+                continue
+            holdings[h['pdno']] = {
+                'qty': qty,
+                'avg_price': float(h.get('pchs_avg_pric', 0) or 0),
+                'name': h.get('prdt_name', '')
+            }
+
+        with self._lock:
+            self.cash = float(balance['output2'][0]['dnca_tot_amt'])
+            self.holdings = holdings
+            # Orders applied after the inquiry started may be missing from it
+            self._applied = [entry for entry in self._applied if entry[0] > started_seq]
+            for _, pdno, side, qty, price in self._applied:
+                self._apply(pdno, side, qty, price)
+            self.last_reconciled = time.time()
+        if self.on_fill:
+            self.reconcile_fills()
+        return True
+
+    def seed_fills(self, filled, date=None):
+        """Fills already reported today ({broker_order_no: (qty, amount)}), e.g. from the journal after a restart."""
+        with self._lock:
+            self._fills_date = date or datetime.now().strftime("%Y%m%d")
+            self._filled = dict(filled)
+
+    def reconcile_fills(self):
+        """Report fills since the last call (partial fills as they grow). Returns the number reported."""
+        today = datetime.now().strftime("%Y%m%d")
+        executions = self.kis.get_daily_executions(today)
+        if executions is None:
+            return 0
+
+        new_fills = []
+        with self._lock:
+            if self._fills_date != today:
+                self._fills_date, self._filled = today, {}
+            for row in executions:
+                odno = row.get('odno')
+                qty = int(row.get('tot_ccld_qty', 0) or 0)
+                amount = float(row.get('tot_ccld_amt', 0) or 0)
+                seen_qty, seen_amount = self._filled.get(odno, (0, 0.0))
+                if not odno or qty <= seen_qty:
+                    continue
+                self._filled[odno] = (qty, amount)
+                side = "SELL" if row.get('sll_buy_dvsn_cd') == "01" else "BUY"
+                new_fills.append((row.get('pdno'), side, qty - seen_qty, (amount - seen_amount) / (qty - seen_qty), odno))
+
+        for fill in new_fills:
+            self.on_fill(*fill)
+        return len(new_fills)
+
+    def ensure_loaded(self):
+        if self.last_reconciled is None:
+            return self.refresh()
+        return True
+
+    def get_cash(self):
+        with self._lock:
+            return self.cash
+
+    def get_qty(self, pdno):
+        with self._lock:
+            h = self.holdings.get(pdno)
+            return h['qty'] if h else 0
+
+    def apply_order(self, pdno, side, qty, price=0):
+        """
+        Optimistic update on order acknowledgement.
+        price=0 (market order): holdings are updated, cash waits for reconcile.
+        """
+        with self._lock:
+            self._seq += 1
+            self._applied.append((self._seq, pdno, side, qty, price))
+            self._apply(pdno, side, qty, price)
+
+    def _apply(self, pdno, side, qty, price):
+        # Caller holds self._lock
+        h = self.holdings.setdefault(pdno, {'qty': 0, 'avg_price': 0.0, 'name': ''})
+        if side == "BUY":
+            if price > 0:
+                total_cost = h['avg_price'] * h['qty'] + price * qty
+                h['avg_price'] = total_cost / (h['qty'] + qty)
+                self.cash -= price * qty
+            h['qty'] += qty
+        else:
+            h['qty'] = max(0, h['qty'] - qty)
+            if price > 0:
+                self.cash += price * qty
+            if h['qty'] == 0:
+                del self.holdings[pdno]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'cash': self.cash,
+                'holdings': {k: dict(v) for k, v in self.holdings.items()},
+                'last_reconciled': self.last_reconciled
+            }
+
+    # --- Background reconciliation ---
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._reconcile_loop, name="AccountReconcile", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(5)
+
+    def _reconcile_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Account reconciliation failed: {e}")
+            self._stop.wait(self.reconcile_interval)
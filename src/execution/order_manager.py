@@ -1,72 +1,135 @@
+import os
+import time
 import logging
+from datetime import datetime
 from src.api.kis import KisApi
+from src.execution.account_state import AccountState
+from src.execution import trade_journal
 
 # Setup Logger
 logger = logging.getLogger("OrderManager")
 logger.setLevel(logging.INFO)
-# Basic file handler
-fh = logging.FileHandler("data/trade.log")
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-fh.setFormatter(formatter)
-logger.addHandler(fh)
+
+
+def _attach_trade_log(path="data/trade.log"):
+    """Human-readable log next to the journal. Attached on first use, not at import."""
+    if any(getattr(h, "baseFilename", None) == os.path.abspath(path) for h in logger.handlers):
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fh = logging.FileHandler(path)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    fh.setFormatter(formatter)
+    logger.addHandler(fh)
+
 
 class OrderManager:
-    def __init__(self, kis: KisApi):
+    def __init__(self, kis: KisApi, account: AccountState = None, reconcile_interval=30, journal=None):
         self.kis = kis
+        # Cached cash/holdings: pre-trade checks run in memory, reconciled in background
+        self.account = account or AccountState(kis, reconcile_interval=reconcile_interval)
+        # Structured order journal (TradeJournal); None disables journaling
+        self.journal = journal
+        # {broker_order_no: (strategy, order_id)} so fills carry the order's tags
+        self._order_tags = {}
+        if journal:
+            # Fills come from account reconciliation; skip the ones journaled before a restart
+            self.account.on_fill = self._journal_fill
+            self.account.seed_fills(journal.fill_totals(datetime.now().strftime("%Y%m%d")))
+        _attach_trade_log()
+
+    def start(self):
+        """Start background reconciliation of the account snapshot."""
+        self.account.start()
+        if self.journal:
+            self.journal.start()
+
+    def stop(self):
+        self.account.stop()
+        if self.journal:
+            self.journal.stop()
+
+    def _journal_result(self, res, symbol, side, qty, price, order_type, ref_price, strategy, order_id, signal_ts):
+        if not self.journal:
+            return
+        ok = bool(res) and res.get('rt_cd') == '0'
+        output = (res or {}).get('output') or {}
+        broker_order_no = output.get('ODNO') if isinstance(output, dict) else None
+        if ok and broker_order_no:
+            self._order_tags[broker_order_no] = (strategy, order_id)
+        self.journal.record(
+            trade_journal.ORDER_ACK if ok else trade_journal.ORDER_FAIL,
+            symbol=symbol, side=side, qty=qty, price=price or ref_price or 0, order_type=order_type,
+            strategy=strategy, status=(res or {}).get('rt_cd'), message=(res or {}).get('msg1', 'Unknown'),
+            order_id=order_id, broker_order_no=broker_order_no,
+            latency_ms=round((time.time() - signal_ts) * 1000, 2) if signal_ts else None
+        )
+
+    def _journal_fill(self, symbol, side, qty, price, broker_order_no):
+        strategy, order_id = self._order_tags.get(broker_order_no, (None, None))
+        self.journal.record(
+            trade_journal.FILL, symbol=symbol, side=side, qty=qty, price=price, strategy=strategy,
+            order_id=order_id, broker_order_no=broker_order_no
+        )
+        logger.info(f"[FILL] {side} {symbol}, Qty: {qty}, Price: {price:.0f}, Order: {broker_order_no}")
 
-    def buy_stock(self, symbol, qty, price=0, order_type="01"):
+    def buy_stock(self, symbol, qty, price=0, order_type="01", ref_price=None, strategy=None, order_id=None,
+                  signal_ts=None):
         """
         Safely execute a Buy Order.
         Default is Market Order (01), price=0.
+        ref_price: expected fill for market orders (optimistic cash update).
+        strategy / order_id: tags for the trade journal.
+        signal_ts: time.time() of the signal, journaled as signal -> ack latency.
         """
-        # 1. Check Cash Balance (Simple check, can be improved)
-        balance = self.kis.get_balance()
-        if not balance:
+        # 1. Check Cash Balance (in-memory account snapshot)
+        if not self.account.ensure_loaded():
             logger.error("Failed to fetch balance before buying.")
             return None
-        
-        deposit = float(balance['output2'][0]['dnca_tot_amt'])
+
+        deposit = self.account.get_cash()
         est_cost = price * qty if price > 0 else 0 # Can't check market order cost exactly upfront without current price
-        
+
         if est_cost > deposit:
             logger.warning(f"Insufficient funds. Cash: {deposit}, Cost: {est_cost}")
             # return None # Strict check disabled for now as market order price is unknown here
 
         # 2. Place Order
         res = self.kis.place_order(symbol, qty, price, order_type, buy_sell="BUY")
-        
+        self._journal_result(res, symbol, "BUY", qty, price, order_type, ref_price, strategy, order_id, signal_ts)
+
         if res and res['rt_cd'] == '0':
+            self.account.apply_order(symbol, "BUY", qty, price or ref_price or 0)
             logger.info(f"[BUY SUCCESS] {symbol}, Qty: {qty}, Price: {price}, Msg: {res['msg1']}")
             return res
         else:
             logger.error(f"[BUY FAIL] {symbol}, Qty: {qty}, Msg: {res['msg1'] if res else 'Unknown'}")
             return res
 
-    def sell_stock(self, symbol, qty, price=0, order_type="01"):
+    def sell_stock(self, symbol, qty, price=0, order_type="01", ref_price=None, strategy=None, order_id=None,
+                   signal_ts=None):
         """
         Safely execute a Sell Order.
+        ref_price: expected fill for market orders (optimistic cash update).
+        strategy / order_id: tags for the trade journal.
+        signal_ts: time.time() of the signal, journaled as signal -> ack latency.
         """
-        # 1. Check Holdings
-        balance = self.kis.get_balance()
-        if not balance:
+        # 1. Check Holdings (in-memory account snapshot)
+        if not self.account.ensure_loaded():
             logger.error("Failed to fetch holdings before selling.")
             return None
-            
-        holdings = balance['output1']
-        current_qty = 0
-        for h in holdings:
-            if h['pdno'] == symbol:
-                current_qty = int(h['hldg_qty'])
-                break
-        
+
+        current_qty = self.account.get_qty(symbol)
+
         if current_qty < qty:
             logger.warning(f"Insufficient holdings. Owned: {current_qty}, Selling: {qty}")
             return None
 
         # 2. Place Order
         res = self.kis.place_order(symbol, qty, price, order_type, buy_sell="SELL")
-        
+        self._journal_result(res, symbol, "SELL", qty, price, order_type, ref_price, strategy, order_id, signal_ts)
+
         if res and res['rt_cd'] == '0':
+            self.account.apply_order(symbol, "SELL", qty, price or ref_price or 0)
             logger.info(f"[SELL SUCCESS] {symbol}, Qty: {qty}, Price: {price}, Msg: {res['msg1']}")
             return res
         else:
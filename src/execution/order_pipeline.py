@@ -0,0 +1,196 @@
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.execution.account_state import AccountState
+from src.execution import trade_journal
+
+logger = logging.getLogger("OrderPipeline")
+
+
+class OrderRequest:
+    """
+    One order from a signal.
+    ref_price: price the signal fired at, used to size notional for market orders.
+    signal_ts: time.time() when the signal fired (latency is measured from here).
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, symbol, side, qty, price=0, order_type="01", ref_price=None, strategy=None, signal_ts=None):
+        self.order_id = next(self._ids)
+        self.symbol = symbol
+        self.side = side # "BUY" | "SELL"
+        self.qty = int(qty)
+        self.price = price
+        self.order_type = order_type
+        self.ref_price = ref_price if ref_price is not None else price
+        self.strategy = strategy
+        self.signal_ts = signal_ts or time.time()
+
+        self.status = "NEW" # NEW -> REJECTED | SENT -> ACKED | FAILED
+        self.reason = None
+        self.response = None
+        self.ack_ts = None
+
+    @property
+    def notional(self):
+        return (self.ref_price or 0) * self.qty
+
+    def latency_ms(self):
+        return (self.ack_ts - self.signal_ts) * 1000 if self.ack_ts else None
+
+    def __repr__(self):
+        return f"OrderRequest#{self.order_id}({self.side} {self.symbol} x{self.qty} @{self.ref_price}, {self.status})"
+
+
+class RiskEngine:
+    """
+    In-memory pre-trade checks against the cached AccountState plus
+    reservations for orders already in flight:
+    - cash (BUY notional vs cash not yet reserved)
+    - max position qty per symbol
+    - max notional per symbol
+    - duplicate suppression (same symbol/side within dedup_window_sec)
+    Limits set to None are not enforced.
+    """
+
+    def __init__(self, account: AccountState, max_position_qty=None, max_notional_per_symbol=None, dedup_window_sec=60):
+        self.account = account
+        self.max_position_qty = max_position_qty
+        self.max_notional_per_symbol = max_notional_per_symbol
+        self.dedup_window_sec = dedup_window_sec
+
+        self._lock = threading.Lock()
+        self._reserved_cash = 0.0
+        self._pending_qty = {} # {symbol: qty} of in-flight BUYs
+        self._last_seen = {} # {(symbol, side): ts}
+
+    def check(self, order: OrderRequest):
+        """Returns (ok, reason). On success the order's cash/qty is reserved."""
+        if not self.account.ensure_loaded():
+            return False, "Account snapshot unavailable"
+        with self._lock:
+            key = (order.symbol, order.side)
+            last = self._last_seen.get(key)
+            if last is not None and order.signal_ts - last < self.dedup_window_sec:
+                return False, f"Duplicate {order.side} for {order.symbol} within {self.dedup_window_sec}s"
+
+            if order.side == "BUY":
+                held = self.account.get_qty(order.symbol) + self._pending_qty.get(order.symbol, 0)
+                available = self.account.get_cash() - self._reserved_cash
+
+                if order.notional > available:
+                    return False, f"Insufficient cash: need {order.notional:,.0f}, available {available:,.0f}"
+                if self.max_position_qty is not None and held + order.qty > self.max_position_qty:
+                    return False, f"Position limit: {held} + {order.qty} > {self.max_position_qty}"
+                if self.max_notional_per_symbol is not None and order.ref_price and \
+                        (held + order.qty) * order.ref_price > self.max_notional_per_symbol:
+                    return False, f"Max notional for {order.symbol} exceeded ({self.max_notional_per_symbol:,.0f})"
+
+                self._reserved_cash += order.notional
+                self._pending_qty[order.symbol] = self._pending_qty.get(order.symbol, 0) + order.qty
+            else:
+                if self.account.get_qty(order.symbol) < order.qty:
+                    return False, f"Insufficient holdings for {order.symbol}"
+
+            self._last_seen[key] = order.signal_ts
+            return True, None
+
+    def release(self, order: OrderRequest):
+        """Drop the reservation once the order is acked (account updated) or failed."""
+        if order.side != "BUY":
+            return
+        with self._lock:
+            self._reserved_cash = max(0.0, self._reserved_cash - order.notional)
+            left = self._pending_qty.get(order.symbol, 0) - order.qty
+            if left > 0:
+                self._pending_qty[order.symbol] = left
+            else:
+                self._pending_qty.pop(order.symbol, None)
+
+
+class OrderPipeline:
+    """
+    Queues orders, runs RiskEngine checks in memory on the caller's thread,
+    and dispatches accepted orders concurrently through OrderManager on a
+    worker pool (KisApi's trading bucket keeps them within the KIS quota).
+    Tracks signal -> acknowledgement latency per order.
+    """
+
+    def __init__(self, order_manager, risk: RiskEngine, max_workers=4, history=1000):
+        self.order_manager = order_manager
+        self.risk = risk
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order")
+        self._lock = threading.Lock()
+        self.orders = deque(maxlen=history) # Recent OrderRequests
+        self.counts = {"submitted": 0, "rejected": 0, "acked": 0, "failed": 0}
+
+    def submit(self, order: OrderRequest):
+        """Returns a Future resolving to the OrderRequest, or None if rejected."""
+        with self._lock:
+            self.counts["submitted"] += 1
+            self.orders.append(order)
+
+        ok, reason = self.risk.check(order)
+        if not ok:
+            order.status = "REJECTED"
+            order.reason = reason
+            with self._lock:
+                self.counts["rejected"] += 1
+            logger.warning(f"[RISK REJECT] {order}: {reason}")
+            journal = getattr(self.order_manager, "journal", None)
+            if journal:
+                journal.record(
+                    trade_journal.ORDER_REJECT, symbol=order.symbol, side=order.side, qty=order.qty,
+                    price=order.ref_price, order_type=order.order_type, strategy=order.strategy,
+                    status="REJECTED", message=reason, order_id=order.order_id
+                )
+            return None
+
+        order.status = "SENT"
+        return self._executor.submit(self._dispatch, order)
+
+    def submit_many(self, orders):
+        return [self.submit(order) for order in orders]
+
+    def _dispatch(self, order: OrderRequest):
+        try:
+            if order.side == "BUY":
+                res = self.order_manager.buy_stock(order.symbol, order.qty, order.price, order.order_type, ref_price=order.ref_price,
+                                                   strategy=order.strategy, order_id=order.order_id, signal_ts=order.signal_ts)
+            else:
+                res = self.order_manager.sell_stock(order.symbol, order.qty, order.price, order.order_type, ref_price=order.ref_price,
+                                                    strategy=order.strategy, order_id=order.order_id, signal_ts=order.signal_ts)
+            order.ack_ts = time.time()
+            order.response = res
+            order.status = "ACKED" if res and res.get('rt_cd') == '0' else "FAILED"
+        except Exception as e:
+            order.ack_ts = time.time()
+            order.status = "FAILED"
+            order.reason = str(e)
+            logger.error(f"Order dispatch failed {order}: {e}")
+        finally:
+            self.risk.release(order)
+
+        with self._lock:
+            self.counts["acked" if order.status == "ACKED" else "failed"] += 1
+        return order
+
+    def get_stats(self):
+        with self._lock:
+            latencies = sorted(o.latency_ms() for o in self.orders if o.ack_ts)
+            counts = dict(self.counts)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2) if latencies else None
+
+        return {
+            **counts,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": round(latencies[-1], 2) if latencies else None}
+        }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
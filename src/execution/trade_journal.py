@@ -0,0 +1,209 @@
+import os
+import queue
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger("TradeJournal")
+
+# Kept in its own DB file (WAL, append-only), apart from the market data.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trade_journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    event TEXT NOT NULL,
+    order_id TEXT,
+    broker_order_no TEXT,
+    symbol TEXT,
+    side TEXT,
+    qty INTEGER,
+    price REAL,
+    order_type TEXT,
+    strategy TEXT,
+    status TEXT,
+    message TEXT,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_journal_date ON trade_journal (trade_date);
+CREATE INDEX IF NOT EXISTS idx_journal_symbol ON trade_journal (symbol, trade_date);
+CREATE INDEX IF NOT EXISTS idx_journal_strategy ON trade_journal (strategy, trade_date);
+"""
+
+COLUMNS = [
+    "ts", "trade_date", "event", "order_id", "broker_order_no", "symbol", "side", "qty",
+    "price", "order_type", "strategy", "status", "message", "latency_ms"
+]
+
+# Event types
+ORDER_ACK = "ORDER_ACK"       # Broker accepted the order (rt_cd == '0')
+ORDER_FAIL = "ORDER_FAIL"     # Broker rejected / request failed
+ORDER_REJECT = "ORDER_REJECT" # Pre-trade risk rejected, never sent
+FILL = "FILL"                 # Execution, from the daily execution inquiry (AccountState reconcile)
+
+
+class TradeJournal:
+    """
+    Structured order/fill journal in SQLite.
+
+    record() only appends to an in-memory queue; a background writer flushes
+    batches (every flush_interval seconds or batch_size records), so journaling
+    never sits on the order path. Queries by date / symbol / strategy are
+    index-backed, and daily_pnl() summarizes cash flows per symbol.
+    """
+
+    def __init__(self, db_path="data/trade_journal.db", flush_interval=1.0, batch_size=200):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = self._get_connection()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL") # Readers don't block the writer
+        return conn
+
+    def record(self, event, symbol=None, side=None, qty=None, price=None, order_type=None,
+               strategy=None, status=None, message=None, order_id=None, broker_order_no=None, latency_ms=None):
+        now = datetime.now()
+        self._queue.put((
+            now.isoformat(timespec='milliseconds'), now.strftime("%Y%m%d"), event,
+            None if order_id is None else str(order_id), broker_order_no, symbol, side,
+            None if qty is None else int(qty), None if price is None else float(price),
+            order_type, strategy, status, message, latency_ms
+        ))
+
+    # --- Background writer ---
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._writer_loop, name="TradeJournalWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the writer and flush whatever is still buffered."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(5)
+        self.flush()
+
+    def _writer_loop(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write buffered records in batches. Safe to call from any thread."""
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+
+            try:
+                conn = self._get_connection()
+                try:
+                    conn.executemany(
+                        f"INSERT INTO trade_journal ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                        batch
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+                self.written += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.error(f"Failed to write {len(batch)} journal records: {e}")
+
+    # --- Queries ---
+
+    def query(self, start_date=None, end_date=None, symbol=None, strategy=None, event=None):
+        """
+        Dates are 'YYYYMMDD' (inclusive). Returns a DataFrame ordered by time.
+        """
+        sql = f"SELECT id, {', '.join(COLUMNS)} FROM trade_journal WHERE 1=1"
+        params = []
+        if start_date:
+            sql += " AND trade_date >= ?"
+            params.append(start_date)
+        if end_date:
+            sql += " AND trade_date <= ?"
+            params.append(end_date)
+        if symbol:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        if strategy:
+            sql += " AND strategy = ?"
+            params.append(strategy)
+        if event:
+            sql += " AND event = ?"
+            params.append(event)
+        sql += " ORDER BY ts, id"
+
+        conn = self._get_connection()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+    def fill_totals(self, trade_date):
+        """{broker_order_no: (qty, amount)} of the FILL rows journaled on trade_date."""
+        self.flush()
+        conn = self._get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT broker_order_no, SUM(qty), SUM(qty * price) FROM trade_journal "
+                "WHERE trade_date = ? AND event = ? AND broker_order_no IS NOT NULL GROUP BY broker_order_no",
+                (trade_date, FILL)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {odno: (int(qty), float(amount)) for odno, qty, amount in rows}
+
+    def daily_pnl(self, trade_date, strategy=None, events=(FILL, ORDER_ACK)):
+        """
+        Per-symbol cash flow for one day, for reconciliation with the broker.
+        Uses FILL rows when present for a symbol, otherwise acknowledged orders
+        (priced at their limit / reference price).
+        Returns DataFrame indexed by symbol:
+        ['buy_qty', 'buy_amount', 'sell_qty', 'sell_amount', 'net_cash'].
+        """
+        df = self.query(start_date=trade_date, end_date=trade_date, strategy=strategy)
+        df = df[df['event'].isin(events)]
+        if df.empty:
+            return pd.DataFrame(columns=['buy_qty', 'buy_amount', 'sell_qty', 'sell_amount', 'net_cash'])
+
+        has_fill = df[df['event'] == FILL]['symbol'].unique()
+        df = df[(df['event'] == FILL) | ~df['symbol'].isin(has_fill)]
+
+        df = df.assign(amount=df['qty'] * df['price'].fillna(0))
+        buys = df[df['side'] == 'BUY'].groupby('symbol')[['qty', 'amount']].sum()
+        sells = df[df['side'] == 'SELL'].groupby('symbol')[['qty', 'amount']].sum()
+
+        result = pd.DataFrame({
+            'buy_qty': buys['qty'],
+            'buy_amount': buys['amount'],
+            'sell_qty': sells['qty'],
+            'sell_amount': sells['amount'],
+        }).fillna(0)
+        result['net_cash'] = result['sell_amount'] - result['buy_amount']
+        return result
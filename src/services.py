@@ -0,0 +1,79 @@
+import os
+import threading
+
+import yaml
+
+CONFIG_PATH = "config/settings.yaml"
+
+# Shared services, created on first use instead of at import time:
+# importing the web app no longer reads settings.yaml, authenticates
+# against KIS (/oauth2/tokenP) or runs the schema script.
+_services = {}
+_lock = threading.RLock() # Re-entrant: the collector factory asks for kis/db
+
+
+def _get(name, factory):
+    service = _services.get(name)
+    if service is None:
+        with _lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = factory()
+    return service
+
+
+def _load_config():
+    # The KIS client's copy once it exists, so both always agree
+    if 'kis' in _services:
+        return _services['kis'].config
+    if not os.path.exists(CONFIG_PATH):
+        print(f"{CONFIG_PATH} not found; running with default settings.")
+        return {}
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_config():
+    """settings.yaml as a dict, without creating the KIS client."""
+    return _get('config', _load_config)
+
+
+def get_kis():
+    from src.api.kis import KisApi
+    return _get('kis', lambda: KisApi(CONFIG_PATH))
+
+
+def get_db():
+    from src.database.db_manager import DatabaseManager
+    return _get('db', DatabaseManager)
+
+
+def get_collector():
+    from src.core.collector import MarketDataCollector
+    return _get('collector', lambda: MarketDataCollector(get_kis(), get_db()))
+
+
+def get_jobs():
+    """Worker pool for backtests/screens (the processes themselves start on the first submit)."""
+    from src.web.jobs import JobManager
+
+    def create():
+        jobs_conf = get_config().get('jobs', {}) or {}
+        return JobManager(
+            max_workers=jobs_conf.get('max_workers', 2),
+            max_queued=jobs_conf.get('max_queued', 20),
+            mp_context=jobs_conf.get('mp_context', 'spawn'),
+            progress_interval=jobs_conf.get('progress_interval_sec', 0.5)
+        )
+    return _get('jobs', create)
+
+
+def get_master_loader():
+    from src.utils.market_loader import MarketLoader
+    master_conf = get_config().get('stock_master', {}) or {}
+    return _get('master_loader', lambda: MarketLoader(max_workers=master_conf.get('max_workers', 5)))
+
+
+def is_created(name):
+    """True once a service exists (e.g. to skip shutdown of one never used)."""
+    return name in _services
@@ -1,6 +1,16 @@
+import pandas as pd
 from src.strategies.base import Strategy
 from src.strategies.utils import calculate_sma
 
+def compute_breakout_offsets(prev_bars: pd.DataFrame, k) -> pd.Series:
+    """
+    Vectorized target offset for a whole watchlist.
+    prev_bars: previous day's bar per symbol (index=symbol, columns 'high', 'low').
+    k: scalar or per-symbol Series.
+    Target price = today's open + offset, offset = (prev high - prev low) * k.
+    """
+    return ((prev_bars['high'] - prev_bars['low']) * k).dropna()
+
 class VolatilityBreakoutStrategy(Strategy):
     def __init__(self, k=0.5):
         self.k = k
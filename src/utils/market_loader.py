@@ -1,54 +1,191 @@
-import FinanceDataReader as fdr
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
 import pandas as pd
 
+MASTER_COLUMNS = ['code_short', 'name_kr', 'market', 'sector', 'market_cap']
+
+# (listing, code column, market label, extra _normalize kwargs), in merge priority order:
+# a code listed twice keeps the first listing's row (KRX before US, S&P500 before NASDAQ/NYSE).
+LISTINGS = [
+    ('KRX', 'Code', 'KRX', {'cap_col': 'Marcap', 'market_col': 'Market'}),
+    ('S&P500', 'Symbol', 'S&P500', {'sector_col': 'Sector'}),
+    ('NASDAQ', 'Symbol', 'NASDAQ', {'sector_col': 'Industry'}), # NASDAQ
+    ('NYSE', 'Symbol', 'NYSE', {'sector_col': 'Industry'}), # New York Stock Exchange
+    ('ETF/US', 'Symbol', 'ETF/US', {}), # US ETFs
+]
+
+SNAPSHOT_PATH = "data/cache/stock_master.parquet"
+
+
+def load_fdr_listing(listing):
+    import FinanceDataReader as fdr
+    return fdr.StockListing(listing)
+
+
+def _normalize(df, code_col, market, sector_col=None, cap_col=None, market_col=None):
+    """Listing -> MASTER_COLUMNS. Optional columns are None when the listing lacks them."""
+    out = pd.DataFrame({
+        'code_short': df[code_col].astype(str),
+        'name_kr': df['Name'],
+    })
+    out['market'] = df[market_col] if market_col and market_col in df else market
+    out['sector'] = df[sector_col] if sector_col and sector_col in df else None
+    out['market_cap'] = pd.to_numeric(df[cap_col], errors='coerce') if cap_col and cap_col in df else None
+    return out[MASTER_COLUMNS]
+
+
 class MarketLoader:
+    """
+    Stock master download (FinanceDataReader) and incremental refresh.
+
+    - The five listings are downloaded concurrently; a failed listing is
+      skipped (and its codes are never deleted) instead of failing the refresh.
+    - refresh() diffs the download against stock_master and writes only new,
+      delisted and changed rows (name / market / sector, or a market cap move
+      beyond cap_tolerance).
+    - Every successful download is kept as a Parquet snapshot, used to seed
+      an empty master when the network is unavailable.
+    """
+
+    def __init__(self, max_workers=5, snapshot_path=SNAPSHOT_PATH, cap_tolerance=0.2, listing_loader=load_fdr_listing):
+        self.max_workers = max_workers
+        self.snapshot_path = snapshot_path
+        self.cap_tolerance = cap_tolerance
+        self.listing_loader = listing_loader
+        self.failures = {} # {listing: reason} from the last download
+        self.markets = set() # Market labels covered by the last successful listings
+
+    def _download(self, listing, code_col, market, kwargs):
+        started = time.perf_counter()
+        df = _normalize(self.listing_loader(listing), code_col, market, **kwargs)
+        print(f"{listing} downloaded: {len(df)} ({time.perf_counter() - started:.1f}s)")
+        return df
+
     def download_and_parse(self):
         """
         Download stock master data using FinanceDataReader.
-        Returns a DataFrame with columns ['code_short', 'name_kr'].
-        Target: KRX (KOSPI + KOSDAQ + KONEX) + S&P500 + NASDAQ
+        Returns a DataFrame with columns ['code_short', 'name_kr', 'market', 'sector', 'market_cap'].
+        Target: KRX (KOSPI + KOSDAQ + KONEX) + S&P500 + NASDAQ + NYSE + US ETFs
+        market: KOSPI / KOSDAQ / KONEX (per listing), 'S&P500', 'NASDAQ', 'NYSE', 'ETF/US'.
+        market_cap is only in the KRX listing (KRW); US caps come from the fundamentals table.
+        Listings that fail are left out (see self.failures); empty if all fail.
         """
-        print("Downloading stock master data from KRX, S&P500, NASDAQ via FinanceDataReader...")
+        print("Downloading stock master data from KRX, S&P500, NASDAQ, NYSE, ETF/US via FinanceDataReader...")
+        self.failures = {}
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="listing") as executor:
+            futures = {
+                listing: executor.submit(self._download, listing, code_col, market, kwargs)
+                for listing, code_col, market, kwargs in LISTINGS
+            }
+            for listing, future in futures.items():
+                try:
+                    frames[listing] = future.result()
+                except Exception as e:
+                    self.failures[listing] = str(e) or e.__class__.__name__
+                    print(f"Error downloading {listing} listing: {e}")
+
+        if not frames:
+            self.markets = set()
+            return pd.DataFrame(columns=MASTER_COLUMNS)
+
+        # Merge in LISTINGS order and drop duplicates
+        result_df = pd.concat([frames[listing] for listing, *_ in LISTINGS if listing in frames], ignore_index=True)
+        self.markets = set(result_df['market'].dropna())
+        result_df.drop_duplicates(subset=['code_short'], inplace=True)
+
+        print(f"Total Master Data: {len(result_df)} records.")
+        return result_df.reset_index(drop=True)
+
+    def save_snapshot(self, df):
         try:
-            # 1. KRX
-            df_krx = fdr.StockListing('KRX')
-            df_krx['Code'] = df_krx['Code'].astype(str)
-            df_krx = df_krx[['Code', 'Name']].copy()
-            df_krx.columns = ['code_short', 'name_kr']
-            print(f"KRX downloaded: {len(df_krx)}")
-
-            # 2. S&P500
-            df_sp500 = fdr.StockListing('S&P500')
-            df_sp500 = df_sp500[['Symbol', 'Name']].copy()
-            df_sp500.columns = ['code_short', 'name_kr']
-            print(f"S&P500 downloaded: {len(df_sp500)}")
-
-            # 3. NASDAQ
-            df_nasdaq = fdr.StockListing('NASDAQ')
-            df_nasdaq = df_nasdaq[['Symbol', 'Name']].copy()
-            df_nasdaq.columns = ['code_short', 'name_kr']
-            print(f"NASDAQ downloaded: {len(df_nasdaq)}")
-
-            # 4. NYSE (New York Stock Exchange)
-            df_nyse = fdr.StockListing('NYSE')
-            df_nyse = df_nyse[['Symbol', 'Name']].copy()
-            df_nyse.columns = ['code_short', 'name_kr']
-            print(f"NYSE downloaded: {len(df_nyse)}")
-
-            # 5. US ETFs
-            df_etf_us = fdr.StockListing('ETF/US')
-            df_etf_us = df_etf_us[['Symbol', 'Name']].copy()
-            df_etf_us.columns = ['code_short', 'name_kr']
-            print(f"US ETFs downloaded: {len(df_etf_us)}")
-
-            # Merge and drop duplicates
-            result_df = pd.concat([df_krx, df_sp500, df_nasdaq, df_nyse, df_etf_us], ignore_index=True)
-            result_df.drop_duplicates(subset=['code_short'], inplace=True)
-            
-            print(f"Total Master Data: {len(result_df)} records.")
-            return result_df
-            
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            df.to_parquet(self.snapshot_path, index=False)
         except Exception as e:
-            print(f"Error downloading stock master data: {e}")
-            return pd.DataFrame()
+            print(f"Failed to write stock master snapshot: {e}")
+
+    def load_snapshot(self):
+        """Last downloaded master (MASTER_COLUMNS), or an empty frame."""
+        if not os.path.exists(self.snapshot_path):
+            return pd.DataFrame(columns=MASTER_COLUMNS)
+        try:
+            return pd.read_parquet(self.snapshot_path)
+        except Exception as e:
+            print(f"Failed to read stock master snapshot: {e}")
+            return pd.DataFrame(columns=MASTER_COLUMNS)
+
+    def snapshot_age_days(self):
+        if not os.path.exists(self.snapshot_path):
+            return None
+        return (time.time() - os.path.getmtime(self.snapshot_path)) / 86400
+
+    def diff(self, current, new, full=True):
+        """
+        current: get_stock_master() frame; new: download_and_parse() frame.
+        Returns (upserts in MASTER_COLUMNS, codes to delete, inserted count, updated count).
+        full=False (some listings failed): only delete codes in markets that were downloaded.
+        """
+        new = new.rename(columns={'code_short': 'code', 'name_kr': 'name'}).set_index('code')
+        current = current.set_index('code')
+
+        inserts = new.index.difference(current.index)
+        common = new.index.intersection(current.index)
+        old, fresh = current.loc[common], new.loc[common]
+
+        def changed(col):
+            a, b = old[col], fresh[col]
+            return ~((a == b) | (a.isna() & b.isna()))
+
+        old_cap = pd.to_numeric(old['market_cap'], errors='coerce')
+        new_cap = pd.to_numeric(fresh['market_cap'], errors='coerce')
+        cap_moved = (new_cap.notna() & old_cap.isna()) | ((new_cap - old_cap).abs() > self.cap_tolerance * old_cap.abs())
+        updates = common[(changed('name') | changed('market') | changed('sector') | cap_moved).values]
+
+        gone = current.index.difference(new.index)
+        if not full:
+            gone = gone[current.loc[gone, 'market'].isin(self.markets).values]
+
+        upserts = new.loc[inserts.append(updates)].reset_index()
+        upserts = upserts.rename(columns={'code': 'code_short', 'name': 'name_kr'})[MASTER_COLUMNS]
+        return upserts, list(gone), len(inserts), len(updates)
+
+    def refresh(self, db):
+        """
+        Download, diff against stock_master and apply only the changes.
+        Falls back to the local snapshot when every listing fails.
+        Returns stats {'source', 'downloaded', 'failed_listings', 'inserted', 'updated', 'deleted', 'elapsed_sec'}.
+        """
+        started = time.perf_counter()
+        new = self.download_and_parse()
+        source = 'network'
+        full = not self.failures
+        if new.empty:
+            new = self.load_snapshot()
+            source = 'snapshot' if not new.empty else None
+            full = False
+            self.markets = set() # Never delete on a snapshot fallback
+        elif full:
+            self.save_snapshot(new)
+
+        stats = {'source': source, 'downloaded': len(new), 'failed_listings': dict(self.failures),
+                 'inserted': 0, 'updated': 0, 'deleted': 0}
+        if not new.empty:
+            upserts, deletes, stats['inserted'], stats['updated'] = self.diff(db.get_stock_master(), new, full=full)
+            stats['deleted'] = len(deletes)
+            if not upserts.empty or deletes:
+                db.apply_stock_master_changes(upserts, deletes)
+        stats['elapsed_sec'] = round(time.perf_counter() - started, 2)
+        stats['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        print(f"Stock master refresh: {stats}")
+        return stats
 
+    def seed_from_snapshot(self, db):
+        """Fill an empty stock_master from the local snapshot (offline starts). Returns rows written."""
+        df = self.load_snapshot()
+        if df.empty:
+            return 0
+        db.save_stock_master(df)
+        return len(df)
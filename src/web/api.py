@@ -0,0 +1,227 @@
+from fastapi import APIRouter, Request, Query
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from collections import OrderedDict
+import asyncio
+import gzip
+import json
+import threading
+
+# Backtest/analysis modules are imported inside the endpoints that use them,
+# so importing the API stays cheap
+from src.web.jobs import QueueFullError, DONE
+from src.services import get_config, get_db, get_jobs
+
+# Versioned JSON API for notebooks/scripts. Same job pool as the HTML pages:
+# submit -> poll /jobs/{job_id} -> fetch results. Curves and trade logs come
+# back columnar (one array per column), as Arrow IPC or (gzip'd) JSON arrays.
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+BACKTEST_KINDS = ("backtest", "xs_backtest")
+# Large result fields served by their own endpoints, not inside the job view
+COLUMNAR_FIELDS = ("equity_curve", "trades")
+
+# Downsampled chart series per (job_id, points, method). Finished results never
+# change, so entries only leave the cache when it is full (oldest first).
+CHART_CACHE_SIZE = 256
+_chart_cache = OrderedDict()
+_chart_lock = threading.Lock()
+
+
+class BacktestRequest(BaseModel):
+    symbol: str
+    mode: Literal["lump", "dca", "algo"] = "lump"
+    strategy_name: Optional[str] = None # algo mode: 'ma_crossover', else volatility breakout
+    initial_capital: float = 10000
+    monthly_deposit: float = 0
+
+
+class BacktestBatchRequest(BaseModel):
+    backtests: List[BacktestRequest] = Field(..., min_length=1)
+
+
+class ScreenRequest(BaseModel):
+    strategy: str
+    universe: str = "large_cap"
+    top_n: int = 30
+    refresh: bool = False # True: always run, even when a stored snapshot exists
+
+
+def _error(status_code, message, **extra):
+    return JSONResponse({"error": message, **extra}, status_code=status_code)
+
+
+def _submit_backtest(spec: BacktestRequest):
+    from src.core.backtest_runner import run_backtest_job
+    return get_jobs().submit(
+        "backtest", run_backtest_job, db_path=get_db().db_path, report_progress=True, **spec.model_dump()
+    )
+
+
+def _job_view(job):
+    """Job status with its result, minus the columnar fields (linked instead)."""
+    result = job.get("result")
+    if isinstance(result, dict):
+        job["result"] = {k: v for k, v in result.items() if k not in COLUMNAR_FIELDS}
+        if job["kind"] in BACKTEST_KINDS:
+            job["links"] = {
+                field: f"{router.prefix}/backtests/{job['job_id']}/{field.split('_')[0]}"
+                for field in COLUMNAR_FIELDS if result.get(field)
+            }
+    return job
+
+
+def encode_columns(request: Request, columns, fmt="json"):
+    """
+    {column: [values]} as an Arrow IPC stream (fmt='arrow', 'date' as date32)
+    or compact JSON arrays, gzip'd when the client accepts it.
+    """
+    if fmt == "arrow":
+        import pyarrow as pa # Deferred: only needed for Arrow responses
+        arrays = {name: pa.array(values) for name, values in columns.items()}
+        if "date" in arrays:
+            arrays["date"] = arrays["date"].cast(pa.timestamp("s")).cast(pa.date32())
+        table = pa.table(arrays)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+    body = json.dumps(columns, separators=(",", ":")).encode("utf-8")
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(gzip.compress(body, compresslevel=6), media_type="application/json",
+                        headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return Response(body, media_type="application/json")
+
+
+@router.post("/backtests", status_code=202)
+async def submit_backtest(spec: BacktestRequest):
+    try:
+        job_id = _submit_backtest(spec)
+    except QueueFullError as e:
+        return _error(429, str(e))
+    return {"job_id": job_id, "status_url": f"{router.prefix}/jobs/{job_id}"}
+
+
+@router.post("/backtests/batch", status_code=202)
+async def submit_backtest_batch(batch: BacktestBatchRequest):
+    """
+    Queue several backtests at once. Each entry is accepted or rejected on its
+    own (queue full): resubmit the rejected ones once earlier jobs finish.
+    """
+    accepted, rejected = [], []
+    for index, spec in enumerate(batch.backtests):
+        try:
+            accepted.append({"index": index, "symbol": spec.symbol, "job_id": _submit_backtest(spec)})
+        except QueueFullError as e:
+            rejected.append({"index": index, "symbol": spec.symbol, "error": str(e)})
+    body = {"accepted": accepted, "rejected": rejected}
+    return body if accepted else JSONResponse(body, status_code=429)
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status, progress and (once DONE) the result of any job: backtest, screen or rebalance backtest."""
+    job = get_jobs().get(job_id)
+    if job is None:
+        return _error(404, f"Unknown or expired job: {job_id}")
+    return _job_view(job)
+
+
+def _backtest_columns(job_id, field):
+    """(columns, None) for a finished backtest job, else (None, error response)."""
+    job = get_jobs().get(job_id)
+    if job is None or job["kind"] not in BACKTEST_KINDS:
+        return None, _error(404, f"Unknown or expired backtest job: {job_id}")
+    if job["status"] != DONE:
+        return None, _error(409, f"Backtest is {job['status']}", status=job["status"])
+    columns = (job["result"] or {}).get(field)
+    if not columns:
+        return None, _error(404, (job["result"] or {}).get("error") or f"No {field} for this backtest")
+    return columns, None
+
+
+@router.get("/backtests/{job_id}/equity")
+async def backtest_equity(request: Request, job_id: str, format: Literal["json", "arrow"] = "json"):
+    """Equity curve columns: date, equity, invested."""
+    columns, error = _backtest_columns(job_id, "equity_curve")
+    return error or encode_columns(request, columns, format)
+
+
+@router.get("/backtests/{job_id}/trades")
+async def backtest_trades(request: Request, job_id: str, format: Literal["json", "arrow"] = "json"):
+    """Trade log columns: date, type, price, qty, fee, tax, profit, reason, ... (None where not applicable)."""
+    columns, error = _backtest_columns(job_id, "trades")
+    return error or encode_columns(request, columns, format)
+
+
+@router.get("/backtests/{job_id}/chart")
+async def backtest_chart(job_id: str, points: int = Query(1000, ge=10, le=10000),
+                         method: Literal["lttb", "minmax"] = "lttb"):
+    """
+    Equity and drawdown series reduced to about `points` points for charting
+    (LTTB or min/max bucketing; drawdown is always min/max so the MDD is kept).
+    Cached per backtest.
+    """
+    from src.core.downsample import downsample_curve
+    key = (job_id, points, method)
+    with _chart_lock:
+        chart = _chart_cache.get(key)
+        if chart is not None:
+            _chart_cache.move_to_end(key)
+            return chart
+    columns, error = _backtest_columns(job_id, "equity_curve")
+    if error:
+        return error
+    chart = await asyncio.to_thread(downsample_curve, columns["date"], columns["equity"], points=points, method=method)
+    with _chart_lock:
+        _chart_cache[key] = chart
+        while len(_chart_cache) > CHART_CACHE_SIZE:
+            _chart_cache.popitem(last=False)
+    return chart
+
+
+@router.get("/screens/{strategy}")
+async def get_screen(strategy: str, universe: str = "large_cap"):
+    """Stored screener snapshot (scheduled after close, or the last on-demand run)."""
+    from src.analysis.screener import load_screen_snapshot
+    presets = (get_config().get("screener", {}) or {}).get("presets")
+    snapshot = load_screen_snapshot(get_db(), strategy, universe, presets)
+    if snapshot is None:
+        return _error(404, f"No current snapshot for {strategy}/{universe}; POST {router.prefix}/screens to run it")
+    return {**snapshot["payload"], "source": snapshot["source"], "top_n": snapshot["top_n"], "snapshot": True}
+
+
+@router.post("/screens")
+async def run_screen(spec: ScreenRequest):
+    """
+    The stored snapshot when it covers top_n (200), otherwise a screen job (202).
+    Only runs of the configured snapshot size replace the stored snapshot.
+    """
+    from src.analysis.screener import run_screen_job, screen_options, load_screen_snapshot, snapshot_top_n
+    from src.analysis.factor_engine import get_presets
+    screener_conf = get_config().get("screener")
+    presets = (screener_conf or {}).get("presets")
+    if spec.strategy not in get_presets(presets):
+        return _error(404, f"Unknown screener preset: {spec.strategy}", presets=list(get_presets(presets)))
+    if not spec.refresh:
+        snapshot = load_screen_snapshot(get_db(), spec.strategy, spec.universe, presets, top_n=spec.top_n)
+        if snapshot is not None:
+            return {**snapshot["payload"], "source": snapshot["source"], "top_n": spec.top_n, "snapshot": True}
+    try:
+        job_id = get_jobs().submit(
+            "screen", run_screen_job, strategy_type=spec.strategy, universe_type=spec.universe, top_n=spec.top_n,
+            db_path=get_db().db_path, snapshot=spec.top_n == snapshot_top_n(screener_conf), source="on_demand",
+            report_progress=True, **screen_options(screener_conf)
+        )
+    except QueueFullError as e:
+        return _error(429, str(e))
+    return JSONResponse({"job_id": job_id, "status_url": f"{router.prefix}/jobs/{job_id}"}, status_code=202)
+
+
+@router.get("/symbols")
+async def search_symbols(q: str = Query(..., min_length=1), limit: int = Query(50, ge=1, le=50)):
+    """Stock master search by name or code: [{'code', 'name'}]."""
+    return {"query": q, "results": get_db().search_stock(q)[:limit]}
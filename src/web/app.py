@@ -1,33 +1,26 @@
 from fastapi import APIRouter, Request, Form, BackgroundTasks
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from datetime import datetime
+import asyncio
+import json
+import threading
 
-from src.api.kis import KisApi
-from src.database.db_manager import DatabaseManager
-from src.core.backtester import Backtester
-from src.core.collector import MarketDataCollector
-from src.strategies.ma_crossover import MovingAverageCrossoverStrategy
-from src.strategies.volatility_breakout import VolatilityBreakoutStrategy
-from src.strategies.buy_and_hold import BuyAndHoldStrategy
-from src.strategies.dca import BasicDCAStrategy, DynamicDCAStrategy
-from src.strategies.dca import BasicDCAStrategy, DynamicDCAStrategy
-from src.utils.market_loader import MarketLoader
-
-
+from src.web.jobs import QueueFullError, QUEUED, RUNNING, FAILED
+from src.services import get_config, get_kis, get_db, get_jobs, get_master_loader
 
 router = APIRouter(prefix="/web")
 templates = Jinja2Templates(directory="src/web/templates")
 
-# Initialize shared resources (Quick & dirty singleton)
-kis = KisApi()
-db = DatabaseManager()
-collector = MarketDataCollector(kis, db)
+# Shared resources (KIS client, DB, worker pool) come from src.services,
+# created on first use, and backtest/analysis modules (pandas, every strategy)
+# are imported inside the routes that use them, so importing the app stays cheap
+master_status = {} # Last stock master refresh stats
 
 @router.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     # Fetch real balance
-    balance_data = kis.get_balance()
+    balance_data = get_kis().get_balance()
     
     context = {
         "request": request,
@@ -51,6 +44,26 @@ async def dashboard(request: Request):
 
     return templates.TemplateResponse("index.html", context)
 
+@router.get("/metrics", response_class=JSONResponse)
+async def metrics(request: Request):
+    """
+    Scheduler job metrics (durations, overruns, missed runs, last success)
+    and KIS client stats (latency, rate limiting, quote cache).
+    """
+    scheduler = getattr(request.app.state, "scheduler", None)
+    return {
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "jobs": scheduler.get_metrics() if scheduler else {},
+        "orders": scheduler.pipeline.get_stats() if scheduler else {},
+        "job_queue": get_jobs().get_stats(),
+        "stock_master": master_status,
+        "kis": {
+            "latency": get_kis().get_latency_stats(),
+            "rate_limit": get_kis().get_rate_limit_stats(),
+            "quote_cache": get_kis().get_quote_cache_stats(),
+        }
+    }
+
 @router.get("/backtest", response_class=HTMLResponse)
 async def backtest_page(request: Request):
     return templates.TemplateResponse("backtest.html", {"request": request})
@@ -64,111 +77,113 @@ async def run_backtest(
     initial_capital: float = Form(10000), 
     monthly_deposit: float = Form(0)
 ):
-    # 1. Check Data Availability
-    # If not enough data, try to collect
-    df = db.get_daily_price_optimized(symbol)
-    
-    if len(df) < 60: # Threshold for at least 3 months for decent backtest
-        print(f"Data missing/insufficient for {symbol}. Triggering Auto-Fetch...", flush=True)
-        try:
-            count = collector.collect_historical_data(symbol, years=1)
-            # Fetch again to ensure df is populated
-            df = db.get_daily_price_optimized(symbol)
-            
-            if df.empty:
-                return templates.TemplateResponse("backtest.html", {
-                    "request": request, 
-                    "error": f"데이터 수집 실패: '{symbol}'에 대한 데이터가 없습니다. (종목코드 확인 필요)", 
-                    "symbol": symbol
-                })
-
-            if len(df) < 20:
-                return templates.TemplateResponse("backtest.html", {
-                    "request": request, 
-                    "error": f"데이터 부족: '{symbol}'의 과거 데이터가 너무 적습니다 ({len(df)}일). 최근 상장된 종목일 수 있습니다. (최소 20일 필요)", 
-                    "symbol": symbol
-                })
-                
-        except Exception as e:
-            return templates.TemplateResponse("backtest.html", {
-                "request": request, 
-                "error": f"데이터 수집 중 오류: {str(e)}", 
-                "symbol": symbol
-            })
-
-    # 2. Select Strategy based on Mode
-    strategy = None
-    
-    if mode == "lump":
-        strategy = BuyAndHoldStrategy()
-        monthly_deposit = 0 # Force 0 for lump sum
-    elif mode == "dca":
-        # Default to Basic DCA for now, or could allow sub-selection
-        strategy = BasicDCAStrategy()
-    elif mode == "algo":
-        if strategy_name == "volatility_breakout":
-            strategy = VolatilityBreakoutStrategy(k=0.5)
-        elif strategy_name == "ma_crossover":
-            strategy = MovingAverageCrossoverStrategy(short_window=5, long_window=20, regime_window=60)
-        else:
-            strategy = VolatilityBreakoutStrategy(k=0.5)
-        monthly_deposit = 0 # Force 0 for pure algo
-            
-    if strategy is None:
-         strategy = BuyAndHoldStrategy() # Fallback
-
-    # 3. Run Backtest
-    # Korea: Comm ~0.014%, Tax 0.2%
-    # US: Comm ~0.25% (vary), Tax 0% (Transaction tax is 0, Capital gains is separate)
-    if symbol.isdigit(): # Korean Stock
-        commission_rate = 0.000140527
-        tax_rate = 0.002
-    else: # US Stock
-        commission_rate = 0.0025
-        tax_rate = 0.0
-        
-    backtester = Backtester(db, strategy, commission_rate=commission_rate, tax_rate=tax_rate)
-    
-    summary = backtester.run(symbol, initial_capital=initial_capital, monthly_deposit=monthly_deposit)
-    
-    if not summary:
-         return templates.TemplateResponse("backtest.html", {
-            "request": request, 
-            "error": "Backtest finished with no results (Insufficient history for strategy?)", 
-            "symbol": symbol,
-            "mode": mode,
-            "selected_strategy": strategy_name
-        })
-    
-    return templates.TemplateResponse("backtest.html", {
-        "request": request, 
-        "summary": summary, 
+    from src.core.backtest_runner import run_backtest_job
+    # Runs in the worker pool; the page polls /web/jobs/{job_id} and then loads the result
+    context = {
+        "request": request,
         "symbol": symbol,
         "mode": mode,
         "selected_strategy": strategy_name
-    })
+    }
+    try:
+        context["job_id"] = get_jobs().submit(
+            "backtest", run_backtest_job,
+            symbol=symbol, mode=mode, strategy_name=strategy_name,
+            initial_capital=initial_capital, monthly_deposit=monthly_deposit, db_path=get_db().db_path,
+            report_progress=True
+        )
+    except QueueFullError as e:
+        context["error"] = f"{e}. 잠시 후 다시 시도해주세요."
+    return templates.TemplateResponse("backtest.html", context)
+
+@router.get("/backtest/result/{job_id}", response_class=HTMLResponse)
+async def backtest_result(request: Request, job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None:
+        return templates.TemplateResponse("backtest.html", {"request": request, "error": f"Unknown or expired job: {job_id}"})
+
+    params = job["params"]
+    context = {
+        "request": request,
+        "symbol": params.get("symbol"),
+        "mode": params.get("mode"),
+        "selected_strategy": params.get("strategy_name")
+    }
+    if job["status"] in (QUEUED, RUNNING):
+        context["job_id"] = job_id
+    elif job["status"] == FAILED:
+        context["error"] = f"Backtest failed: {job['error']}"
+    else:
+        context["summary"] = job["result"]["summary"]
+        context["error"] = job["result"]["error"]
+        if job["result"].get("equity_curve"):
+            context["chart_url"] = f"/api/v1/backtests/{job_id}/chart" # Downsampled equity/drawdown
+    return templates.TemplateResponse("backtest.html", context)
+
+@router.get("/jobs", response_class=JSONResponse)
+async def list_jobs():
+    return {"stats": get_jobs().get_stats(), "jobs": get_jobs().recent()}
 
+@router.get("/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """
+    Server-sent events for a job: `progress` (stage, done/total, pct, rate, ETA)
+    whenever the worker reports, then a single `done` with the final status.
+    """
+    async def stream():
+        last_seq = -1
+        while not await request.is_disconnected():
+            state = await asyncio.to_thread(get_jobs().wait_progress, job_id, last_seq, 1.0)
+            if state is None:
+                yield f"event: done\ndata: {json.dumps({'status': 'UNKNOWN'})}\n\n"
+                return
+            status, seq, progress = state
+            if seq != last_seq:
+                last_seq = seq
+                yield f"event: progress\ndata: {json.dumps({'status': status, 'progress': progress})}\n\n"
+            if status not in (QUEUED, RUNNING):
+                yield f"event: done\ndata: {json.dumps({'status': status})}\n\n"
+                return
 
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.get("/jobs/{job_id}", response_class=JSONResponse)
+async def job_status(job_id: str):
+    job = get_jobs().get(job_id, include_result=False)
+    if job is None:
+        return JSONResponse({"error": f"Unknown or expired job: {job_id}"}, status_code=404)
+    return job
+
+def _refresh_master():
+    try:
+        master_status.update(get_master_loader().refresh(get_db()))
+    except Exception as e:
+        print(f"Stock master refresh failed: {e}")
 
 @router.on_event("startup")
 async def check_master_data():
-    """Check if stock master data exists, if not, download it."""
+    """
+    Seed an empty stock master from the local snapshot (offline starts) and
+    refresh it in the background, so startup never waits on the downloads.
+    """
     try:
         # Check if table has data (Quick count)
-        conn = db._get_connection()
+        conn = get_db()._get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT count(*) FROM stock_master")
         count = cursor.fetchone()[0]
         conn.close()
         
-        if count < 5000:
-            print(f"Stock Master DB has {count} records. Downloading Full Master Data (KRX+US)...")
-            loader = MarketLoader()
-            df = loader.download_and_parse()
-            if not df.empty:
-                db.save_stock_master(df)
-            else:
-                print("Warning: Failed to download/parse Stock Master.")
+        if count == 0:
+            count = get_master_loader().seed_from_snapshot(get_db())
+            if count:
+                print(f"Stock Master seeded from local snapshot ({count} records).")
+
+        age = get_master_loader().snapshot_age_days()
+        max_age = (get_config().get('stock_master', {}) or {}).get('max_age_days', 1)
+        if count < 5000 or age is None or age > max_age:
+            print(f"Stock Master DB has {count} records. Refreshing Full Master Data (KRX+US) in the background...")
+            threading.Thread(target=_refresh_master, name="stock-master-refresh", daemon=True).start()
         else:
             print(f"Stock Master DB ready ({count} records).")
             
@@ -179,32 +194,142 @@ async def check_master_data():
 async def search_page(request: Request, q: str = ""):
     results = []
     if q:
-        results = db.search_stock(q)
+        results = get_db().search_stock(q)
         
     return templates.TemplateResponse("search.html", {"request": request, "results": results, "query": q})
 
-@router.get("/analysis/screener", response_class=HTMLResponse)
-async def screener_page(request: Request):
-    return templates.TemplateResponse("screener.html", {"request": request, "results": []})
+def _screener_presets():
+    """{name: label} of built-in + settings.yaml (screener.presets) factor presets."""
+    from src.analysis.factor_engine import get_presets
+    custom = (get_config().get('screener', {}) or {}).get('presets')
+    return {name: spec.get('label') or name for name, spec in get_presets(custom).items()}
 
-@router.post("/analysis/screener/run", response_class=HTMLResponse)
-async def run_screener(request: Request, strategy_type: str = Form(...), universe: str = Form('large_cap')): 
-    from src.analysis.screener import DremanScreener, MagicFormulaScreener
-    
-    results = []
-    
-    if strategy_type == 'magic':
-        screener = MagicFormulaScreener()
-        results = screener.screen(universe_type=universe)
-    else:
-        screener = DremanScreener()
-        results = screener.screen(universe_type=universe)
-        
-    return templates.TemplateResponse("screener.html", {
-        "request": request, 
-        "results": results, 
-        "ran": True, 
+def _screen_context(request, strategy_type=None, universe=None, **extra):
+    from src.analysis.universe import Universe
+    context = {
+        "request": request,
+        "results": [],
+        "universes": Universe(get_db()).definitions(),
+        "presets": _screener_presets(),
         "selected_strategy": strategy_type,
         "selected_universe": universe
+    }
+    context.update(extra)
+    return context
+
+def _show_screen_result(context, result, snapshot=None):
+    context.update({
+        "results": result["results"],
+        "layout": result["layout"],
+        "factors": result["factors"],
+        "failures": result["failures"],
+        "fetch_stats": result["fetch_stats"],
+        "freshness": result["freshness"],
+        "computed_at": result.get("computed_at"),
+        "snapshot": snapshot,
+        "ran": True
     })
+    return context
+
+def _load_screen_snapshot(strategy_type, universe):
+    from src.analysis.screener import load_screen_snapshot, snapshot_top_n
+    screener_conf = get_config().get('screener', {}) or {}
+    return load_screen_snapshot(get_db(), strategy_type, universe, screener_conf.get('presets'),
+                                top_n=snapshot_top_n(screener_conf))
 
+@router.get("/analysis/screener", response_class=HTMLResponse)
+async def screener_page(request: Request, strategy_type: str = 'dreman', universe: str = 'large_cap'):
+    # Latest precomputed snapshot (scheduler after close, or the last on-demand run), if any
+    context = _screen_context(request, strategy_type, universe)
+    snapshot = _load_screen_snapshot(strategy_type, universe)
+    if snapshot:
+        _show_screen_result(context, snapshot["payload"], snapshot)
+    return templates.TemplateResponse("screener.html", context)
+
+@router.post("/analysis/screener/run", response_class=HTMLResponse)
+async def run_screener(request: Request, strategy_type: str = Form(...), universe: str = Form('large_cap'),
+                       refresh: bool = Form(False)):
+    from src.analysis.screener import run_screen_job, screen_options, snapshot_top_n
+    # Serve the stored snapshot instantly; otherwise (or on refresh) run in the worker
+    # pool; the page follows /web/jobs/{job_id}/events and then loads the result
+    context = _screen_context(request, strategy_type, universe)
+    snapshot = None if refresh else _load_screen_snapshot(strategy_type, universe)
+    if snapshot:
+        _show_screen_result(context, snapshot["payload"], snapshot)
+        return templates.TemplateResponse("screener.html", context)
+
+    try:
+        context["job_id"] = get_jobs().submit(
+            "screen", run_screen_job, strategy_type=strategy_type, universe_type=universe,
+            top_n=snapshot_top_n(get_config().get('screener')),
+            db_path=get_db().db_path, snapshot=True, source="on_demand",
+            report_progress=True, **screen_options(get_config().get('screener'))
+        )
+    except QueueFullError as e:
+        context["error"] = f"{e}. 잠시 후 다시 시도해주세요."
+    return templates.TemplateResponse("screener.html", context)
+
+@router.get("/analysis/screener/result/{job_id}", response_class=HTMLResponse)
+async def screener_result(request: Request, job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None:
+        return templates.TemplateResponse("screener.html", {"request": request, "results": [], "error": f"Unknown or expired job: {job_id}"})
+
+    params = job["params"]
+    context = _screen_context(request, params.get("strategy_type"), params.get("universe_type"))
+    if job["status"] in (QUEUED, RUNNING):
+        context["job_id"] = job_id
+    elif job["status"] == FAILED:
+        context["error"] = f"Screening failed: {job['error']}"
+    else:
+        _show_screen_result(context, job["result"])
+    return templates.TemplateResponse("screener.html", context)
+
+@router.post("/analysis/screener/backtest", response_class=HTMLResponse)
+async def run_screener_backtest(
+    request: Request,
+    strategy_type: str = Form(...),
+    universe: str = Form('large_cap'),
+    frequency: str = Form('monthly'),
+    top_n: int = Form(30),
+    start_date: str = Form(None),
+    initial_capital: float = Form(10000)
+):
+    from src.core.backtest_runner import run_cross_sectional_job
+    # Rebalance backtest of a preset over stored fundamentals snapshots, in the worker pool
+    context = _screen_context(
+        request, strategy_type, universe, frequency=frequency, top_n=top_n,
+        start_date=start_date, initial_capital=initial_capital, backtest_job=True
+    )
+    try:
+        context["job_id"] = get_jobs().submit(
+            "xs_backtest", run_cross_sectional_job, strategy_type=strategy_type, universe_type=universe,
+            frequency=frequency, top_n=top_n, start_date=start_date.replace('-', '') if start_date else None,
+            initial_capital=initial_capital, db_path=get_db().db_path,
+            presets=(get_config().get('screener', {}) or {}).get('presets'),
+            report_progress=True
+        )
+    except QueueFullError as e:
+        context["error"] = f"{e}. 잠시 후 다시 시도해주세요."
+    return templates.TemplateResponse("screener.html", context)
+
+@router.get("/analysis/screener/backtest/result/{job_id}", response_class=HTMLResponse)
+async def screener_backtest_result(request: Request, job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None:
+        return templates.TemplateResponse("screener.html", {"request": request, "results": [], "error": f"Unknown or expired job: {job_id}"})
+
+    params = job["params"]
+    context = _screen_context(
+        request, params.get("strategy_type"), params.get("universe_type"), frequency=params.get("frequency"),
+        top_n=params.get("top_n"), initial_capital=params.get("initial_capital"), backtest_job=True
+    )
+    if job["status"] in (QUEUED, RUNNING):
+        context["job_id"] = job_id
+    elif job["status"] == FAILED:
+        context["error"] = f"Backtest failed: {job['error']}"
+    else:
+        context["xs_summary"] = job["result"]["summary"]
+        context["rebalances"] = job["result"]["rebalances"]
+        context["error"] = job["result"]["error"]
+    return templates.TemplateResponse("screener.html", context)
@@ -0,0 +1,284 @@
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from src.core.progress import ProgressReporter
+
+logger = logging.getLogger("JobManager")
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class QueueSink:
+    """Picklable progress sink: forwards a worker's events to the parent's queue."""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+
+    def __call__(self, event):
+        self.queue.put((self.job_id, event))
+
+
+class JobManager:
+    """
+    Runs CPU/IO heavy work (backtests, screens) in a process pool so the
+    uvicorn event loop never blocks.
+
+    - submit() returns a job ID immediately; get() polls status/result.
+    - At most max_workers jobs are handed to the pool at once; the rest wait
+      in an in-process queue (bounded by max_queued), so queue depth and
+      RUNNING status are exact.
+    - The pool is created on first submit, not at import. A worker that dies
+      (crash, OOM kill) breaks the whole pool: the jobs it was running fail and
+      the next submit starts a fresh pool.
+    - func and its arguments must be picklable (module-level functions).
+    - Workers are started with "spawn" by default: forking the server process,
+      which runs scheduler/stream/journal threads, can deadlock a child on a
+      lock held at fork time. mp_context="fork" / "forkserver" opts out.
+    - report_progress=True passes func a `progress` ProgressReporter whose
+      events come back through a multiprocessing Manager queue; the latest
+      event is kept on the job (see wait_progress()).
+    """
+
+    def __init__(self, max_workers=2, max_queued=20, history=200, mp_context="spawn", progress_interval=0.5):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.history = history
+        self.mp_context = mp_context or "spawn"
+        self.progress_interval = progress_interval
+
+        self._mp_manager = None
+        self._progress_queue = None
+        self._progress_thread = None
+        self._changed = threading.Condition()
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict() # {job_id: job dict}, oldest first
+        self._pending = deque() # job_ids waiting for a worker
+        self._running = 0
+        self.counts = {"submitted": 0, "done": 0, "failed": 0, "rejected": 0}
+        self._seq = itertools.count(1)
+
+    def _get_context(self):
+        import multiprocessing
+        return multiprocessing.get_context(self.mp_context)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._get_context())
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Drop a broken pool so _get_executor() builds a new one."""
+        with self._lock:
+            if self._executor is not executor:
+                return # Already replaced
+            self._executor = None
+        logger.warning("Worker pool broken (a worker died); starting a new one for the next job")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_progress_queue(self):
+        with self._lock:
+            if self._progress_queue is None:
+                self._mp_manager = self._get_context().Manager()
+                self._progress_queue = self._mp_manager.Queue()
+                self._progress_thread = threading.Thread(target=self._progress_loop, name="JobProgress", daemon=True)
+                self._progress_thread.start()
+            return self._progress_queue
+
+    def _progress_loop(self):
+        while True:
+            try:
+                item = self._progress_queue.get()
+            except Exception:
+                return # Manager shut down
+            if item is None:
+                return
+            job_id, event = item
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job["progress"] = event
+                    job["progress_seq"] += 1
+            self._notify()
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def submit(self, kind, func, *args, report_progress=False, **kwargs):
+        """Queue func(*args, **kwargs). Raises QueueFullError when the queue is at max_queued."""
+        queue = self._get_progress_queue() if report_progress else None
+        with self._lock:
+            if self.max_queued is not None and len(self._pending) >= self.max_queued:
+                self.counts["rejected"] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_queued} waiting)")
+
+            job_id = f"{next(self._seq)}-{uuid.uuid4().hex[:8]}"
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": QUEUED,
+                "params": kwargs,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "progress": None,
+                "progress_seq": 0,
+                "_call": (func, args, kwargs),
+            }
+            if report_progress:
+                self._jobs[job_id]["_call"] = (func, args, {
+                    **kwargs, "progress": ProgressReporter(QueueSink(queue, job_id), min_interval=self.progress_interval)
+                })
+            self._pending.append(job_id)
+            self.counts["submitted"] += 1
+            self._trim()
+        self._drain()
+        return job_id
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond `history`. Caller holds the lock."""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [j for j, job in self._jobs.items() if job["status"] in (DONE, FAILED)][:excess]:
+            del self._jobs[job_id]
+
+    def _drain(self):
+        """Hand queued jobs to the pool while there are free workers."""
+        while True:
+            with self._lock:
+                if self._running >= self.max_workers or not self._pending:
+                    return
+                job = self._jobs[self._pending.popleft()]
+                job["status"] = RUNNING
+                job["started_at"] = time.time()
+                self._running += 1
+                func, args, kwargs = job.pop("_call")
+
+            future, error = None, None
+            for _ in range(2): # A pool broken since the last submit is replaced once
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(func, *args, **kwargs)
+                    break
+                except BrokenProcessPool as e:
+                    error = e
+                    self._discard_executor(executor)
+                except Exception as e:
+                    error = e
+                    break
+            if future is None:
+                self._finish(job, None, error)
+                continue
+            future.add_done_callback(lambda f, job=job, executor=executor: self._on_done(job, f, executor))
+
+    def _on_done(self, job, future, executor):
+        try:
+            self._finish(job, future.result(), None)
+        except BrokenProcessPool as e:
+            self._discard_executor(executor)
+            self._finish(job, None, e)
+        except Exception as e:
+            self._finish(job, None, e)
+
+    def _finish(self, job, result, error):
+        with self._lock:
+            self._running -= 1
+            job["finished_at"] = time.time()
+            if error is None:
+                job["status"] = DONE
+                job["result"] = result
+                self.counts["done"] += 1
+            else:
+                job["status"] = FAILED
+                job["error"] = str(error) or error.__class__.__name__
+                self.counts["failed"] += 1
+                logger.error(f"Job {job['job_id']} ({job['kind']}) failed: {job['error']}")
+        self._notify()
+        self._drain()
+
+    def get(self, job_id, include_result=True):
+        """Public view of a job, or None if unknown/expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            view = {k: v for k, v in job.items() if not k.startswith("_")}
+            if job["status"] == QUEUED:
+                view["queue_position"] = self._pending.index(job_id) + 1
+        if not include_result:
+            view.pop("result")
+        for key in ("submitted_at", "started_at", "finished_at"):
+            if view[key]:
+                view[key] = datetime.fromtimestamp(view[key]).isoformat(timespec='seconds')
+        if job["started_at"]:
+            view["elapsed_sec"] = round((job["finished_at"] or time.time()) - job["started_at"], 2)
+        return view
+
+    def wait_progress(self, job_id, last_seq, timeout=1.0):
+        """
+        Block (up to timeout) until the job has progress newer than last_seq
+        or finishes. Returns (status, progress_seq, progress) or None if unknown.
+        """
+        def snapshot():
+            with self._lock:
+                job = self._jobs.get(job_id)
+                return None if job is None else (job["status"], job["progress_seq"], job["progress"])
+
+        with self._changed:
+            state = snapshot()
+            if state and state[0] in (QUEUED, RUNNING) and state[1] == last_seq:
+                self._changed.wait(timeout)
+                state = snapshot()
+        return state
+
+    def recent(self, limit=50):
+        with self._lock:
+            job_ids = list(self._jobs)[-limit:]
+        views = [self.get(job_id, include_result=False) for job_id in reversed(job_ids)]
+        return [v for v in views if v]
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                **self.counts,
+                "max_workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "running": self._running,
+                "queue_depth": len(self._pending),
+            }
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            while self._pending:
+                job = self._jobs[self._pending.popleft()]
+                job["status"] = FAILED
+                job["error"] = "Cancelled at shutdown"
+        if self._executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+        if self._mp_manager:
+            try:
+                self._progress_queue.put(None)
+            except Exception:
+                pass
+            self._mp_manager.shutdown()
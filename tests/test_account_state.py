@@ -0,0 +1,76 @@
+from src.execution.account_state import AccountState
+
+class FakeKis:
+    """Counts balance inquiries."""
+    def __init__(self):
+        self.balance_calls = 0
+
+    def get_balance(self):
+        self.balance_calls += 1
+        return {
+            'output1': [{'pdno': '005930', 'hldg_qty': '10', 'pchs_avg_pric': '70000', 'prdt_name': '삼성전자'}],
+            'output2': [{'dnca_tot_amt': '1000000'}]
+        }
+
+def test_account_state():
+    print(">>> Testing Cached Account State...")
+    kis = FakeKis()
+    account = AccountState(kis)
+    
+    assert account.ensure_loaded()
+    assert account.get_cash() == 1_000_000
+    assert account.get_qty("005930") == 10
+    
+    # Optimistic updates: no extra balance inquiries
+    account.apply_order("005930", "BUY", 2, 71000)
+    account.apply_order("000660", "BUY", 1, 0) # Market order: cash reconciled later
+    account.apply_order("005930", "SELL", 12, 72000)
+    account.ensure_loaded()
+    
+    print(account.snapshot())
+    assert account.get_qty("005930") == 0
+    assert account.get_qty("000660") == 1
+    assert account.get_cash() == 1_000_000 - 2 * 71000 + 12 * 72000
+    assert kis.balance_calls == 1
+    
+    # Reconcile overwrites optimistic state with the broker's view
+    account.refresh()
+    assert account.get_qty("005930") == 10
+    assert kis.balance_calls == 2
+
+class SlowKis:
+    """Balance inquiry during which an order is acknowledged; the broker only counts it next time."""
+    def __init__(self):
+        self.held = 10
+        self.during_fetch = None
+
+    def get_balance(self):
+        held = self.held
+        if self.during_fetch:
+            self.during_fetch()
+            self.during_fetch = None
+        return {
+            'output1': [{'pdno': '005930', 'hldg_qty': str(held), 'pchs_avg_pric': '70000', 'prdt_name': ''}],
+            'output2': [{'dnca_tot_amt': '1000000'}]
+        }
+
+def test_refresh_keeps_inflight_orders():
+    print(">>> Testing reconcile keeps orders applied while the inquiry was in flight...")
+    kis = SlowKis()
+    account = AccountState(kis)
+    account.refresh()
+
+    def sell_all():
+        account.apply_order("005930", "SELL", 10, 71000)
+        kis.held = 0 # Counted by the broker from the next inquiry on
+    kis.during_fetch = sell_all
+    account.refresh()
+    assert account.get_qty("005930") == 0 # Not resurrected by the stale balance
+    assert account.get_cash() == 1_000_000 + 10 * 71000
+
+    account.refresh() # Broker view now includes the sell: not applied twice
+    assert account.get_qty("005930") == 0 and account.get_cash() == 1_000_000
+
+if __name__ == "__main__":
+    test_account_state()
+    test_refresh_keeps_inflight_orders()
@@ -0,0 +1,94 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from starlette.requests import Request
+from src import services
+from src.database.db_manager import DatabaseManager
+from src.web.jobs import JobManager, DONE, FAILED
+from src.web import api
+
+def request(accept_encoding=""):
+    return Request({"type": "http", "method": "GET", "headers": [(b"accept-encoding", accept_encoding.encode())]})
+
+def seed_prices(db, symbol, n_days=600):
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0.0003, 0.01, n_days)))
+    dates = pd.bdate_range("2020-01-01", periods=n_days).strftime("%Y%m%d")
+    db.insert_daily_price([(symbol, d, c, c * 1.01, c * 0.99, c, 1000) for d, c in zip(dates, closes)])
+
+def wait_done(job_ids, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        views = [asyncio.run(api.job_status(j)) for j in job_ids]
+        if all(v["status"] in (DONE, FAILED) for v in views):
+            return views
+        time.sleep(0.1)
+    raise TimeoutError("Jobs did not finish")
+
+def test_api():
+    print(">>> Testing /api/v1 backtest submission and columnar results...")
+    saved = dict(services._services)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        seed_prices(db, "AAPL")
+        jobs = JobManager(max_workers=2, max_queued=2)
+        services._services.update({"db": db, "jobs": jobs, "config": {}})
+        try:
+            # Batch: 2 running + 2 queued, the rest rejected individually
+            batch = api.BacktestBatchRequest(backtests=[
+                {"symbol": "AAPL", "mode": "algo", "strategy_name": "ma_crossover"},
+                {"symbol": "AAPL", "mode": "lump"},
+                {"symbol": "AAPL", "mode": "dca", "monthly_deposit": 100},
+                {"symbol": "AAPL", "mode": "algo"},
+                {"symbol": "AAPL", "mode": "lump", "initial_capital": 5000},
+            ])
+            body = asyncio.run(api.submit_backtest_batch(batch))
+            assert len(body["accepted"]) == 4 and [r["index"] for r in body["rejected"]] == [4]
+
+            views = wait_done([r["job_id"] for r in body["accepted"]])
+            assert all(v["status"] == DONE and v["result"]["summary"] for v in views), views
+            assert "equity_curve" not in views[0]["result"] # Linked, not inlined
+            job_id = views[0]["job_id"]
+            assert views[0]["links"]["equity_curve"] == f"/api/v1/backtests/{job_id}/equity"
+
+            # Gzip'd JSON arrays vs Arrow IPC, same data
+            response = asyncio.run(api.backtest_equity(request("gzip, deflate"), job_id))
+            assert response.headers["content-encoding"] == "gzip"
+            columns = json.loads(gzip.decompress(response.body))
+            assert len(columns["date"]) == len(columns["equity"]) == 600
+            raw = len(json.dumps([{"date": d, "equity": e, "invested": i}
+                                  for d, e, i in zip(columns["date"], columns["equity"], columns["invested"])]))
+            print(f"Equity curve: {len(response.body)} bytes gzip'd columns vs {raw} bytes of JSON rows")
+            assert len(response.body) < raw / 3
+
+            response = asyncio.run(api.backtest_equity(request(), job_id, format="arrow"))
+            table = pa.ipc.open_stream(response.body).read_all()
+            assert table.schema.field("date").type == pa.date32()
+            assert table.column("equity").to_pylist() == columns["equity"]
+
+            # Downsampled chart series, cached per backtest
+            chart = asyncio.run(api.backtest_chart(job_id, points=100))
+            assert chart["points_in"] == 600 and len(chart["equity"]["date"]) == 100
+            assert asyncio.run(api.backtest_chart(job_id, points=100)) is chart
+
+            trades = asyncio.run(api.backtest_trades(request(), job_id))
+            trades = json.loads(trades.body)
+            assert len(trades["date"]) == views[0]["result"]["summary"]["total_trades"] + views[0]["result"]["summary"]["total_dividends"]
+
+            # Errors: unknown job, job that isn't a backtest
+            assert asyncio.run(api.backtest_equity(request(), "missing")).status_code == 404
+            assert asyncio.run(api.job_status("missing")).status_code == 404
+            assert asyncio.run(api.run_screen(api.ScreenRequest(strategy="nope"))).status_code == 404
+            assert asyncio.run(api.get_screen("dreman")).status_code == 404 # No snapshot yet
+        finally:
+            jobs.shutdown()
+            services._services.clear()
+            services._services.update(saved)
+
+if __name__ == "__main__":
+    test_api()
@@ -0,0 +1,29 @@
+import os
+import tempfile
+from src.database.db_manager import DatabaseManager
+from src.strategies.volatility_breakout import compute_breakout_offsets
+
+def test_breakout_targets():
+    print(">>> Testing Vectorized Breakout Targets from DB...")
+    db = DatabaseManager(db_path=os.path.join(tempfile.mkdtemp(), "market_data.db"))
+    
+    db.insert_daily_price([
+        # symbol, date, open, high, low, close, volume
+        ("005930", "20240102", 70000, 71000, 69000, 70500, 100),
+        ("005930", "20240103", 70500, 72000, 70000, 71500, 100),
+        ("005930", "20240104", 71500, 73000, 71000, 72500, 100), # "Today"
+        ("000660", "20240103", 130000, 134000, 129000, 133000, 100),
+    ])
+    
+    bars = db.get_latest_bars(["005930", "000660", "999999"], before_date="20240104")
+    print(bars)
+    assert bars.loc["005930", "date"] == "20240103"
+    assert "999999" not in bars.index
+    
+    offsets = compute_breakout_offsets(bars, 0.5)
+    print(f"Offsets: {offsets.to_dict()}")
+    assert offsets["005930"] == (72000 - 70000) * 0.5
+    assert offsets["000660"] == (134000 - 129000) * 0.5
+
+if __name__ == "__main__":
+    test_breakout_targets()
@@ -0,0 +1,120 @@
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from src.database.db_manager import DatabaseManager
+from src.analysis.factor_engine import DREMAN
+from src.core.cross_sectional_backtester import CrossSectionalBacktester
+
+# Rank on P/E only, so the expected picks are easy to reproduce
+LOW_PE = {'filters': ["pe > 0"], 'factors': [{'metric': 'pe'}]}
+
+def build_db(path, n_symbols, n_days, seed=0, snapshot_every=63):
+    rng = np.random.default_rng(seed)
+    db = DatabaseManager(path)
+    dates = pd.bdate_range("2015-01-01", periods=n_days)
+    symbols = [f"S{i:04d}" for i in range(n_symbols)]
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_days, n_symbols)), axis=0))
+    date_strs = dates.strftime("%Y%m%d")
+    conn = db._get_connection()
+    conn.executemany(
+        "INSERT INTO daily_price (symbol, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((s, d, c, c, c, c, 1000) for j, s in enumerate(symbols) for d, c in zip(date_strs, closes[:, j]))
+    )
+    conn.commit()
+    conn.close()
+
+    rows = []
+    for i in range(0, n_days, snapshot_every):
+        for s in symbols:
+            rows.append({'symbol': s, 'as_of': date_strs[i], 'name': s, 'sector': 'Technology', 'quote_type': 'EQUITY',
+                         'price': 100, 'market_cap': 1e9, 'pe': float(rng.uniform(-5, 30)), 'pb': float(rng.uniform(0.5, 4)),
+                         'operating_cashflow': 1e8, 'dividend_yield': 0.02, 'debt_to_equity': 50, 'current_ratio': 1.5})
+    db.upsert_fundamentals(rows)
+    db.insert_dividends([(symbols[0], date_strs[100], 5.0)])
+    return db, symbols, pd.DataFrame(closes, index=dates, columns=symbols)
+
+def reference_equity(db, symbols, closes, top_n, capital, commission, tax, dividend_tax):
+    """Plain per-day loop with fractional shares."""
+    history = db.get_fundamentals_history(symbols)
+    divs = db.get_dividend_panel(symbols).reindex(index=closes.index, columns=symbols).fillna(0.0)
+    reb = set(CrossSectionalBacktester.rebalance_dates(closes.index, 'monthly'))
+    cash, shares, curve = capital, {}, []
+    for date in closes.index:
+        prices = closes.loc[date]
+        for s, q in shares.items():
+            cash += q * divs.at[date, s] * (1 - dividend_tax)
+        if date in reb:
+            known = history[history['as_of'] < date.strftime("%Y%m%d")]
+            latest = known.groupby('symbol').tail(1)
+            picks = latest[latest['pe'] > 0].sort_values('pe', kind='stable').head(top_n)['symbol'].tolist()
+            equity = cash + sum(q * prices[s] for s, q in shares.items())
+            current = {s: q * prices[s] / equity for s, q in shares.items()}
+            target = {s: 1 / len(picks) for s in picks}
+            cost = 0.0
+            for s in set(current) | set(target):
+                d = target.get(s, 0) - current.get(s, 0)
+                cost += d * commission if d > 0 else -d * (commission + tax)
+            equity *= (1 - cost)
+            shares = {s: w * equity / prices[s] for s, w in target.items()}
+            cash = equity - sum(q * prices[s] for s, q in shares.items())
+        curve.append(cash + sum(q * prices[s] for s, q in shares.items()))
+    return pd.Series(curve, index=closes.index)
+
+def test_cross_sectional_backtester():
+    print(">>> Testing cross-sectional rebalance backtest...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db, symbols, closes = build_db(os.path.join(tmp, "test.db"), 40, 300)
+        bt = CrossSectionalBacktester(db, LOW_PE, commission_rate=0.001, tax_rate=0.002)
+        summary = bt.run(symbols, frequency='monthly', top_n=5, initial_capital=1_000_000)
+        print(f"Summary: {summary}")
+
+        expected = reference_equity(db, symbols, closes, 5, 1_000_000, 0.001, 0.002, 0.15)
+        assert np.allclose(bt.equity_curve['equity'].values, expected.values, rtol=1e-9)
+        assert summary['rebalances'] == len(bt.rebalances) == 14
+        assert bt.rebalances[0]['holdings'] == [] # No snapshot before the first trading day
+        assert all(len(r['holdings']) == 5 for r in bt.rebalances[1:])
+        assert summary['total_costs'] > 0 and 0 < summary['avg_turnover_pct'] <= 100
+
+        # Point in time: picks after a snapshot date only use that snapshot
+        history = db.get_fundamentals_history(symbols)
+        may = bt.rebalances[4] # 2015-05-01
+        snap = history[history['as_of'] == history.loc[history['as_of'] < '20150501', 'as_of'].max()]
+        assert may['holdings'] == snap[snap['pe'] > 0].nsmallest(5, 'pe')['symbol'].tolist()
+
+    # A delisted symbol is not picked after its last bar, though its price is carried forward
+    with tempfile.TemporaryDirectory() as tmp:
+        db, symbols, closes = build_db(os.path.join(tmp, "test.db"), 40, 300)
+        delisted = may['holdings'][0]
+        conn = db._get_connection()
+        conn.execute("DELETE FROM daily_price WHERE symbol = ? AND date >= '20150415'", (delisted,))
+        conn.commit()
+        conn.close()
+        bt = CrossSectionalBacktester(db, LOW_PE, commission_rate=0.001, tax_rate=0.002)
+        bt.run(symbols, frequency='monthly', top_n=5, initial_capital=1_000_000)
+        assert all(delisted not in r['holdings'] for r in bt.rebalances if r['date'] >= '2015-04-15')
+        assert len(bt.rebalances[4]['holdings']) == 5 # Replaced by the next best
+
+def test_cross_sectional_speed():
+    print(">>> Testing cross-sectional backtest on a 10-year, 500-symbol panel...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db, symbols, _ = build_db(os.path.join(tmp, "test.db"), 500, 2520, seed=1)
+        bt = CrossSectionalBacktester(db, DREMAN)
+        timings = []
+        for _ in range(2): # Cold (SQL), then warm (Parquet panel cache)
+            started = time.perf_counter()
+            summary = bt.run(symbols, frequency='monthly', top_n=30)
+            timings.append(time.perf_counter() - started)
+        print(f"{summary['rebalances']} rebalances over {len(bt.equity_curve)} days, "
+              f"cold {timings[0]:.2f}s / warm {timings[1]:.2f}s, CAGR {summary['cagr_pct']:.2f}%")
+        assert summary['rebalances'] == 116
+        assert timings[0] < 10.0 and timings[1] < 3.0
+        # Panel cache lives next to its DB, keyed by it: another DB never reads it
+        assert db.cache_dir == os.path.join(tmp, "cache") and os.listdir(db.cache_dir)
+        other = DatabaseManager(os.path.join(tmp, "other.db"))
+        assert other.get_price_panel(symbols[:5], cache=True).empty
+
+if __name__ == "__main__":
+    test_cross_sectional_backtester()
+    test_cross_sectional_speed()
@@ -0,0 +1,55 @@
+import time
+import numpy as np
+import pandas as pd
+from src.core.downsample import lttb, minmax, downsample_curve
+
+def reference_lttb(y, n_out):
+    """Textbook per-point LTTB over the same bucket edges."""
+    n = len(y)
+    edges = [int(e) for e in np.linspace(1, n - 1, n_out - 1)]
+    picked, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = range(hi, edges[i + 2]) if i + 2 < len(edges) else [n - 1]
+        avg_x = sum(nxt) / len(nxt)
+        avg_y = sum(y[j] for j in nxt) / len(nxt)
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    return picked + [n - 1]
+
+def test_downsample():
+    print(">>> Testing LTTB / min-max downsampling of equity curves...")
+    rng = np.random.default_rng(0)
+    y = 1e6 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, 5000)))
+
+    idx = lttb(y, 500)
+    assert len(idx) == 500 and idx[0] == 0 and idx[-1] == 4999
+    assert list(idx) == reference_lttb(y, 500)
+    assert list(lttb(y[:100], 500)) == list(range(100)) # Already small enough
+
+    idx = minmax(y, 500)
+    assert len(idx) <= 500 and np.all(np.diff(idx) > 0)
+    assert y.argmax() in idx and y.argmin() in idx
+
+    # 30 years of minute bars down to a chart
+    n = 2_000_000
+    equity = 1e6 * np.exp(np.cumsum(rng.normal(0, 0.0005, n)))
+    dates = pd.date_range("1995-01-01", periods=n, freq="min").strftime("%Y-%m-%d").tolist()
+    started = time.perf_counter()
+    chart = downsample_curve(dates, equity, points=1000)
+    elapsed = time.perf_counter() - started
+    print(f"{n} points -> {len(chart['equity']['value'])} (equity) / {len(chart['drawdown_pct']['value'])} (drawdown) in {elapsed:.2f}s")
+    assert chart['points_in'] == n and len(chart['equity']['value']) == 1000
+    assert len(chart['drawdown_pct']['value']) <= 1000
+    full_dd = (equity / np.maximum.accumulate(equity) - 1) * 100
+    assert np.isclose(min(chart['drawdown_pct']['value']), full_dd.min()) # MDD survives
+    assert chart['equity']['value'][-1] == equity[-1]
+    assert elapsed < 2.0
+
+if __name__ == "__main__":
+    test_downsample()
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from src.analysis.factor_engine import FactorEngine, DREMAN, MAGIC_FORMULA, get_presets
+from src.analysis.screener import FactorScreener, run_screen_job
+
+def make_raw(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'symbol': [f"S{i}" for i in range(n)], 'name': 'x',
+        'sector': rng.choice(['Technology', 'Energy', 'Financial Services', 'Utilities'], n),
+        'quote_type': 'EQUITY', 'price': 100.0, 'market_cap': rng.uniform(1e8, 1e11, n),
+        'pe': rng.normal(15, 10, n), 'pb': rng.uniform(0.2, 5, n), 'operating_cashflow': rng.normal(1e8, 1e8, n),
+        'dividend_yield': rng.choice([0, 0.01, 0.03], n), 'debt_to_equity': rng.uniform(0, 300, n),
+        'current_ratio': rng.uniform(0, 3, n), 'enterprise_value': rng.uniform(1e8, 1e11, n),
+        'ebitda': rng.normal(1e9, 1e9, n), 'roa': rng.normal(0.05, 0.05, n),
+    })
+
+def reference_dreman(raw, top_n):
+    """The hand-coded Dreman screen the DREMAN preset replaced."""
+    df = raw[['symbol', 'sector', 'quote_type', 'pe', 'pb', 'debt_to_equity', 'current_ratio']].copy()
+    ocf, mkt_cap = raw['operating_cashflow'], raw['market_cap']
+    df['pcr'] = (mkt_cap / ocf).where(ocf.notna() & (ocf != 0) & mkt_cap.notna() & (mkt_cap != 0))
+    df['pdr'] = (1 / raw['dividend_yield']).where(raw['dividend_yield'] > 0, 9999)
+    df = df[(df['sector'] != 'Financial Services') & (df['sector'] != 'Real Estate') & (df['quote_type'] == 'EQUITY')]
+    df = df.dropna(subset=['pe', 'debt_to_equity', 'current_ratio'])
+    df = df[(df['debt_to_equity'] < 150) & (df['current_ratio'] > 1.0) & (df['pe'] > 0)].copy()
+    df['pcr'] = df['pcr'].fillna(9999)
+    df['composite_score'] = df['pe'].rank() + df['pb'].rank() + df['pcr'].rank() + df['pdr'].rank()
+    return df.nsmallest(top_n, 'composite_score')
+
+def reference_magic(raw, top_n):
+    """The hand-coded Magic Formula screen the MAGIC_FORMULA preset replaced."""
+    df = raw[['symbol', 'sector', 'quote_type']].copy()
+    ev, ebitda = raw['enterprise_value'], raw['ebitda']
+    df['earnings_yield'] = (ebitda / ev).where((ev > 0) & ebitda.notna() & (ebitda != 0), 0.0)
+    df['roa'] = raw['roa'].fillna(0.0)
+    df = df[~df['sector'].isin(['Financial Services', 'Real Estate', 'Utilities']) & (df['quote_type'] == 'EQUITY')]
+    df = df[df['earnings_yield'] > 0].copy()
+    df['composite_score'] = df['earnings_yield'].rank(ascending=False) + df['roa'].rank(ascending=False)
+    return df.nsmallest(top_n, 'composite_score')
+
+def test_presets_match_reference():
+    print(">>> Testing DREMAN / MAGIC_FORMULA presets against the hand-coded screens...")
+    for seed in range(5):
+        raw = make_raw(3000, seed=seed)
+        raw.loc[raw.sample(frac=0.1, random_state=seed).index, ['pb', 'operating_cashflow', 'roa', 'ebitda']] = np.nan
+        raw.loc[raw.sample(frac=0.05, random_state=seed + 1).index, 'sector'] = 'Real Estate'
+        for spec, reference in ((DREMAN, reference_dreman), (MAGIC_FORMULA, reference_magic)):
+            expected = reference(raw, 50)
+            top = FactorEngine(spec).run(raw, top_n=50)
+            assert top['symbol'].tolist() == expected['symbol'].tolist(), (spec['label'], seed)
+            assert np.allclose(top['composite_score'], expected['composite_score'])
+
+def test_factor_engine():
+    print(">>> Testing declarative factor engine...")
+    raw = make_raw(200)
+
+    # Dreman preset: filters hold, composite = sum of per-factor ranks
+    top = FactorEngine(DREMAN).run(raw, top_n=20)
+    assert len(top) == 20
+    assert (top['debt_to_equity'] < 150).all() and (top['pe'] > 0).all()
+    assert not top['sector'].isin(['Financial Services', 'Real Estate']).any()
+    ranks = top[['rank_pe', 'rank_pb', 'rank_pcr', 'rank_pdr']].sum(axis=1)
+    assert np.allclose(ranks, top['composite_score'])
+    assert top['composite_score'].is_monotonic_increasing
+
+    # Weights, direction, sector neutrality and winsorization are config only
+    spec = {
+        'metrics': {'ey': {'expr': '1 / pe', 'where': 'pe > 0'}},
+        'filters': ["sector in ['Technology', 'Energy']"],
+        'factors': [{'metric': 'ey', 'ascending': False, 'weight': 3}, {'metric': 'pb'}],
+        'sector_neutral': True,
+    }
+    scored = FactorEngine(spec).run(raw)
+    assert set(scored['sector']) == {'Technology', 'Energy'}
+    assert scored['ey'].notna().all() # pe <= 0 -> no ey -> no score
+    best_ey = scored.loc[scored['rank_ey'].idxmin()]
+    assert best_ey['ey'] == scored.loc[scored['sector'] == best_ey['sector'], 'ey'].max()
+
+    zspec = dict(spec, method='zscore', winsorize=[0.05, 0.95], sector_neutral=False)
+    z = FactorEngine(zspec).run(raw)
+    assert abs(z['rank_pb'].mean()) < 0.05 # Standardized over the filtered universe
+    assert z['rank_ey'].iloc[0] <= 0 # Higher ey is better -> negative score
+
+    # Custom presets from YAML config, generic result layout
+    custom = yaml.safe_load(open("config/settings.yaml.example"))['screener']['presets']
+    assert set(get_presets(custom)) >= {'dreman', 'magic', 'value_quality'}
+    screener = FactorScreener(preset=custom['value_quality'])
+    screener.get_universe = lambda universe_type: list(raw['symbol'])
+    screener.load_raw = lambda symbols, progress=None: raw
+    rows = screener.screen(top_n=5)
+    assert len(rows) == 5 and set(rows[0]['factors']) == {'earnings_yield', 'pb', 'roa'}
+
+    for bad in ({'factors': []}, {'factors': [{'metric': 'pe', 'direction': 'up'}]}, {'factors': [{'metric': 'pe'}], 'method': 'ml'}):
+        try:
+            FactorEngine(bad)
+            assert False, bad
+        except ValueError as e:
+            print(f"Rejected preset: {e}")
+    try:
+        run_screen_job('nope')
+        assert False
+    except ValueError:
+        pass
+
+def test_factor_engine_speed():
+    print(">>> Testing factor engine over a full-market universe...")
+    raw = make_raw(12000, seed=1)
+    engine = FactorEngine(dict(DREMAN, winsorize=[0.01, 0.99], sector_neutral=True))
+    started = time.perf_counter()
+    top = engine.run(raw, top_n=30)
+    elapsed = time.perf_counter() - started
+    print(f"12000 symbols scored in {elapsed * 1000:.1f}ms")
+    assert len(top) == 30
+    assert elapsed < 1.0
+
+if __name__ == "__main__":
+    test_factor_engine()
+    test_presets_match_reference()
+    test_factor_engine_speed()
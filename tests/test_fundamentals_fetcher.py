@@ -0,0 +1,48 @@
+import time
+from src.analysis.fundamentals_fetcher import FundamentalsFetcher
+from src.analysis.screener import DremanScreener
+
+def fake_info(symbol):
+    """~0.2s per request, like a Yahoo round trip."""
+    if symbol == "HANG":
+        time.sleep(2)
+    time.sleep(0.2)
+    if symbol == "BAD":
+        raise ConnectionError("HTTP 404")
+    return {
+        'sector': 'Technology', 'quoteType': 'EQUITY', 'shortName': symbol, 'currentPrice': 100,
+        'marketCap': 1e9, 'trailingPE': 10 + len(symbol), 'priceToBook': 2, 'operatingCashflow': 1e8,
+        'dividendYield': 0.02, 'debtToEquity': 50, 'currentRatio': 1.5
+    }
+
+def test_fundamentals_fetcher():
+    print(">>> Testing concurrent fundamentals fetch...")
+    symbols = [f"S{i}" for i in range(40)] + ["BAD", "HANG"]
+    fetcher = FundamentalsFetcher(max_workers=10, rate_per_sec=100, timeout=0.5, retries=1, info_loader=fake_info)
+    screener = DremanScreener(fetcher)
+
+    started = time.perf_counter()
+    df = screener.fetch_fundamentals(symbols)
+    elapsed = time.perf_counter() - started
+    print(f"Fetched {len(df)} in {elapsed:.2f}s (serial would be ~{0.2 * len(symbols):.0f}s), Failures: {screener.failures}")
+
+    assert len(df) == 40
+    assert list(df['symbol']) == symbols[:40] # Input order kept
+    assert set(screener.failures) == {"BAD", "HANG"}
+    assert "timeout" in screener.failures["HANG"]
+    assert elapsed < 2.0 # Bounded by a few request latencies, not the sum
+    assert fetcher.last_stats["failed"] == 2
+
+def test_fundamentals_rate_limit():
+    print(">>> Testing fundamentals rate limit...")
+    fetcher = FundamentalsFetcher(max_workers=10, rate_per_sec=20, timeout=5, info_loader=lambda s: {'x': 1})
+    started = time.perf_counter()
+    rows, failures = fetcher.fetch([f"S{i}" for i in range(30)], lambda s, info: {'symbol': s})
+    elapsed = time.perf_counter() - started
+    print(f"30 requests at 20/s (burst 10) took {elapsed:.2f}s")
+    assert len(rows) == 30 and not failures
+    assert elapsed >= 0.9 # (30 - 10 burst) / 20 per sec
+
+if __name__ == "__main__":
+    test_fundamentals_fetcher()
+    test_fundamentals_rate_limit()
@@ -0,0 +1,55 @@
+import os
+import time
+import tempfile
+from src.database.db_manager import DatabaseManager
+from src.analysis.fundamentals_fetcher import FundamentalsFetcher
+from src.analysis.fundamentals_store import FundamentalsStore
+from src.analysis.screener import DremanScreener
+
+calls = []
+
+def fake_info(symbol):
+    calls.append(symbol)
+    time.sleep(0.05)
+    return {
+        'sector': 'Technology', 'quoteType': 'EQUITY', 'shortName': symbol, 'currentPrice': 100,
+        'marketCap': 1e9, 'trailingPE': 5 + len(calls) % 7, 'priceToBook': 2, 'operatingCashflow': 1e8,
+        'dividendYield': 0.02, 'debtToEquity': 50, 'currentRatio': 1.5, 'enterpriseValue': 2e9,
+        'ebitda': 2e8, 'returnOnAssets': 0.1
+    }
+
+def test_fundamentals_store():
+    print(">>> Testing Fundamentals Store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        store = FundamentalsStore(db, FundamentalsFetcher(max_workers=10, rate_per_sec=1000, info_loader=fake_info), max_age_days=7)
+        screener = DremanScreener(store=store)
+        symbols = screener.get_universe('large_cap')
+
+        results = screener.screen('large_cap')
+        assert len(calls) == len(symbols) # Cold: everything downloaded once
+        assert screener.freshness['stale'] == 0 and screener.freshness['count'] == len(symbols)
+
+        calls.clear()
+        started = time.perf_counter()
+        cached = screener.screen('large_cap')
+        elapsed = time.perf_counter() - started
+        print(f"Warm screen from store: {elapsed * 1000:.1f}ms, {len(cached)} results, Freshness: {screener.freshness}")
+        assert calls == [] # Served from the table
+        assert [r['symbol'] for r in cached] == [r['symbol'] for r in results]
+
+        # Age one snapshot past max_age_days -> only that symbol is refreshed
+        conn = db._get_connection()
+        conn.execute("UPDATE fundamentals SET as_of = '20000101' WHERE symbol = 'AAPL'")
+        conn.commit()
+        conn.close()
+        assert store.stale_symbols(symbols) == ['AAPL']
+        stats = store.refresh(symbols)
+        assert calls == ['AAPL'] and stats['refreshed'] == 1 and stats['skipped_fresh'] == len(symbols) - 1
+
+        # Point-in-time read sees the old snapshot only
+        old = store.load(['AAPL', 'MSFT'], as_of='20000102')
+        assert list(old['symbol']) == ['AAPL'] and old['as_of'].iloc[0] == '20000101'
+
+if __name__ == "__main__":
+    test_fundamentals_store()
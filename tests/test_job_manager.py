@@ -0,0 +1,73 @@
+import os
+import time
+from src.web.jobs import JobManager, QueueFullError, DONE, FAILED
+
+def slow_square(x, delay=0.3):
+    time.sleep(delay)
+    return x * x
+
+def fail(msg):
+    raise ValueError(msg)
+
+def crash():
+    os._exit(1) # Worker dies (e.g. OOM kill)
+
+def wait_all(jobs, job_ids, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all(jobs.get(j)["status"] in (DONE, FAILED) for j in job_ids):
+            return
+        time.sleep(0.05)
+    raise TimeoutError("Jobs did not finish")
+
+def test_job_manager():
+    print(">>> Testing Job Manager (process pool)...")
+    jobs = JobManager(max_workers=2, max_queued=3)
+    assert jobs._get_context().get_start_method() == "spawn" # Never fork the threaded server by default
+    try:
+        started = time.perf_counter()
+        ids = [jobs.submit("square", slow_square, i) for i in range(4)]
+        submit_ms = (time.perf_counter() - started) * 1000
+        print(f"Submitted 4 jobs in {submit_ms:.1f}ms, Stats: {jobs.get_stats()}")
+
+        assert submit_ms < 200 # Returns immediately
+        stats = jobs.get_stats()
+        assert stats["running"] == 2 and stats["queue_depth"] == 2 # Concurrency cap
+        assert jobs.get(ids[3])["queue_position"] == 2
+
+        # Queue bounded by max_queued
+        bad = jobs.submit("fail", fail, "boom")
+        try:
+            jobs.submit("square", slow_square, 5)
+            assert False, "Expected QueueFullError"
+        except QueueFullError:
+            pass
+
+        wait_all(jobs, ids + [bad])
+        print(f"Finished in {time.perf_counter() - started:.2f}s, Stats: {jobs.get_stats()}")
+
+        assert [jobs.get(j)["result"] for j in ids] == [0, 1, 4, 9]
+        assert jobs.get(bad)["status"] == FAILED and "boom" in jobs.get(bad)["error"]
+        assert jobs.get_stats()["rejected"] == 1
+        assert jobs.get("missing") is None
+    finally:
+        jobs.shutdown()
+
+def test_job_manager_recovers_from_dead_worker():
+    print(">>> Testing Job Manager replaces a pool broken by a dead worker...")
+    jobs = JobManager(max_workers=1)
+    try:
+        crashed = jobs.submit("crash", crash)
+        wait_all(jobs, [crashed], timeout=30)
+        assert jobs.get(crashed)["status"] == FAILED
+        print(f"Crashed job: {jobs.get(crashed)['error']}")
+
+        ids = [jobs.submit("square", slow_square, i, delay=0) for i in range(3)]
+        wait_all(jobs, ids, timeout=30)
+        assert [jobs.get(j)["result"] for j in ids] == [0, 1, 4]
+    finally:
+        jobs.shutdown()
+
+if __name__ == "__main__":
+    test_job_manager()
+    test_job_manager_recovers_from_dead_worker()
@@ -0,0 +1,33 @@
+import time
+from src.core.job_metrics import JobMetrics
+
+def test_job_metrics():
+    print(">>> Testing Scheduler Job Metrics...")
+    metrics = JobMetrics()
+    
+    fast = metrics.wrap("intraday_monitoring", lambda: time.sleep(0.01), interval_sec=0.05)
+    slow = metrics.wrap("intraday_monitoring", lambda: time.sleep(0.08), interval_sec=0.05)
+    
+    def failing():
+        raise RuntimeError("API down")
+    broken = metrics.wrap("after_market", failing)
+    
+    fast()
+    slow() # Longer than its interval -> overrun
+    try:
+        broken()
+    except RuntimeError:
+        pass
+    
+    snap = metrics.snapshot()
+    print(snap)
+    job = snap["intraday_monitoring"]
+    assert job["runs"] == 2
+    assert job["overruns"] == 1
+    assert job["last_success"] is not None
+    assert job["duration_histogram"]["le_0.1"] == 2
+    assert snap["after_market"]["failures"] == 1
+    assert snap["after_market"]["last_error"] == "API down"
+
+if __name__ == "__main__":
+    test_job_metrics()
@@ -0,0 +1,74 @@
+import asyncio
+import time
+import threading
+from types import SimpleNamespace
+from src.api.kis_async import AsyncKisApi
+from src.core.scheduler import KronosScheduler
+
+class FakeKis:
+    """Blocking stand-in for KisApi: each quote takes ~200ms."""
+    pool_size = 10
+
+    def get_current_price(self, symbol):
+        time.sleep(0.2)
+        return {'stck_prpr': '1000', 'symbol': symbol}
+
+def test_kis_async():
+    print(">>> Testing Async KIS Client (Concurrent Quotes)...")
+    client = AsyncKisApi(FakeKis(), max_concurrency=10)
+    symbols = [f"{i:06d}" for i in range(10)]
+    
+    started = time.perf_counter()
+    quotes = asyncio.run(client.get_prices(symbols))
+    elapsed = time.perf_counter() - started
+    
+    print(f"Fetched {len(quotes)} quotes in {elapsed:.2f}s")
+    assert set(quotes) == set(symbols)
+    # Serial would take 10 * 0.2s = 2s
+    assert elapsed < 1.5
+
+class InFlightKis(FakeKis):
+    """Records the peak number of concurrent quote calls."""
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def get_current_price(self, symbol):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= 1
+        return {'stck_prpr': '1000', 'symbol': symbol}
+
+def test_sweep_concurrency():
+    print(">>> Testing intraday sweep: max_concurrency bounds the whole sweep...")
+    kis = InFlightKis()
+    client = AsyncKisApi(kis, max_concurrency=3)
+    seen = []
+    fake = SimpleNamespace(kis_async=client, triggers=SimpleNamespace(on_price=lambda s, p: seen.append(s)))
+    symbols = [f"{i:06d}" for i in range(24)]
+
+    asyncio.run(KronosScheduler._sweep(fake, symbols))
+    print(f"Peak in-flight calls: {kis.peak}")
+    assert kis.peak == 3 and len(seen) == 24
+
+    # Loops on different threads at once each get their own semaphore (no cross-loop errors)
+    errors = []
+    def run_loop():
+        try:
+            asyncio.run(client.get_prices([f"{i:06d}" for i in range(6)]))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run_loop) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+
+if __name__ == "__main__":
+    test_kis_async()
+    test_sweep_concurrency()
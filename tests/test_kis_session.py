@@ -0,0 +1,93 @@
+import os
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import yaml
+from src.api.kis import KisApi
+
+class StubGateway(BaseHTTPRequestHandler):
+    """Keep-alive HTTP stub: records client ports, answers 429 while `throttle` > 0."""
+    protocol_version = "HTTP/1.1"
+    peers = []
+    throttle = 0
+
+    def do_GET(self):
+        StubGateway.peers.append(self.client_address[1])
+        if StubGateway.throttle > 0:
+            StubGateway.throttle -= 1
+            status, body = 429, {"msg_cd": "EGW00201"}
+        else:
+            status, body = 200, {"rt_cd": "0"}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class OfflineKis(KisApi):
+    """KisApi with a stub url_base and no token handling."""
+    def _load_token_from_file(self):
+        pass
+
+    def _ensure_token(self):
+        pass
+
+    def _schedule_token_refresh(self):
+        pass
+
+def test_kis_session():
+    print(">>> Testing pooled KIS session (keep-alive, pool size, timeouts, throttling retries)...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGateway)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = os.path.join(tmp, "settings.yaml")
+            with open(config_path, "w") as f:
+                yaml.safe_dump({"kis": {
+                    "app_key": "k", "app_secret": "s", "account_no": "12345678-01",
+                    "url_base": f"http://127.0.0.1:{server.server_address[1]}",
+                    "http": {"pool_size": 3, "connect_timeout": 1.5, "read_timeout": 4},
+                    "rate_limit": {"max_retries": 2, "backoff_base": 0.01},
+                }}, f)
+            kis = OfflineKis(config_path)
+
+            # Pool size from config, same adapter for both schemes
+            adapter = kis.session.get_adapter("https://example.com")
+            assert adapter is kis.session.get_adapter("http://example.com")
+            assert adapter._pool_connections == 3 and adapter._pool_maxsize == 3
+
+            # Timeouts passed on every call
+            seen = []
+            send = kis.session.request
+            kis.session.request = lambda *a, **kw: seen.append(kw["timeout"]) or send(*a, **kw)
+
+            # Sequential calls share one keep-alive connection
+            for _ in range(5):
+                assert kis._request("GET", "/ping", {}).status_code == 200
+            assert len(StubGateway.peers) == 5 and len(set(StubGateway.peers)) == 1
+            assert seen == [(1.5, 4)] * 5
+
+            # Throttled TR calls are retried up to max_retries, untracked calls are not
+            StubGateway.peers.clear()
+            StubGateway.throttle = 2
+            assert kis._request("GET", "/quote", {"tr_id": "FHKST01010100"}).status_code == 200
+            assert len(StubGateway.peers) == 3
+            StubGateway.throttle = 10
+            assert kis._request("GET", "/quote", {"tr_id": "FHKST01010100"}).status_code == 429
+            assert len(StubGateway.peers) == 3 + 3 # 1 try + 2 retries
+            StubGateway.throttle = 1
+            assert kis._request("GET", "/ping", {}).status_code == 429 # No tr_id: no retry
+            stats = kis.get_latency_stats()
+            print(f"Latency stats: {stats}")
+            assert len(set(StubGateway.peers)) == 1 # Still the same connection
+    finally:
+        StubGateway.throttle = 0
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_kis_session()
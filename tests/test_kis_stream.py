@@ -0,0 +1,92 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.api.kis_stream import KisQuoteStream, parse_ticks
+from src.api.local_feed import LocalFeedServer
+
+def wait_until(cond, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_kis_stream():
+    print(">>> Testing Real-time Quote Stream (Local Feed)...")
+    server = LocalFeedServer()
+    server.start()
+    
+    stream = KisQuoteStream("TEST_APPROVAL_KEY", server.url, reconnect_delay=0.1)
+    received = []
+    stream.add_callback(lambda symbol, price, tick: received.append((symbol, price)))
+    stream.subscribe("005930")
+    stream.start()
+    
+    try:
+        # 1. Subscribe + Tick
+        assert wait_until(lambda: server.subscriber_count("005930") == 1)
+        server.publish("005930", 71000)
+        assert wait_until(lambda: stream.get_last_price("005930") == 71000)
+        print(f"[OK] Tick received: {received}")
+        
+        # 2. Disconnect -> Reconnect + Resubscribe
+        server.drop_connections()
+        assert wait_until(lambda: stream.reconnects >= 1 and server.subscriber_count("005930") == 1)
+        server.publish("005930", 71500)
+        assert wait_until(lambda: stream.get_last_price("005930") == 71500)
+        print(f"[OK] Resubscribed after reconnect ({stream.reconnects} reconnects)")
+        
+        # 3. A malformed frame is skipped, the connection stays up
+        reconnects = stream.reconnects
+        server.publish_frame("005930", "0|H0STCNT0|00x|005930^093017")
+        server.publish("005930", 71600)
+        assert wait_until(lambda: stream.get_last_price("005930") == 71600)
+        assert stream.bad_frames == 1 and stream.reconnects == reconnects
+
+        # 4. Unsubscribed symbols are not delivered
+        stream.subscribe("000660")
+        assert wait_until(lambda: server.subscriber_count("000660") == 1)
+        stream.unsubscribe("000660")
+        assert wait_until(lambda: server.subscriber_count("000660") == 0)
+    finally:
+        stream.stop()
+        server.stop()
+    
+    # 5. Multi-record frame parsing
+    rec = ["005930", "093015", "71000", "", "", "", "", "70000", "71200", "69900", "", "", "10", "5000"]
+    rec2 = ["005930", "093016", "71100", "", "", "", "", "70000", "71200", "69900", "", "", "3", "5003"]
+    ticks = parse_ticks("0|H0STCNT0|002|" + "^".join(rec + rec2))
+    assert [t['price'] for t in ticks] == [71000.0, 71100.0]
+
+class RejectingGateway(BaseHTTPRequestHandler):
+    """Answers the WebSocket upgrade with 403 (e.g. expired approval key)."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(403)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def test_kis_stream_rejected_handshake():
+    print(">>> Testing stream keeps retrying (with a new approval key) on rejected handshakes...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RejectingGateway)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    keys = []
+    stream = KisQuoteStream("OLD_KEY", f"ws://127.0.0.1:{server.server_address[1]}", reconnect_delay=0.05,
+                            max_reconnect_delay=0.05, key_provider=lambda: keys.append(1) or f"KEY_{len(keys)}")
+    stream.start()
+    try:
+        assert wait_until(lambda: stream.reconnects >= 3)
+        assert stream._thread.is_alive() and "403" in stream.last_error
+        assert len(keys) >= 2 and stream.approval_key.startswith("KEY_")
+    finally:
+        stream.stop()
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_kis_stream()
+    test_kis_stream_rejected_handshake()
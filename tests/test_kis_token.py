@@ -0,0 +1,35 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from src.api.kis import KisApi
+
+class CountingKis(KisApi):
+    """KisApi without config/network: token refresh just counts calls."""
+    def __init__(self):
+        self.access_token = None
+        self.token_expired_at = None
+        self._token_lock = threading.Lock()
+        self.refresh_calls = 0
+
+    def _refresh_token(self):
+        self.refresh_calls += 1
+        time.sleep(0.2) # Simulate /oauth2/tokenP round-trip
+        self.access_token = "TOKEN"
+        self.token_expired_at = datetime.now() + timedelta(hours=23)
+
+def test_kis_token():
+    print(">>> Testing Single-flight Token Refresh...")
+    kis = CountingKis()
+    
+    threads = [threading.Thread(target=kis._ensure_token) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    print(f"Refresh calls for 20 concurrent callers: {kis.refresh_calls}")
+    assert kis.refresh_calls == 1
+    assert kis.access_token == "TOKEN"
+
+if __name__ == "__main__":
+    test_kis_token()
@@ -0,0 +1,71 @@
+import os
+import time
+import tempfile
+import pandas as pd
+from src.database.db_manager import DatabaseManager
+from src.utils.market_loader import MarketLoader
+
+offline = set()
+renamed = {}
+
+def fake_listing(listing):
+    time.sleep(0.3)
+    if listing in offline:
+        raise ConnectionError(f"{listing} unreachable")
+    if listing == 'KRX':
+        return pd.DataFrame({'Code': ['005930', '000660', '035720'], 'Name': [renamed.get('005930', 'Samsung'), 'SK hynix', 'Kakao'],
+                             'Market': ['KOSPI', 'KOSPI', 'KOSPI'], 'Marcap': [4e14, 1e14, 2e13]})
+    if listing == 'S&P500':
+        return pd.DataFrame({'Symbol': ['AAPL', 'MSFT'], 'Name': ['Apple', 'Microsoft'], 'Sector': ['Tech', 'Tech']})
+    if listing in ('NASDAQ', 'NYSE'):
+        return pd.DataFrame({'Symbol': ['AAPL', f'{listing}1'], 'Name': ['Apple Inc', f'{listing} One'], 'Industry': ['Hardware', 'X']})
+    return pd.DataFrame({'Symbol': ['SPY'], 'Name': ['SPDR S&P 500']})
+
+def test_market_loader():
+    print(">>> Testing concurrent, incremental stock master refresh...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        loader = MarketLoader(snapshot_path=os.path.join(tmp, "stock_master.parquet"), listing_loader=fake_listing)
+
+        started = time.perf_counter()
+        stats = loader.refresh(db)
+        elapsed = time.perf_counter() - started
+        print(f"Cold refresh in {elapsed:.2f}s (serial ~1.5s): {stats}")
+        assert elapsed < 1.0 # Five listings fetched concurrently
+        assert stats['inserted'] == 8 and stats['deleted'] == 0 and stats['source'] == 'network'
+        master = db.get_stock_master().set_index('code')
+        assert master.loc['AAPL', 'market'] == 'S&P500' # First listing wins on duplicates
+        assert master.loc['005930', 'market'] == 'KOSPI'
+
+        # Nothing changed -> nothing written
+        mtime = os.path.getmtime(db.db_path)
+        time.sleep(0.05)
+        stats = loader.refresh(db)
+        assert stats['inserted'] == stats['updated'] == stats['deleted'] == 0
+        assert os.path.getmtime(db.db_path) == mtime
+
+        # Rename + delisting; a failed listing keeps its rows
+        renamed['005930'] = 'Samsung Electronics'
+        offline.add('NYSE')
+        conn = db._get_connection()
+        conn.execute("INSERT INTO stock_master (code, name, market) VALUES ('OLD', 'Delisted Co', 'KOSPI')")
+        conn.commit()
+        conn.close()
+        stats = loader.refresh(db)
+        print(f"Partial refresh: {stats}")
+        assert stats['updated'] == 1 and stats['deleted'] == 1 and 'NYSE' in stats['failed_listings']
+        master = db.get_stock_master().set_index('code')
+        assert master.loc['005930', 'name'] == 'Samsung Electronics'
+        assert 'OLD' not in master.index and 'NYSE1' in master.index
+
+        # Offline start: an empty master is seeded from the last full snapshot
+        offline.update(['KRX', 'S&P500', 'NASDAQ', 'NYSE', 'ETF/US'])
+        db2 = DatabaseManager(os.path.join(tmp, "fresh.db"))
+        assert loader.seed_from_snapshot(db2) == 8
+        stats = loader.refresh(db2)
+        assert stats['source'] == 'snapshot' and stats['deleted'] == 0
+        offline.clear()
+        renamed.clear()
+
+if __name__ == "__main__":
+    test_market_loader()
@@ -0,0 +1,48 @@
+import time
+from src.execution.account_state import AccountState
+from src.execution.order_manager import OrderManager
+from src.execution.order_pipeline import OrderPipeline, OrderRequest, RiskEngine
+
+class FakeKis:
+    """1,000,000 cash, no holdings. Orders take ~100ms to acknowledge."""
+    def get_balance(self):
+        return {'output1': [], 'output2': [{'dnca_tot_amt': '1000000'}]}
+
+    def place_order(self, symbol, qty, price, order_type="00", buy_sell="BUY"):
+        time.sleep(0.1)
+        return {'rt_cd': '0', 'msg1': 'OK'}
+
+def test_order_pipeline():
+    print(">>> Testing Order Pipeline & Risk Engine...")
+    kis = FakeKis()
+    om = OrderManager(kis, account=AccountState(kis))
+    risk = RiskEngine(om.account, max_position_qty=10, max_notional_per_symbol=500_000, dedup_window_sec=60)
+    pipeline = OrderPipeline(om, risk, max_workers=4)
+    
+    orders = [
+        OrderRequest("005930", "BUY", 1, ref_price=70000),
+        OrderRequest("000660", "BUY", 1, ref_price=130000),
+        OrderRequest("035420", "BUY", 1, ref_price=200000),
+        OrderRequest("051910", "BUY", 1, ref_price=650000),  # Exceeds remaining cash
+        OrderRequest("005930", "BUY", 1, ref_price=70000),   # Duplicate
+        OrderRequest("068270", "BUY", 20, ref_price=10000),  # Position limit
+        OrderRequest("207940", "BUY", 1, ref_price=800000),  # Max notional
+    ]
+    
+    started = time.perf_counter()
+    futures = pipeline.submit_many(orders)
+    done = [f.result() for f in futures if f]
+    elapsed = time.perf_counter() - started
+    
+    for o in orders:
+        print(f"  {o} {o.reason or ''}")
+    print(f"Dispatched {len(done)} orders in {elapsed:.2f}s, Stats: {pipeline.get_stats()}")
+    
+    assert [o.status for o in orders] == ["ACKED", "ACKED", "ACKED", "REJECTED", "REJECTED", "REJECTED", "REJECTED"]
+    assert elapsed < 0.25 # Concurrent (serial would be 0.3s)
+    assert om.account.get_cash() == 1_000_000 - 70000 - 130000 - 200000
+    assert pipeline.get_stats()['latency_ms']['max'] >= 100
+    pipeline.shutdown()
+
+if __name__ == "__main__":
+    test_order_pipeline()
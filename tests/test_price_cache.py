@@ -0,0 +1,44 @@
+import os
+import time
+import tempfile
+import pandas as pd
+from src.database.db_manager import DatabaseManager
+
+def test_price_cache_validity():
+    print(">>> Testing Parquet price caches survive non-price writes...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        dates = pd.bdate_range("2024-01-01", periods=50).strftime("%Y%m%d")
+        db.insert_daily_price([("005930", d, 100, 101, 99, 100 + i, 1000) for i, d in enumerate(dates)])
+
+        sql_loads = []
+        load = db.get_daily_price_as_df
+        db.get_daily_price_as_df = lambda symbol: sql_loads.append(symbol) or load(symbol)
+        read_chunks = db._read_by_symbol_chunks
+        db._read_by_symbol_chunks = lambda *args: sql_loads.append("panel") or read_chunks(*args)
+        db.get_daily_price_optimized("005930")
+        db.get_price_panel(["005930"], cache=True)
+        assert sql_loads == ["005930", "panel"]
+        time.sleep(0.01)
+
+        # Scheduler / screener / fundamentals writes to the same file
+        db.save_intraday_targets("20240301", {"005930": 70000.0})
+        db.mark_bought("20240301", "005930")
+        db.save_screener_result("dreman", "large_cap", {"results": []})
+        db.upsert_fundamentals([{"symbol": "005930", "pe": 10.0}])
+        db.upsert_universes([{"name": "test", "markets": "KOSPI"}], replace=False)
+        assert os.path.getmtime(db.db_path) > os.path.getmtime(os.path.join(db.cache_dir, "005930.parquet"))
+
+        df = db.get_daily_price_optimized("005930")
+        panel = db.get_price_panel(["005930"], cache=True)
+        assert sql_loads == ["005930", "panel"] # Both still served from Parquet
+        assert len(df) == len(panel) == 50
+
+        # A price write invalidates them
+        db.insert_daily_price([("005930", "20240401", 100, 101, 99, 999, 1000)])
+        assert db.get_daily_price_optimized("005930")['close'].iloc[-1] == 999
+        assert db.get_price_panel(["005930"], cache=True)["005930"].iloc[-1] == 999
+        assert sql_loads == ["005930", "panel"] * 2
+
+if __name__ == "__main__":
+    test_price_cache_validity()
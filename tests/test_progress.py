@@ -0,0 +1,52 @@
+import time
+from src.core.progress import ProgressReporter
+from src.web.jobs import JobManager, DONE
+
+def count_bars(n, progress=None):
+    progress.start("backtest", total=n, unit="bars")
+    for _ in range(n):
+        time.sleep(0.001)
+        progress.update()
+    progress.finish()
+    return n
+
+def test_progress_reporter():
+    print(">>> Testing Progress Reporter (rate limiting)...")
+    events = []
+    progress = ProgressReporter(events.append, min_interval=0.05)
+    progress.start("backtest", total=200_000, unit="bars")
+
+    started = time.perf_counter()
+    for _ in range(200_000):
+        progress.update()
+    elapsed = time.perf_counter() - started
+    progress.finish()
+
+    print(f"200k updates in {elapsed * 1000:.1f}ms, {len(events)} events, Last: {events[-1]}")
+    assert len(events) < 50 # Batched by time, not per update
+    assert events[-1]["final"] and events[-1]["pct"] == 100.0 and events[-1]["eta_sec"] == 0
+    assert elapsed < 1.0
+
+def test_job_progress_events():
+    print(">>> Testing Job progress channel (worker -> parent)...")
+    jobs = JobManager(max_workers=1, progress_interval=0.05)
+    try:
+        job_id = jobs.submit("bars", count_bars, 300, report_progress=True)
+        seen = []
+        seq = -1
+        while True:
+            status, seq, progress = jobs.wait_progress(job_id, seq, timeout=1.0)
+            if progress:
+                seen.append(progress)
+            if status == DONE:
+                break
+        print(f"Received {len(seen)} progress events, Last: {seen[-1] if seen else None}")
+        assert jobs.get(job_id)["result"] == 300
+        assert any(0 < (p["pct"] or 0) < 100 for p in seen) # Intermediate updates streamed
+        assert "progress" not in jobs.get(job_id)["params"]
+    finally:
+        jobs.shutdown()
+
+if __name__ == "__main__":
+    test_progress_reporter()
+    test_job_progress_events()
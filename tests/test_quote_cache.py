@@ -0,0 +1,64 @@
+import threading
+import time
+from src.api.quote_cache import QuoteCache
+
+def test_quote_cache():
+    print(">>> Testing Quote Cache (TTL + Coalescing)...")
+    cache = QuoteCache({'inquire-price': 0.5})
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1) # Simulate API round-trip
+        return {'stck_prpr': '71000'}
+    
+    # 1. 10 concurrent consumers for the same symbol -> 1 API call
+    threads = [threading.Thread(target=cache.get_or_fetch, args=('inquire-price', '005930', fetch)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"API calls for 10 concurrent consumers: {len(calls)}")
+    assert len(calls) == 1
+    
+    # 2. Within TTL -> hit
+    cache.get_or_fetch('inquire-price', '005930', fetch)
+    assert len(calls) == 1
+    
+    # 3. After TTL -> refetch
+    time.sleep(0.6)
+    cache.get_or_fetch('inquire-price', '005930', fetch)
+    assert len(calls) == 2
+    
+    stats = cache.get_stats()['inquire-price']
+    print(f"Stats: {stats}")
+    assert stats['misses'] == 2
+    assert stats['hits'] + stats['coalesced'] == 10
+
+def test_quote_cache_bounded():
+    print(">>> Testing Quote Cache size bound (expired pruned, then LRU)...")
+    cache = QuoteCache({'price': 60, 'inquire-price': 0.05}, max_entries=3)
+    for symbol in ("AAPL", "MSFT", "NVDA"):
+        cache.get_or_fetch('price', symbol, lambda: {'last': '1'})
+    cache.get_or_fetch('price', 'AAPL', lambda: None) # Hit: AAPL is now most recent
+    cache.get_or_fetch('price', 'TSLA', lambda: {'last': '1'})
+    assert len(cache) == 3
+    calls = []
+    cache.get_or_fetch('price', 'MSFT', lambda: calls.append(1) or {'last': '2'}) # Evicted (least recent)
+    cache.get_or_fetch('price', 'AAPL', lambda: calls.append(1) or {'last': '2'}) # Kept
+    assert len(calls) == 1
+
+    # Expired entries go before live ones
+    cache = QuoteCache({'price': 60, 'inquire-price': 0.05}, max_entries=3)
+    cache.get_or_fetch('price', 'AAPL', lambda: {'last': '1'})
+    cache.get_or_fetch('inquire-price', '005930', lambda: {'stck_prpr': '1'})
+    cache.get_or_fetch('inquire-price', '000660', lambda: {'stck_prpr': '1'})
+    time.sleep(0.1)
+    cache.get_or_fetch('price', 'MSFT', lambda: {'last': '1'})
+    assert len(cache) == 2 # Both expired quotes pruned, AAPL kept
+    cache.get_or_fetch('price', 'AAPL', lambda: None)
+    assert cache.get_stats()['price']['hits'] == 1
+
+if __name__ == "__main__":
+    test_quote_cache()
+    test_quote_cache_bounded()
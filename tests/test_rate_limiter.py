@@ -0,0 +1,29 @@
+import time
+from src.api.rate_limiter import TokenBucket, KisRateLimiter
+
+def test_rate_limiter():
+    print(">>> Testing Token Bucket Rate Limiter...")
+    
+    # 1. Burst up to capacity, then paced at `rate`
+    bucket = TokenBucket(rate=10, capacity=5)
+    started = time.perf_counter()
+    for _ in range(10):
+        bucket.acquire()
+    elapsed = time.perf_counter() - started
+    
+    stats = bucket.get_stats()
+    print(f"10 acquisitions in {elapsed:.2f}s, Stats: {stats}")
+    # 5 immediate + 5 paced at 10/s -> ~0.5s
+    assert 0.4 <= elapsed < 0.9
+    assert stats['acquired'] == 10
+    assert stats['waited'] == 5
+    
+    # 2. TR_ID routing
+    assert KisRateLimiter.bucket_for("FHKST01010100") == KisRateLimiter.QUOTATION
+    assert KisRateLimiter.bucket_for("HHDFS00000300") == KisRateLimiter.QUOTATION
+    assert KisRateLimiter.bucket_for("TTTC0802U") == KisRateLimiter.TRADING
+    assert KisRateLimiter.bucket_for("VTTC8434R") == KisRateLimiter.TRADING
+    print("[OK] Rate limiter works.")
+
+if __name__ == "__main__":
+    test_rate_limiter()
@@ -0,0 +1,133 @@
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import MethodType, SimpleNamespace
+from src.core import scheduler
+from src.core.scheduler import KronosScheduler, in_session, previous_weekday
+from src.core.trigger_engine import TriggerEngine
+from src.database.db_manager import DatabaseManager
+
+def fake_scheduler(db):
+    fired = []
+    fake = SimpleNamespace(db=db, _lock=scheduler.threading.Lock(), today_bought=set(), target_prices={},
+                           watchlist=SimpleNamespace(qty=lambda s: 1), target_symbols=[], collector=None)
+    fake.triggers = TriggerEngine(dispatcher=lambda trigger, price: fired.append((trigger.symbol, price)))
+    fake._precompute_targets = lambda: None
+    return fake, fired
+
+def test_session_guard():
+    print(">>> Testing breakout triggers only fire inside the regular session...")
+    assert in_session(datetime(2024, 1, 3, 9, 0))
+    assert in_session(datetime(2024, 1, 3, 15, 19))
+    assert not in_session(datetime(2024, 1, 3, 15, 20))
+    assert not in_session(datetime(2024, 1, 3, 16, 5)) # After-hours tick
+    assert not in_session(datetime(2024, 1, 3, 8, 59)) # Pre-open tick
+    assert not in_session(datetime(2024, 1, 6, 10, 0)) # Saturday
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        today = datetime.now().strftime("%Y%m%d")
+        db.save_intraday_targets(today, {"005930": 70000.0})
+        fake, fired = fake_scheduler(db)
+        original = scheduler.in_session
+        try:
+            # Restart outside the session: flags restored, nothing armed
+            scheduler.in_session = lambda now=None: False
+            KronosScheduler._restore_intraday_state(fake)
+            assert fake.target_prices == {"005930": 70000.0} and len(fake.triggers) == 0
+
+            # Restart inside the session re-arms; off-session ticks never dispatch
+            scheduler.in_session = lambda now=None: True
+            KronosScheduler._restore_intraday_state(fake)
+            assert fake.triggers.armed_symbols() == ["005930"]
+            scheduler.in_session = lambda now=None: False
+            KronosScheduler._on_tick(fake, "005930", 71000.0, {})
+            assert fired == []
+            scheduler.in_session = lambda now=None: True
+            KronosScheduler._on_tick(fake, "005930", 71000.0, {})
+            assert fired == [("005930", 71000.0)]
+
+            # After close the engine is emptied until the next market_open
+            KronosScheduler._restore_intraday_state(fake)
+            KronosScheduler._job_after_market(fake)
+            assert len(fake.triggers) == 0
+        finally:
+            scheduler.in_session = original
+
+class FakeAsyncKis:
+    async def get_prices(self, symbols):
+        return {s: {'stck_oprc': '1000'} for s in symbols}
+
+def test_stale_offsets_recomputed():
+    print(">>> Testing market_open recomputes offsets built from old bars...")
+    assert previous_weekday(datetime(2024, 1, 8)) == "20240105" # Monday -> Friday
+    assert previous_weekday(datetime(2024, 1, 3)) == "20240102"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        now = datetime.now()
+        prev = previous_weekday(now)
+        older = previous_weekday(datetime.strptime(prev, "%Y%m%d"))
+        db.insert_daily_price([("005930", older, 100, 110, 90, 100, 1)])
+
+        fake, _ = fake_scheduler(db)
+        fake.target_symbols = ["005930"]
+        fake.watchlist = SimpleNamespace(qty=lambda s: 1, k=lambda: 0.5, load=lambda: None)
+        fake.kis_async, fake.stream = FakeAsyncKis(), None
+        fake._precompute_targets = MethodType(KronosScheduler._precompute_targets, fake)
+
+        # after_market ran two sessions ago and was missed since
+        fake._precompute_targets()
+        assert fake.target_offsets == {"005930": 10.0} and fake.target_offsets_bar_date == older
+
+        # Yesterday's bar has since been collected: market_open must not reuse the old range
+        db.insert_daily_price([("005930", prev, 100, 130, 90, 120, 1)])
+        KronosScheduler._job_market_open(fake)
+        assert fake.target_offsets_bar_date == prev
+        assert fake.target_prices == {"005930": 1000 + 20.0}
+
+        # Bars from the previous session: offsets reused as they are
+        fake.target_offsets = {"005930": 7.0}
+        KronosScheduler._job_market_open(fake)
+        assert fake.target_prices == {"005930": 1007.0}
+
+class SlowPipeline:
+    """Risk check blocked on a balance inquiry; rejects symbols in `reject`."""
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.submitted = []
+
+    def submit(self, order):
+        time.sleep(0.2)
+        self.submitted.append(order.symbol)
+        return None if order.symbol in self.reject else object()
+
+def test_trigger_handoff():
+    print(">>> Testing fired triggers are handled off the tick thread, bought only once accepted...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        fake, _ = fake_scheduler(db)
+        fake.pipeline = SlowPipeline(reject={"000660"})
+        fake._trigger_queue = ThreadPoolExecutor(max_workers=1)
+        fake._handle_trigger = MethodType(KronosScheduler._handle_trigger, fake)
+        fake.triggers = TriggerEngine(dispatcher=MethodType(KronosScheduler._on_trigger, fake))
+        fake.triggers.arm("005930", 70000.0, payload={'qty': 1})
+        fake.triggers.arm("000660", 130000.0, payload={'qty': 1})
+
+        started = time.perf_counter()
+        fake.triggers.on_price("005930", 70100.0)
+        fake.triggers.on_price("000660", 130500.0)
+        assert time.perf_counter() - started < 0.1 # Ticks are not held up by the risk check
+        fake._trigger_queue.shutdown(wait=True)
+
+        assert fake.pipeline.submitted == ["005930", "000660"]
+        assert fake.today_bought == {"005930"} # Rejected order leaves the symbol unmarked
+        state = db.get_intraday_state(datetime.now().strftime("%Y%m%d"))
+        assert list(state.index[state['bought'] == 1]) == ["005930"]
+
+if __name__ == "__main__":
+    test_session_guard()
+    test_stale_offsets_recomputed()
+    test_trigger_handoff()
@@ -0,0 +1,85 @@
+import os
+import time
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from src import services
+from src.database.db_manager import DatabaseManager
+from src.analysis.factor_engine import DREMAN, get_presets, preset_hash
+from src.analysis.screener import DremanScreener, run_screen_job, load_screen_snapshot
+from src.core.scheduler import KronosScheduler
+from src.web import api
+
+class RecordingJobs:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, kind, fn, **params):
+        self.submitted.append(params)
+        return "job-1"
+
+def seed_fundamentals(db, symbols):
+    db.upsert_fundamentals([
+        {'symbol': s, 'name': s, 'sector': 'Technology', 'quote_type': 'EQUITY', 'price': 100, 'market_cap': 1e9,
+         'pe': 5 + i % 11, 'pb': 1 + i % 3, 'operating_cashflow': 1e8, 'dividend_yield': 0.02, 'debt_to_equity': 50,
+         'current_ratio': 1.5, 'enterprise_value': 2e9, 'ebitda': 1e8 * (1 + i % 5), 'roa': 0.01 * (i % 7)}
+        for i, s in enumerate(symbols)
+    ])
+
+def test_screener_snapshots():
+    print(">>> Testing precomputed screener snapshots...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        screener = DremanScreener()
+        seed_fundamentals(db, screener.get_universe('large_cap') + screener.get_universe('mid_cap'))
+
+        # Scheduler job: every configured preset x universe, from local fundamentals only
+        fake = SimpleNamespace(kis=SimpleNamespace(config={'screener': {'snapshots': {'top_n': 10}}}), db=db)
+        KronosScheduler._job_screener_snapshots(fake)
+        for strategy in ('dreman', 'magic'):
+            for universe in ('large_cap', 'mid_cap'):
+                stored = db.get_screener_result(strategy, universe)
+                assert stored is not None and stored['source'] == 'scheduled'
+                assert 0 < len(stored['payload']['results']) <= 10 and stored['top_n'] == 10
+                assert stored['preset_hash'] == preset_hash(get_presets()[strategy])
+
+        # Serving a snapshot is one row read, not a screen
+        started = time.perf_counter()
+        stored = db.get_screener_result('dreman', 'large_cap')
+        elapsed = time.perf_counter() - started
+        print(f"Snapshot read in {elapsed * 1000:.2f}ms, as of {stored['computed_at']}")
+        fresh = run_screen_job('dreman', 'large_cap', db_path=db.db_path, top_n=10)
+        assert [r['symbol'] for r in stored['payload']['results']] == [r['symbol'] for r in fresh['results']]
+
+        # A deep enough snapshot serves smaller requests, cut to top_n; deeper ones need a run
+        top5 = load_screen_snapshot(db, 'dreman', 'large_cap', top_n=5)
+        assert [r['symbol'] for r in top5['payload']['results']] == [r['symbol'] for r in fresh['results'][:5]]
+        assert load_screen_snapshot(db, 'dreman', 'large_cap', top_n=20) is None
+        assert len(db.get_screener_result('dreman', 'large_cap')['payload']['results']) == len(fresh['results'])
+
+        # On-demand refresh replaces the stored row
+        run_screen_job('dreman', 'large_cap', db_path=db.db_path, top_n=10, snapshot=True, source='on_demand')
+        stored = db.get_screener_result('dreman', 'large_cap')
+        assert stored['source'] == 'on_demand' and stored['top_n'] == 10
+
+        # API: snapshot served for top_n <= 10; other sizes run without touching it
+        saved = dict(services._services)
+        jobs = RecordingJobs()
+        services._services.update({"db": db, "jobs": jobs, "config": {'screener': {'snapshots': {'top_n': 10}}}})
+        try:
+            body = asyncio.run(api.run_screen(api.ScreenRequest(strategy="dreman", top_n=3)))
+            assert body["snapshot"] and len(body["results"]) == 3 and jobs.submitted == []
+            assert asyncio.run(api.run_screen(api.ScreenRequest(strategy="dreman", top_n=20))).status_code == 202
+            assert jobs.submitted[-1]["top_n"] == 20 and not jobs.submitted[-1]["snapshot"]
+            asyncio.run(api.run_screen(api.ScreenRequest(strategy="dreman", top_n=10, refresh=True)))
+            assert jobs.submitted[-1]["snapshot"]
+        finally:
+            services._services.clear()
+            services._services.update(saved)
+
+        # Editing a preset changes its hash, so the old snapshot is not served
+        assert preset_hash(dict(DREMAN, method='zscore')) != stored['preset_hash']
+        assert db.get_screener_result('dreman', 'kosdaq') is None
+
+if __name__ == "__main__":
+    test_screener_snapshots()
@@ -0,0 +1,54 @@
+import os
+import sys
+import subprocess
+import tempfile
+import threading
+from src import services
+from src.database.db_manager import DatabaseManager
+
+# Run in a fresh interpreter so earlier tests' imports don't count
+IMPORT_CHECK = """
+import sys
+import main
+from src import services
+assert not any(services.is_created(n) for n in ('kis', 'db', 'config', 'jobs')), 'service created at import'
+for module in ('yfinance', 'FinanceDataReader', 'pandas', 'src.core.backtest_runner', 'src.core.scheduler'):
+    assert module not in sys.modules, module + ' imported at startup'
+"""
+
+def test_lazy_imports():
+    print(">>> Testing app import creates no services and skips pandas, backtest runner and data sources...")
+    result = subprocess.run([sys.executable, "-c", IMPORT_CHECK], capture_output=True, text=True,
+                            cwd=os.getcwd(), env=dict(os.environ, PYTHONPATH=os.getcwd()))
+    assert result.returncode == 0, result.stderr
+
+def test_services_created_once():
+    print(">>> Testing shared services are created once, on first use...")
+    saved = dict(services._services)
+    saved_path = services.CONFIG_PATH
+    try:
+        services._services.clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            services.CONFIG_PATH = os.path.join(tmp, "missing.yaml")
+            assert services.get_config() == {} # No settings.yaml: defaults
+
+            created = []
+            def factory():
+                created.append(1)
+                return DatabaseManager(os.path.join(tmp, "test.db"))
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(services._get('db', factory))) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert len(created) == 1 and all(r is results[0] for r in results)
+            assert services.get_db() is results[0]
+    finally:
+        services._services.clear()
+        services._services.update(saved)
+        services.CONFIG_PATH = saved_path
+
+if __name__ == "__main__":
+    test_lazy_imports()
+    test_services_created_once()
@@ -0,0 +1,98 @@
+import os
+import time
+import tempfile
+from datetime import datetime
+from src.execution import trade_journal
+from src.execution.trade_journal import TradeJournal
+from src.execution.account_state import AccountState
+from src.execution.order_manager import OrderManager
+from src.execution.order_pipeline import OrderPipeline, OrderRequest, RiskEngine
+
+def test_trade_journal():
+    print(">>> Testing Trade Journal...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TradeJournal(db_path=os.path.join(tmp, "journal.db"), flush_interval=0.05, batch_size=50)
+        journal.start()
+
+        started = time.perf_counter()
+        for i in range(500):
+            journal.record(trade_journal.ORDER_ACK, symbol="005930", side="BUY", qty=1, price=70000,
+                           strategy="volatility_breakout", order_id=i)
+        journal.record(trade_journal.ORDER_ACK, symbol="005930", side="SELL", qty=2, price=71000, strategy="volatility_breakout")
+        journal.record(trade_journal.ORDER_ACK, symbol="000660", side="BUY", qty=1, price=130000, strategy="manual")
+        journal.record(trade_journal.ORDER_REJECT, symbol="000660", side="BUY", qty=5, price=130000, strategy="manual")
+        record_sec = time.perf_counter() - started
+        print(f"Recorded 503 events in {record_sec * 1000:.1f}ms (non-blocking)")
+
+        time.sleep(0.3)
+        assert journal.written == 503 # Flushed by the background writer
+        journal.stop()
+
+        today = datetime.now().strftime("%Y%m%d")
+        assert len(journal.query(start_date=today, symbol="005930")) == 501
+        assert len(journal.query(strategy="manual")) == 2
+        assert len(journal.query(event=trade_journal.ORDER_REJECT)) == 1
+
+        pnl = journal.daily_pnl(today)
+        print(pnl)
+        assert pnl.loc["005930", "buy_qty"] == 500
+        assert pnl.loc["005930", "net_cash"] == 2 * 71000 - 500 * 70000
+        assert pnl.loc["000660", "buy_amount"] == 130000 # Rejected order excluded
+
+        # FILL rows take precedence over acks for a symbol
+        journal.record(trade_journal.FILL, symbol="000660", side="BUY", qty=1, price=129500, strategy="manual")
+        journal.flush()
+        assert journal.daily_pnl(today).loc["000660", "buy_amount"] == 129500
+
+class FillingKis:
+    """Acks orders with a broker order number; executions are filled in by the test."""
+    def __init__(self):
+        self.executions = []
+
+    def get_balance(self):
+        return {'output1': [], 'output2': [{'dnca_tot_amt': '1000000'}]}
+
+    def place_order(self, symbol, qty, price, order_type="00", buy_sell="BUY"):
+        return {'rt_cd': '0', 'msg1': 'OK', 'output': {'ODNO': '0000001'}}
+
+    def get_daily_executions(self, date=None):
+        return [dict(row) for row in self.executions]
+
+def test_journal_fills_and_latency():
+    print(">>> Testing journaled ack latency and FILL rows from reconciliation...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TradeJournal(db_path=os.path.join(tmp, "journal.db"))
+        kis = FillingKis()
+        om = OrderManager(kis, account=AccountState(kis), journal=journal)
+        pipeline = OrderPipeline(om, RiskEngine(om.account))
+        order = OrderRequest("005930", "BUY", 10, ref_price=70000, strategy="volatility_breakout",
+                             signal_ts=time.time() - 0.05)
+        pipeline.submit(order).result()
+        pipeline.shutdown()
+
+        # Partial fill, then the rest: each reconcile journals only the new part
+        kis.executions = [{'odno': '0000001', 'pdno': '005930', 'sll_buy_dvsn_cd': '02',
+                           'tot_ccld_qty': '4', 'tot_ccld_amt': '279600'}]
+        om.account.refresh()
+        kis.executions[0].update(tot_ccld_qty='10', tot_ccld_amt='699600')
+        om.account.refresh()
+        om.account.refresh() # Nothing new
+        journal.flush()
+
+        today = datetime.now().strftime("%Y%m%d")
+        ack = journal.query(event=trade_journal.ORDER_ACK).iloc[0]
+        assert ack['latency_ms'] >= 50 and ack['broker_order_no'] == '0000001'
+        fills = journal.query(event=trade_journal.FILL)
+        assert fills['qty'].tolist() == [4, 6] and fills['price'].tolist() == [69900, 70000]
+        assert (fills['strategy'] == "volatility_breakout").all()
+        assert journal.daily_pnl(today).loc["005930", "buy_amount"] == 699600
+
+        # After a restart, fills already journaled are not reported again
+        om = OrderManager(kis, account=AccountState(kis), journal=journal)
+        om.account.refresh()
+        journal.flush()
+        assert len(journal.query(event=trade_journal.FILL)) == 2
+
+if __name__ == "__main__":
+    test_trade_journal()
+    test_journal_fills_and_latency()
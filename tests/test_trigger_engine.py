@@ -0,0 +1,56 @@
+import random
+import time
+from src.core.trigger_engine import TriggerEngine, ABOVE, BELOW
+
+def test_trigger_engine():
+    print(">>> Testing Trigger Engine...")
+    dispatched = []
+    engine = TriggerEngine(dispatcher=lambda trigger, price: dispatched.append((trigger.symbol, trigger.threshold, price)))
+    
+    # 1. Above / Below conditions
+    engine.arm("005930", 71000, ABOVE)
+    engine.arm("005930", 72000, ABOVE)
+    stop_id = engine.arm("005930", 68000, BELOW)
+    
+    assert engine.on_price("005930", 70500) == []
+    fired = engine.on_price("005930", 71500)
+    assert [t.threshold for t in fired] == [71000]
+    
+    # Fire-once: same price again fires nothing
+    assert engine.on_price("005930", 71500) == []
+    
+    fired = engine.on_price("005930", 67000)
+    assert [t.trigger_id for t in fired] == [stop_id]
+    assert len(engine) == 1
+    print(f"[OK] Dispatched: {dispatched}")
+    
+    # 2. Disarm
+    engine.clear()
+    tid = engine.arm("000660", 100, ABOVE)
+    assert engine.disarm(tid)
+    assert engine.on_price("000660", 200) == []
+    assert engine.armed_symbols() == []
+    
+    # 3. Scale: thousands of armed triggers
+    engine = TriggerEngine()
+    symbols = [f"{i:06d}" for i in range(1000)]
+    for symbol in symbols:
+        for _ in range(5):
+            engine.arm(symbol, random.uniform(900, 1100), ABOVE)
+    assert len(engine) == 5000
+    
+    max_seen = {}
+    started = time.perf_counter()
+    for _ in range(20):
+        for symbol in symbols:
+            price = random.uniform(800, 1000)
+            max_seen[symbol] = max(max_seen.get(symbol, 0), price)
+            engine.on_price(symbol, price)
+    elapsed = time.perf_counter() - started
+    print(f"[OK] 20,000 price updates over {engine.get_stats()} in {elapsed:.3f}s")
+    # Every trigger still armed must be above the highest price seen
+    for trigger in engine.get_triggers():
+        assert trigger.threshold > max_seen[trigger.symbol]
+
+if __name__ == "__main__":
+    test_trigger_engine()
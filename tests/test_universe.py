@@ -0,0 +1,97 @@
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from src.database.db_manager import DatabaseManager
+from src.analysis.fundamentals_fetcher import FundamentalsFetcher
+from src.analysis.fundamentals_store import FundamentalsStore
+from src.analysis.universe import Universe, to_yf_symbol
+from src.analysis.screener import DremanScreener
+
+def no_network(symbol):
+    raise AssertionError(f"Unexpected download: {symbol}")
+
+def build_master(db, n_krx=2000, n_us=10000):
+    rng = np.random.default_rng(0)
+    krx = pd.DataFrame({
+        'code_short': [f"{i:06d}" for i in range(n_krx)],
+        'name_kr': [f"KR{i}" for i in range(n_krx)],
+        'market': np.where(np.arange(n_krx) % 3 == 0, 'KOSDAQ', 'KOSPI'),
+        'sector': None,
+        'market_cap': rng.uniform(1e9, 1e13, n_krx),
+    })
+    us = pd.DataFrame({
+        'code_short': [f"US{i}" for i in range(n_us)],
+        'name_kr': [f"US{i}" for i in range(n_us)],
+        'market': np.where(np.arange(n_us) < 500, 'S&P500', 'NASDAQ'),
+        'sector': None,
+        'market_cap': None, # US listings have no cap
+    })
+    db.save_stock_master(pd.concat([krx, us], ignore_index=True))
+
+    # Stored fundamentals for every symbol (fresh)
+    rows = []
+    for code, market in zip(krx['code_short'], krx['market']):
+        rows.append({'symbol': to_yf_symbol(code, market)})
+    for code in us['code_short']:
+        rows.append({'symbol': code})
+    for i, r in enumerate(rows):
+        r.update({
+            'name': r['symbol'], 'sector': ['Technology', 'Industrials', 'Financial Services'][i % 3],
+            'quote_type': 'EQUITY', 'price': 100.0, 'market_cap': float(rng.uniform(1e8, 1e12)),
+            'pe': float(rng.uniform(-5, 40)), 'pb': float(rng.uniform(0.3, 5)),
+            'operating_cashflow': float(rng.uniform(-1e8, 1e10)), 'dividend_yield': float(rng.uniform(0, 0.06)),
+            'debt_to_equity': float(rng.uniform(0, 300)), 'current_ratio': float(rng.uniform(0.5, 3)),
+        })
+    db.upsert_fundamentals(rows)
+
+def test_universe():
+    print(">>> Testing DB-defined universes over stock_master...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        build_master(db)
+        universe = Universe(db)
+
+        large = universe.frame('krx_large')
+        assert len(large) == 200
+        assert large['market_cap'].is_monotonic_decreasing
+        assert all(s.endswith(('.KS', '.KQ')) for s in large['yf_symbol'])
+        assert to_yf_symbol('005930', 'KOSPI') == '005930.KS' and to_yf_symbol('BRK.B', 'NYSE') == 'BRK-B'
+
+        mid = universe.frame('krx_mid')
+        assert len(mid) == 500 and mid['market_cap'].iloc[0] < large['market_cap'].iloc[-1]
+
+        sp500 = universe.frame('us_sp500')
+        assert len(sp500) == 500 and sp500['market_cap'].notna().all() # Caps filled from fundamentals
+
+        # Custom definition stored in the DB
+        db.upsert_universes([{'name': 'us_big', 'label': 'US > $500B', 'markets': 'S&P500,NASDAQ', 'min_market_cap': 5e11}])
+        assert (universe.frame('us_big')['market_cap'] >= 5e11).all()
+        assert len(universe.definitions()) == 7
+
+def test_universe_scale_screen():
+    print(">>> Testing 12k-row screen from the store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "test.db"))
+        build_master(db)
+        store = FundamentalsStore(db, FundamentalsFetcher(info_loader=no_network))
+        screener = DremanScreener(store=store)
+
+        started = time.perf_counter()
+        results = screener.screen('all', top_n=30)
+        elapsed = time.perf_counter() - started
+        print(f"Screened {screener.freshness['count']} symbols in {elapsed * 1000:.0f}ms, Top: {results[0]['symbol']}")
+
+        assert screener.freshness['count'] == 12000
+        assert len(results) == 30
+        assert [r['rank'] for r in results] == sorted(r['rank'] for r in results)
+        assert all(r['sector'] != 'Financial Services' for r in results)
+        assert elapsed < 3.0
+
+        # Legacy names still work (fallback lists)
+        assert screener.get_universe('large_cap')[0] == 'AAPL'
+
+if __name__ == "__main__":
+    test_universe()
+    test_universe_scale_screen()
@@ -0,0 +1,34 @@
+import os
+import tempfile
+from src.database.db_manager import DatabaseManager
+from src.core.watchlist import Watchlist
+
+def test_watchlist():
+    print(">>> Testing Watchlist & Intraday State Persistence...")
+    db = DatabaseManager(db_path=os.path.join(tempfile.mkdtemp(), "market_data.db"))
+    
+    # 1. Seeded defaults, per-symbol params
+    wl = Watchlist(db)
+    assert wl.symbols == sorted(Watchlist.DEFAULT_SYMBOLS)
+    wl.add("035420", k=0.3, qty=5)
+    assert wl.qty("035420") == 5
+    assert wl.k()["035420"] == 0.3
+    
+    # 2. Missing qty (NULL -> NaN) falls back to the default
+    wl.add("051910", qty=None)
+    assert wl.qty("051910") == Watchlist.DEFAULT_QTY
+    assert wl.qty("999999") == Watchlist.DEFAULT_QTY
+    
+    # 3. Intraday state survives a restart
+    db.save_intraday_targets("20240104", {"005930": 72000.0, "000660": 135000.0})
+    db.mark_bought("20240104", "005930")
+    # Re-saving targets must not reset the bought flag
+    db.save_intraday_targets("20240104", {"005930": 72100.0})
+    state = db.get_intraday_state("20240104")
+    print(state)
+    assert state.loc["005930", "bought"] == 1
+    assert state.loc["005930", "target_price"] == 72100.0
+    assert state.loc["000660", "bought"] == 0
+
+if __name__ == "__main__":
+    test_watchlist()